@@ -0,0 +1,508 @@
+"""
+콜드 아카이브 (지난 원본 데이터를 일 단위 압축 컬럼 파일로 보관)
+- 파티션 관리 작업이 ARCHIVE_AFTER_DAYS 일이 지난 날짜의 sensor_data 를 파일로 옮기고 DB에서 삭제
+- 이력 조회 / CSV 내보내기는 구간이 아카이브된 날짜에 걸치면 파일을 mmap 으로 읽어 DB 결과와 합침
+- 보존 기간(RETENTION_DAYS)이 지난 파일은 삭제
+
+파일 형식 (ARCHIVE_DIR/sensor_data_YYYYMMDD.col, 리틀 엔디언)
+    매직 "SKCA" | 형식 버전 (u8) | 헤더 길이 (u32) | 헤더 JSON | 컬럼 데이터
+- 행은 (created_at, id) 오름차순, ARCHIVE_BLOCK_ROWS 행 단위 블록으로 나눔
+- 헤더에 블록별 행 수 / created_at 최소·최대 / 컬럼별 (오프셋, 길이, 인코딩) 기록 → 구간 밖 블록은 읽지 않음
+- 컬럼 인코딩 후 바이트 셔플(같은 자리 바이트끼리 모음) → zlib 압축
+    - id, created_at, threshold_version: 이전 값과의 차이 (delta)
+    - 실수형 측정값: 블록 값이 모두 소수 k 자리 이하면 정수(값 × 10^k)의 차이, 아니면 이전 값과 비트 XOR
+      (센서 값은 대부분 고정 소수 자리 → 정수 차이가 훨씬 잘 압축됨, 복원 결과는 원래 값과 비트 단위로 같음)
+    - device_id: 파일별 사전 코드, risk_level: 그대로
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models import SensorData
+from app.ring_buffer import FLOAT_COLUMNS
+from app.config import ARCHIVE_DIR, ARCHIVE_AFTER_DAYS, ARCHIVE_BLOCK_ROWS, ARCHIVE_COMPRESSION_LEVEL
+
+MAGIC = b"SKCA"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<4sBI")
+
+# (컬럼 이름, 저장 dtype, 인코딩)
+COLUMNS = (
+    ("id", np.int64, "delta"),
+    ("created_at", np.int64, "delta"),   # naive KST 마이크로초
+    ("device", np.int32, "raw"),         # header["devices"] 의 인덱스
+    *((name, np.float64, "xor") for name in FLOAT_COLUMNS),
+    ("risk_level", np.int8, "raw"),
+    ("threshold_version", np.int32, "delta"),   # -1: 없음
+)
+_DTYPES = {name: np.dtype(dtype) for name, dtype, _ in COLUMNS}
+
+
+def _to_micros(values) -> np.ndarray:
+    """naive KST datetime 목록 → 마이크로초 배열"""
+    return np.asarray(values, dtype="datetime64[us]").astype(np.int64)
+
+
+def _from_micros(values: np.ndarray) -> list:
+    """마이크로초 배열 → naive KST datetime 리스트"""
+    return values.astype("datetime64[us]").tolist()
+
+
+MAX_DECIMAL_SCALE = 6
+
+
+def _decimal_scale(values: np.ndarray) -> Optional[int]:
+    """값 × 10^k 를 정수로 바꿨다가 나누면 원래 값과 정확히 같아지는 가장 작은 k (없으면 None)"""
+    if not np.isfinite(values).all() or np.abs(values).max(initial=0) >= 2 ** 52 / 10 ** MAX_DECIMAL_SCALE:
+        return None
+    for scale in range(MAX_DECIMAL_SCALE + 1):
+        factor = 10.0 ** scale
+        # 비트 단위 비교 (-0.0 은 정수로 바꾸면 부호가 사라지므로 제외됨)
+        if np.array_equal((np.round(values * factor) / factor).view(np.uint64), values.view(np.uint64)):
+            return scale
+    return None
+
+
+def _pack(encoded: np.ndarray) -> bytes:
+    """바이트 셔플 → zlib 압축"""
+    shuffled = encoded.view(np.uint8).reshape(-1, encoded.itemsize).T
+    return zlib.compress(shuffled.tobytes(), ARCHIVE_COMPRESSION_LEVEL)
+
+
+def _delta(values: np.ndarray) -> np.ndarray:
+    return np.diff(values, prepend=values.dtype.type(0))
+
+
+def _xor(values: np.ndarray) -> np.ndarray:
+    bits = values.view(np.uint64)
+    return bits ^ np.concatenate((np.zeros(1, dtype=np.uint64), bits[:-1]))
+
+
+def _encode_column(values: np.ndarray, codec: str) -> Tuple[bytes, str]:
+    """
+    컬럼 인코딩 → 바이트 셔플 → zlib 압축
+
+    Returns:
+        (압축 데이터, 실제 적용한 인코딩) - 실수형은 "decimal<k>" 와 "xor" 중 더 작은 쪽
+    """
+    if codec == "delta":
+        return _pack(_delta(values)), codec
+
+    if codec == "xor":
+        candidates = [(_pack(_xor(values)), "xor")]
+        scale = _decimal_scale(values)
+        if scale is not None:
+            scaled = np.round(values * 10.0 ** scale).astype(np.int64)
+            candidates.append((_pack(_delta(scaled)), f"decimal{scale}"))
+        return min(candidates, key=lambda candidate: len(candidate[0]))
+
+    return _pack(values), codec
+
+
+def _decode_column(data, dtype: np.dtype, codec: str, rows: int) -> np.ndarray:
+    """_encode_column 의 역변환"""
+    shuffled = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+
+    if codec.startswith("decimal"):
+        scaled = np.cumsum(shuffled.reshape(8, rows).T.copy().view(np.int64).ravel())
+        return scaled / 10.0 ** int(codec[7:])
+
+    if codec == "xor":
+        bits = shuffled.reshape(dtype.itemsize, rows).T.copy().view(np.uint64).ravel()
+        return np.bitwise_xor.accumulate(bits).view(dtype)
+
+    encoded = shuffled.reshape(dtype.itemsize, rows).T.copy().view(dtype).ravel()
+    if codec == "delta":
+        return np.cumsum(encoded, dtype=dtype)
+    return encoded
+
+
+class ArchiveFile:
+    """
+    아카이브 파일 1개 (mmap 으로 열고 필요한 블록의 컬럼만 압축 해제)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        stat = os.stat(path)
+        self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"아카이브 파일 형식이 아닙니다: {path}")
+
+        self._payload = _PREAMBLE.size + header_length
+        self.header = json.loads(self._mmap[_PREAMBLE.size:self._payload])
+        self.rows = self.header["rows"]
+        self.devices: List[str] = self.header["devices"]
+
+    def read(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        created_at 이 [start, end] (마이크로초) 인 행의 컬럼 배열 (오름차순)
+
+        Args:
+            start, end: 조회 구간 (None 이면 제한 없음)
+            columns: 읽을 컬럼 (생략 시 전체, created_at 은 항상 포함)
+        """
+        names = [name for name, _, _ in COLUMNS if columns is None or name in columns or name == "created_at"]
+        view = memoryview(self._mmap)
+
+        parts = {name: [] for name in names}
+        for block in self.header["blocks"]:
+            if (start is not None and block["max"] < start) or (end is not None and block["min"] > end):
+                continue
+            for name in names:
+                offset, length, codec = block["columns"][name]
+                offset += self._payload
+                parts[name].append(
+                    _decode_column(view[offset:offset + length], _DTYPES[name], codec, block["rows"])
+                )
+
+        result = {
+            name: np.concatenate(chunks) if chunks else np.zeros(0, dtype=_DTYPES[name])
+            for name, chunks in parts.items()
+        }
+
+        mask = np.ones(len(result["created_at"]), dtype=bool)
+        if start is not None:
+            mask &= result["created_at"] >= start
+        if end is not None:
+            mask &= result["created_at"] <= end
+        if not mask.all():
+            result = {name: values[mask] for name, values in result.items()}
+        return result
+
+
+def write_archive_file(path: str, columns: Dict[str, np.ndarray], devices: List[str], block_rows: int):
+    """
+    컬럼 배열을 아카이브 파일로 기록 (임시 파일에 쓴 뒤 교체 → 읽는 쪽은 항상 완전한 파일을 봄)
+
+    Args:
+        columns: COLUMNS 이름 → 배열 ((created_at, id) 오름차순)
+        devices: device 컬럼 코드 → device_id
+    """
+    rows = len(columns["id"])
+    payload = []
+    blocks = []
+    offset = 0
+
+    for first in range(0, rows, block_rows):
+        last = min(first + block_rows, rows)
+        created_at = columns["created_at"][first:last]
+        block = {
+            "rows": last - first,
+            "min": int(created_at[0]),
+            "max": int(created_at[-1]),
+            "columns": {},
+        }
+        for name, dtype, codec in COLUMNS:
+            data, applied = _encode_column(np.ascontiguousarray(columns[name][first:last], dtype=dtype), codec)
+            block["columns"][name] = [offset, len(data), applied]
+            payload.append(data)
+            offset += len(data)
+        blocks.append(block)
+
+    header = json.dumps({"rows": rows, "devices": devices, "blocks": blocks}, separators=(",", ":")).encode()
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for data in payload:
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class ColdArchive:
+    """
+    일 단위 아카이브 파일 모음
+
+    열린 파일은 (inode, 수정 시각, 크기) 가 바뀔 때까지 mmap 을 재사용한다.
+    다른 워커가 파일을 다시 쓰면 다음 조회에서 새로 연다.
+    """
+    def __init__(
+        self,
+        directory: str = ARCHIVE_DIR,
+        after_days: Optional[int] = ARCHIVE_AFTER_DAYS,
+        block_rows: int = ARCHIVE_BLOCK_ROWS
+    ):
+        self.directory = directory
+        self.after_days = after_days
+        self.block_rows = block_rows
+
+        self._files: Dict[date, ArchiveFile] = {}
+
+        # 통계
+        self.archived_days = 0
+        self.archived_rows = 0
+        self.expired_days = 0
+        self.reads = 0
+
+    def _path(self, day: date) -> str:
+        return os.path.join(self.directory, day.strftime("sensor_data_%Y%m%d.col"))
+
+    def archive_before(self, today: date) -> Optional[date]:
+        """이 날짜 이전 데이터는 아카이브 대상 (None: 아카이브 사용 안 함)"""
+        if self.after_days is None:
+            return None
+        return today - timedelta(days=self.after_days)
+
+    def days(self) -> List[date]:
+        """아카이브된 날짜 목록 (오름차순)"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        days = []
+        for name in names:
+            if name.startswith("sensor_data_") and name.endswith(".col"):
+                try:
+                    days.append(datetime.strptime(name[12:20], "%Y%m%d").date())
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def _open(self, day: date) -> Optional[ArchiveFile]:
+        path = self._path(day)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._files.pop(day, None)
+            return None
+
+        cached = self._files.get(day)
+        if cached is not None and cached.signature == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            return cached
+
+        archive_file = ArchiveFile(path)
+        self._files[day] = archive_file
+        return archive_file
+
+    def days_between(self, start: Optional[datetime], end: Optional[datetime]) -> List[date]:
+        """구간 [start, end] (None 이면 제한 없음) 에 걸친 아카이브 날짜 목록 (오름차순)"""
+        return [
+            day for day in self.days()
+            if (start is None or day >= start.date()) and (end is None or day <= end.date())
+        ]
+
+    def overlaps(self, start: Optional[datetime], end: Optional[datetime]) -> bool:
+        """구간 [start, end] (None 이면 제한 없음) 에 아카이브된 날짜가 있는지 여부"""
+        return bool(self.days_between(start, end))
+
+    # ----------------------------------------
+    # 기록 / 만료
+    # ----------------------------------------
+
+    def write_day(self, day: date, rows: Dict[str, np.ndarray]) -> int:
+        """
+        하루치 데이터를 아카이브 (이미 파일이 있으면 늦게 들어온 행을 합쳐 다시 기록)
+
+        Args:
+            day: 날짜 (한국 시간)
+            rows: "id", "device_id", "created_at"(마이크로초), 측정값, "risk_level", "threshold_version"(-1: 없음) 배열
+
+        Returns:
+            파일의 전체 행 수
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        rows = dict(rows)
+        rows["device_id"] = np.asarray(rows["device_id"], dtype=object)
+
+        existing = self._open(day)
+        if existing is not None:
+            old = existing.read()
+            old["device_id"] = np.asarray(existing.devices, dtype=object)[old.pop("device")]
+            rows = {name: np.concatenate((old[name], np.asarray(values))) for name, values in rows.items()}
+
+        # (created_at, id) 정렬, 같은 id 는 한 번만
+        order = np.lexsort((rows["id"], rows["created_at"]))
+        rows = {name: np.asarray(values)[order] for name, values in rows.items()}
+        _, unique = np.unique(rows["id"], return_index=True)
+        if len(unique) != len(order):
+            keep = np.sort(unique)
+            rows = {name: values[keep] for name, values in rows.items()}
+
+        devices, codes = np.unique(rows.pop("device_id").astype(str), return_inverse=True)
+        rows["device"] = codes.astype(np.int32)
+
+        write_archive_file(self._path(day), rows, devices.tolist(), self.block_rows)
+        self._files.pop(day, None)
+        return len(codes)
+
+    def expire(self, cutoff: date) -> int:
+        """
+        cutoff 이전 날짜의 파일 삭제
+
+        Returns:
+            삭제한 파일 수
+        """
+        expired = [day for day in self.days() if day < cutoff]
+        for day in expired:
+            self._files.pop(day, None)
+            os.remove(self._path(day))
+
+        if expired:
+            self.expired_days += len(expired)
+            print(f"🗑️ 보존 기간 만료 아카이브 {len(expired)}일 삭제 (~{expired[-1].isoformat()})")
+        return len(expired)
+
+    # ----------------------------------------
+    # 조회
+    # ----------------------------------------
+
+    def read_day(
+        self,
+        day: date,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        device_id: Optional[str]
+    ) -> Optional[Tuple[ArchiveFile, Dict[str, np.ndarray]]]:
+        """
+        하루치 파일에서 구간/디바이스에 맞는 컬럼 배열 읽기
+
+        Returns:
+            (파일, 컬럼 배열) - 파일이 없거나 해당 디바이스가 없으면 None
+        """
+        archive_file = self._open(day)
+        if archive_file is None:
+            return None
+
+        self.reads += 1
+        columns = archive_file.read(
+            int(_to_micros(start)) if start is not None else None,
+            int(_to_micros(end)) if end is not None else None
+        )
+        if device_id is not None:
+            if device_id not in archive_file.devices:
+                return None
+            mask = columns["device"] == archive_file.devices.index(device_id)
+            columns = {name: values[mask] for name, values in columns.items()}
+        return archive_file, columns
+
+    def query(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        limit: int,
+        device_id: Optional[str] = None,
+        cursor: Optional[Tuple[datetime, int]] = None
+    ) -> List[SensorData]:
+        """
+        아카이브에서 (created_at, id) 내림차순으로 최대 limit 건 조회 (최신 날짜부터 필요한 만큼만 읽음)
+
+        Args:
+            start, end: 조회 구간 (naive KST, None 이면 제한 없음)
+            limit: 최대 조회 개수
+            device_id: 디바이스 ID (None 이면 전체 디바이스)
+            cursor: 이전 페이지 마지막 행의 (created_at, id)
+
+        Returns:
+            SensorData 리스트 (세션에 속하지 않은 객체)
+        """
+        if cursor is not None and (end is None or cursor[0] < end):
+            end = cursor[0]
+
+        rows: List[SensorData] = []
+        for day in reversed(self.days_between(start, end)):
+            loaded = self.read_day(day, start, end, device_id)
+            if loaded is None:
+                continue
+            archive_file, columns = loaded
+
+            if cursor is not None:
+                cursor_time = int(_to_micros(cursor[0]))
+                created_at, ids = columns["created_at"], columns["id"]
+                mask = (created_at < cursor_time) | ((created_at == cursor_time) & (ids < cursor[1]))
+                columns = {name: values[mask] for name, values in columns.items()}
+
+            selected = slice(None, -(limit - len(rows)) - 1, -1)
+            created_at = _from_micros(columns["created_at"][selected])
+            for n, i in enumerate(range(len(columns["id"]))[selected]):
+                version = int(columns["threshold_version"][i])
+                rows.append(SensorData(
+                    id=int(columns["id"][i]),
+                    device_id=archive_file.devices[columns["device"][i]],
+                    created_at=created_at[n],
+                    risk_level=int(columns["risk_level"][i]),
+                    threshold_version=version if version >= 0 else None,
+                    **{name: float(columns[name][i]) for name in FLOAT_COLUMNS}
+                ))
+
+            if len(rows) >= limit:
+                break
+
+        return rows
+
+    def iter_export_rows(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        device_id: Optional[str],
+        columns: Sequence[str],
+        chunk_size: int
+    ) -> Iterator[List[tuple]]:
+        """
+        아카이브 행을 columns 순서의 튜플로 chunk_size 개씩 생성 (오래된 것부터, CSV 내보내기용)
+        """
+        for day in self.days_between(start, end):
+            loaded = self.read_day(day, start, end, device_id)
+            if loaded is None:
+                continue
+            archive_file, data = loaded
+
+            for first in range(0, len(data["id"]), chunk_size):
+                chunk = {name: values[first:first + chunk_size] for name, values in data.items()}
+                values = {
+                    "created_at": _from_micros(chunk["created_at"]),
+                    "device_id": [archive_file.devices[code] for code in chunk["device"].tolist()],
+                    "threshold_version": [v if v >= 0 else None for v in chunk["threshold_version"].tolist()],
+                }
+                for name in columns:
+                    if name not in values:
+                        values[name] = chunk[name].tolist()
+                yield list(zip(*(values[name] for name in columns)))
+
+    def stats(self) -> dict:
+        """
+        아카이브 상태 (헬스체크/모니터링용)
+        """
+        days = self.days()
+        files = [self._open(day) for day in days]
+        files = [archive_file for archive_file in files if archive_file is not None]
+        rows = sum(archive_file.rows for archive_file in files)
+        size = sum(archive_file.size for archive_file in files)
+        return {
+            "directory": self.directory,
+            "after_days": self.after_days,
+            "days": len(files),
+            "first_day": days[0].isoformat() if days else None,
+            "last_day": days[-1].isoformat() if days else None,
+            "rows": rows,
+            "bytes": size,
+            "bytes_per_row": round(size / rows, 2) if rows else None,
+            "archived_days": self.archived_days,
+            "archived_rows": self.archived_rows,
+            "expired_days": self.expired_days,
+            "reads": self.reads,
+        }
+
+
+# 전역 ColdArchive 인스턴스
+cold_archive = ColdArchive()
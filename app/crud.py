@@ -1,26 +1,39 @@
 """
 CRUD 및 비즈니스 로직
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from datetime import datetime, timedelta
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, desc, or_, select
+from datetime import datetime, timedelta, time as dtime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+import numpy as np
 import pytz
 import math
+import json
+import base64
+import asyncio
+import time
 
 from app.models import SensorData, Threshold
-from app.schemas import SensorDataCreate
-from app.config import TIMEZONE, RiskThresholds
+from app.schemas import SensorDataCreate, SensorDataRead
+from app.rollups import update_rollups
+from app.ring_buffer import recent_buffer, FLOAT_COLUMNS
+from app.latest_cache import latest_cache
+from app.archive import cold_archive
+from app.pubsub import bus
+from app.metrics import READINGS_TOTAL, DB_WRITE_SECONDS, DB_COMMIT_SECONDS, DB_WRITTEN_ROWS_TOTAL
+from app.thresholds import threshold_store, RISK_THRESHOLD_NAMES
+from app.config import TIMEZONE, RiskThresholds, SIMULATION_CHUNK_SIZE, CSV_EXPORT_CHUNK_SIZE
 
 
-def calculate_risk_level(
+def calculate_risk_score(
     moisture: float,
     accel_x: float,
     accel_y: float,
-    vibration_raw: float
-) -> int:
+    vibration_raw: float,
+    thresholds=RiskThresholds
+) -> float:
     """
-    가중치 기반 위험도 계산 (0: 정상, 1: 주의, 2: 위험)
+    가중치 기반 최종 위험도 점수 계산 (0.0 ~ 1.0)
     
     논문 기반 가중치 적용:
     - 기울기 (Tilt): 0.5 - 직접적 전조 (Primary Indicator)
@@ -30,77 +43,174 @@ def calculate_risk_level(
     계산 과정:
     1. 각 센서 값을 0~1로 정규화
     2. 가중치 적용하여 최종 점수 계산
-    3. 최종 점수로 위험도 판정
     
     Args:
         moisture: 토양 수분 센서 값 (낮을수록 수분 많음)
         accel_x: X축 가속도
         accel_y: Y축 가속도
         vibration_raw: 진동 센서 값 (0 또는 1)
+        thresholds: 임계값 (RiskThresholds 와 같은 이름의 속성을 가진 객체)
     
     Returns:
-        0: 정상, 1: 주의, 2: 위험
+        최종 점수
     """
+    t = thresholds
     
     # 1. 기울기 점수 계산 (가속도 X, Y 벡터 크기)
-    tilt_magnitude = math.sqrt(accel_x ** 2 + accel_y ** 2)
+    # x * x 는 정확히 반올림되는 곱셈 → 벡터 계산(NumPy), 대시보드(JS)와 결과가 비트 단위로 일치
+    tilt_magnitude = math.sqrt(accel_x * accel_x + accel_y * accel_y)
     
-    if tilt_magnitude < RiskThresholds.TILT_NORMAL:
+    if tilt_magnitude < t.TILT_NORMAL:
         tilt_score = 0.0
-    elif tilt_magnitude < RiskThresholds.TILT_DANGER:
+    elif tilt_magnitude < t.TILT_DANGER:
         # 선형 보간: NORMAL → DANGER 구간을 0~1로 정규화
-        tilt_score = (tilt_magnitude - RiskThresholds.TILT_NORMAL) / \
-                     (RiskThresholds.TILT_DANGER - RiskThresholds.TILT_NORMAL)
+        tilt_score = (tilt_magnitude - t.TILT_NORMAL) / \
+                     (t.TILT_DANGER - t.TILT_NORMAL)
     else:
         tilt_score = 1.0
     
     # 2. 수분 점수 계산 (역방향: 낮을수록 위험)
-    if moisture > RiskThresholds.MOISTURE_NORMAL:
+    if moisture > t.MOISTURE_NORMAL:
         moisture_score = 0.0
-    elif moisture > RiskThresholds.MOISTURE_WARNING:
+    elif moisture > t.MOISTURE_WARNING:
         # 선형 보간: NORMAL → WARNING 구간을 0~1로 정규화
-        moisture_score = (RiskThresholds.MOISTURE_NORMAL - moisture) / \
-                        (RiskThresholds.MOISTURE_NORMAL - RiskThresholds.MOISTURE_WARNING)
+        moisture_score = (t.MOISTURE_NORMAL - moisture) / \
+                        (t.MOISTURE_NORMAL - t.MOISTURE_WARNING)
     else:
         moisture_score = 1.0
     
     # 3. 진동 점수 계산 (이진 신호)
-    vibration_score = 1.0 if vibration_raw >= RiskThresholds.VIBRATION_THRESHOLD else 0.0
+    vibration_score = 1.0 if vibration_raw >= t.VIBRATION_THRESHOLD else 0.0
     
     # 4. 가중치 적용하여 최종 점수 계산
-    final_score = (
-        RiskThresholds.WEIGHT_TILT * tilt_score +
-        RiskThresholds.WEIGHT_MOISTURE * moisture_score +
-        RiskThresholds.WEIGHT_VIBRATION * vibration_score
+    return (
+        t.WEIGHT_TILT * tilt_score +
+        t.WEIGHT_MOISTURE * moisture_score +
+        t.WEIGHT_VIBRATION * vibration_score
     )
+
+
+def calculate_risk_level(
+    moisture: float,
+    accel_x: float,
+    accel_y: float,
+    vibration_raw: float,
+    thresholds=RiskThresholds
+) -> int:
+    """
+    가중치 기반 위험도 계산 (0: 정상, 1: 주의, 2: 위험)
     
-    # 5. 최종 위험도 판정
-    if final_score < RiskThresholds.RISK_NORMAL_MAX:
+    Args:
+        moisture: 토양 수분 센서 값 (낮을수록 수분 많음)
+        accel_x: X축 가속도
+        accel_y: Y축 가속도
+        vibration_raw: 진동 센서 값 (0 또는 1)
+        thresholds: 임계값 (RiskThresholds 와 같은 이름의 속성을 가진 객체)
+    
+    Returns:
+        0: 정상, 1: 주의, 2: 위험
+    """
+    final_score = calculate_risk_score(moisture, accel_x, accel_y, vibration_raw, thresholds)
+    
+    # 최종 위험도 판정
+    if final_score < thresholds.RISK_NORMAL_MAX:
         return 0  # 정상
-    elif final_score < RiskThresholds.RISK_WARNING_MAX:
+    elif final_score < thresholds.RISK_WARNING_MAX:
         return 1  # 주의
     else:
         return 2  # 위험
 
 
-def create_sensor_data(db: Session, data: SensorDataCreate) -> SensorData:
+def calculate_risk_scores(
+    moisture,
+    accel_x,
+    accel_y,
+    vibration_raw,
+    thresholds=RiskThresholds
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    센서 데이터 생성 및 저장
+    위험도 일괄 계산 (NumPy 벡터 연산)
+    
+    calculate_risk_score / calculate_risk_level 과 같은 연산 순서를 배열 단위로 수행하므로
+    행마다 결과(점수, 위험도)가 스칼라 함수와 정확히 일치한다.
+    
+    Args:
+        moisture, accel_x, accel_y, vibration_raw: 컬럼 배열 (길이 동일)
+        thresholds: 임계값 (RiskThresholds 와 같은 이름의 속성을 가진 객체)
+    
+    Returns:
+        (점수 배열 float64, 위험도 배열 int8)
+    """
+    t = thresholds
+    moisture = np.asarray(moisture, dtype=np.float64)
+    accel_x = np.asarray(accel_x, dtype=np.float64)
+    accel_y = np.asarray(accel_y, dtype=np.float64)
+    vibration_raw = np.asarray(vibration_raw, dtype=np.float64)
+    
+    # 선택되지 않는 구간의 0 나눗셈 경고는 무시 (스칼라 함수에서는 도달하지 않는 분기)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 1. 기울기 점수
+        tilt_magnitude = np.sqrt(accel_x * accel_x + accel_y * accel_y)
+        tilt_score = np.where(
+            tilt_magnitude < t.TILT_NORMAL, 0.0,
+            np.where(
+                tilt_magnitude < t.TILT_DANGER,
+                (tilt_magnitude - t.TILT_NORMAL) / (t.TILT_DANGER - t.TILT_NORMAL),
+                1.0
+            )
+        )
+        
+        # 2. 수분 점수 (역방향)
+        moisture_score = np.where(
+            moisture > t.MOISTURE_NORMAL, 0.0,
+            np.where(
+                moisture > t.MOISTURE_WARNING,
+                (t.MOISTURE_NORMAL - moisture) / (t.MOISTURE_NORMAL - t.MOISTURE_WARNING),
+                1.0
+            )
+        )
+    
+    # 3. 진동 점수
+    vibration_score = np.where(vibration_raw >= t.VIBRATION_THRESHOLD, 1.0, 0.0)
+    
+    # 4. 최종 점수
+    scores = (
+        t.WEIGHT_TILT * tilt_score +
+        t.WEIGHT_MOISTURE * moisture_score +
+        t.WEIGHT_VIBRATION * vibration_score
+    )
+    
+    # 5. 위험도 판정
+    levels = np.where(
+        scores < t.RISK_NORMAL_MAX, 0,
+        np.where(scores < t.RISK_WARNING_MAX, 1, 2)
+    ).astype(np.int8)
+    
+    return scores, levels
+
+
+def build_sensor_values(data: SensorDataCreate) -> dict:
+    """
+    센서 데이터 요청을 저장할 컬럼 값으로 변환
+    - 위험도 계산
+    - 타임스탬프 처리 (한국 시간)
     
     Args:
-        db: 데이터베이스 세션
         data: 센서 데이터 (Pydantic 스키마)
     
     Returns:
-        저장된 센서 데이터 (ORM 모델)
+        SensorData 컬럼명 → 값 딕셔너리 (id 제외)
     """
-    # 위험도 계산
+    # 위험도 계산 (현재 임계값 스냅샷, DB 조회 없음)
+    thresholds = threshold_store.current
     risk_level = calculate_risk_level(
         moisture=data.moisture,
         accel_x=data.accel.x,
         accel_y=data.accel.y,
-        vibration_raw=data.vibration_raw
+        vibration_raw=data.vibration_raw,
+        thresholds=thresholds
     )
+    READINGS_TOTAL.labels(risk_level).inc()
     
     # 타임스탬프 처리 (한국 시간)
     kst = pytz.timezone(TIMEZONE)
@@ -113,43 +223,225 @@ def create_sensor_data(db: Session, data: SensorDataCreate) -> SensorData:
     else:
         created_at = datetime.now(kst)
     
-    # DB 저장
-    db_data = SensorData(
-        moisture=data.moisture,
-        accel_x=data.accel.x,
-        accel_y=data.accel.y,
-        accel_z=data.accel.z,
-        gyro_x=data.gyro.x,
-        gyro_y=data.gyro.y,
-        gyro_z=data.gyro.z,
-        vibration_raw=data.vibration_raw,
-        risk_level=risk_level,
-        created_at=created_at
+    # DB DATETIME 컬럼은 타임존 없이 한국 시간으로 저장됨 (조회 결과와 동일한 형태로 맞춤)
+    created_at = created_at.replace(tzinfo=None)
+    
+    return {
+        "device_id": data.device_id,
+        "moisture": data.moisture,
+        "accel_x": data.accel.x,
+        "accel_y": data.accel.y,
+        "accel_z": data.accel.z,
+        "gyro_x": data.gyro.x,
+        "gyro_y": data.gyro.y,
+        "gyro_z": data.gyro.z,
+        "vibration_raw": data.vibration_raw,
+        "risk_level": risk_level,
+        "threshold_version": thresholds.VERSION,
+        "created_at": created_at,
+    }
+
+
+def build_sensor_values_from_columns(columns: dict) -> List[dict]:
+    """
+    컬럼 배열(바이너리 수집 형식 디코딩 결과)을 저장할 컬럼 값으로 변환
+    - 위험도는 배열 단위로 계산 (calculate_risk_scores, 스칼라 계산과 결과 동일)
+    - 측정 시각(epoch 밀리초, 0 이면 지금)을 한국 시간(타임존 없음)으로
+    
+    Args:
+        columns: app.ingest_encoding.decode_records 결과
+    
+    Returns:
+        SensorData 컬럼명 → 값 딕셔너리 목록 (id 제외, 입력 순서 유지)
+    """
+    thresholds = threshold_store.current
+    _, levels = calculate_risk_scores(
+        columns["moisture"], columns["accel_x"], columns["accel_y"], columns["vibration_raw"],
+        thresholds=thresholds
     )
+    for level, count in enumerate(np.bincount(levels, minlength=3).tolist()):
+        if count:
+            READINGS_TOTAL.labels(level).inc(count)
+    
+    created_at = epoch_ms_to_local(columns["timestamp_ms"])
+    values = {name: columns[name].tolist() for name in FLOAT_COLUMNS}
+    device_ids = columns["device_id"].tolist()
+    risk_levels = levels.tolist()
+    
+    return [
+        {
+            "device_id": device_ids[i],
+            **{name: values[name][i] for name in FLOAT_COLUMNS},
+            "risk_level": risk_levels[i],
+            "threshold_version": thresholds.VERSION,
+            "created_at": created_at[i],
+        }
+        for i in range(len(device_ids))
+    ]
+
+
+def epoch_ms_to_local(timestamp_ms: np.ndarray) -> List[datetime]:
+    """
+    Unix epoch 밀리초 배열 → 한국 시간 datetime (타임존 없음, DB 저장 형태) 목록
+    - 0 은 지금 시각
+    - 구간 안에서 UTC 오프셋이 같으면 (Asia/Seoul 은 항상) 배열 연산 한 번으로 변환
+    """
+    kst = pytz.timezone(TIMEZONE)
+    timestamp_ms = np.where(timestamp_ms == 0, int(time.time() * 1000), timestamp_ms).astype(np.int64)
+    if not len(timestamp_ms):
+        return []
+    
+    first_offset = datetime.fromtimestamp(int(timestamp_ms.min()) / 1000, kst).utcoffset()
+    last_offset = datetime.fromtimestamp(int(timestamp_ms.max()) / 1000, kst).utcoffset()
+    if first_offset != last_offset:
+        return [datetime.fromtimestamp(ms / 1000, kst).replace(tzinfo=None) for ms in timestamp_ms.tolist()]
+    
+    offset_ms = int(first_offset.total_seconds() * 1000)
+    local = (timestamp_ms + offset_ms).astype("datetime64[ms]")
+    return local.astype("datetime64[us]").tolist()
+
+
+def build_sensor_data(data: SensorDataCreate) -> SensorData:
+    """
+    센서 데이터 요청을 저장 가능한 ORM 객체로 변환
+    
+    Returns:
+        아직 세션에 추가되지 않은 센서 데이터 (ORM 모델)
+    """
+    return SensorData(**build_sensor_values(data))
+
+
+async def create_sensor_data(db: AsyncSession, data: SensorDataCreate) -> SensorData:
+    """
+    센서 데이터 생성 및 저장
+    
+    Args:
+        db: 데이터베이스 세션
+        data: 센서 데이터 (Pydantic 스키마)
+    
+    Returns:
+        저장된 센서 데이터 (ORM 모델)
+    """
+    db_data = build_sensor_data(data)
     
-    db.add(db_data)
-    db.commit()
-    db.refresh(db_data)
+    await save_sensor_rows(db, [db_data])
     
     return db_data
 
 
-def get_latest_sensor_data(db: Session) -> Optional[SensorData]:
+async def save_sensor_rows(db: AsyncSession, db_rows: List[SensorData]) -> List[SensorData]:
+    """
+    센서 데이터 일괄 저장 (단일 트랜잭션)
+    
+    건별 commit/refresh 대신 전체를 한 번에 flush 하여
+    DB 왕복과 fsync를 배치당 1회로 줄인다.
+    분/시간 롤업도 같은 트랜잭션에서 갱신한다.
+    
+    Args:
+        db: 데이터베이스 세션
+        db_rows: 저장할 센서 데이터 (ORM 모델)
+    
+    Returns:
+        저장된 센서 데이터 목록 (입력 순서 유지, id 포함)
+    """
+    started = time.perf_counter()
+    db.add_all(db_rows)
+    await db.flush()   # bulk INSERT → id 할당
+    await update_rollups(db, db_rows)
+    commit_started = time.perf_counter()
+    await db.commit()
+    finished = time.perf_counter()
+    DB_COMMIT_SECONDS.observe(finished - commit_started)
+    DB_WRITE_SECONDS.observe(finished - started)
+    DB_WRITTEN_ROWS_TOTAL.inc(len(db_rows))
+    
+    # 커밋된 행(id 포함)만 최근 데이터 링 버퍼와 최신 데이터 캐시에 반영 (다른 워커에도 전달)
+    recent_buffer.extend(db_rows)
+    latest_cache.update_committed(db_rows)
+    if bus.has_peers:
+        await bus.publish(
+            "committed",
+            [SensorDataRead.model_validate(row).model_dump(mode='json') for row in db_rows],
+            local=False
+        )
+    
+    return db_rows
+
+
+async def create_sensor_data_columns(db: AsyncSession, columns: dict) -> List[SensorData]:
+    """
+    컬럼 배열(바이너리 수집 형식)로 받은 센서 데이터 일괄 저장
+    
+    Returns:
+        저장된 센서 데이터 목록 (입력 순서 유지, id 포함)
+    """
+    return await save_sensor_rows(db, [SensorData(**values) for values in build_sensor_values_from_columns(columns)])
+
+
+async def create_sensor_data_batch(db: AsyncSession, items: List[SensorDataCreate]) -> List[SensorData]:
+    """
+    센서 데이터 일괄 생성 및 저장
+    
+    Args:
+        db: 데이터베이스 세션
+        items: 센서 데이터 목록 (Pydantic 스키마)
+    
+    Returns:
+        저장된 센서 데이터 목록 (요청 순서 유지, id 포함)
+    """
+    return await save_sensor_rows(db, [build_sensor_data(data) for data in items])
+
+
+async def get_latest_sensor_data(
+    db: AsyncSession,
+    device_id: Optional[str] = None
+) -> Optional[SensorData]:
     """
     최신 센서 데이터 1건 조회
+    
+    Args:
+        db: 데이터베이스 세션
+        device_id: 디바이스 ID (None 이면 전체 디바이스 중 최신)
     """
-    return db.query(SensorData).order_by(desc(SensorData.id)).first()
+    query = select(SensorData)
+    
+    if device_id is not None:
+        # (device_id, created_at) 인덱스의 끝에서 1건만 읽음
+        query = query.where(SensorData.device_id == device_id).order_by(
+            desc(SensorData.created_at), desc(SensorData.id)
+        )
+    else:
+        query = query.order_by(desc(SensorData.id))
+    
+    result = await db.execute(query.limit(1))
+    return result.scalars().first()
+
+
+async def get_device_ids(db: AsyncSession) -> List[str]:
+    """
+    데이터가 있는 디바이스 ID 목록 조회
+    """
+    result = await db.execute(
+        select(SensorData.device_id).distinct().order_by(SensorData.device_id)
+    )
+    return list(result.scalars().all())
 
 
-def get_sensor_history(
-    db: Session,
+async def get_sensor_history(
+    db: AsyncSession,
     minutes: Optional[int] = None,
     start: Optional[datetime] = None,
     end: Optional[datetime] = None,
-    limit: int = 200
+    limit: int = 200,
+    device_id: Optional[str] = None,
+    cursor: Optional[Tuple[datetime, int]] = None
 ) -> List[SensorData]:
     """
-    센서 데이터 이력 조회
+    센서 데이터 이력 조회 (keyset 페이지네이션)
+    
+    (created_at, id) 내림차순으로 정렬하고 다음 페이지는 OFFSET 대신
+    이전 페이지 마지막 행보다 작은 키부터 읽으므로 깊은 페이지도 첫 페이지와 비용이 같다.
+    구간이 콜드 아카이브된 날짜에 걸치면 아카이브 파일에서도 읽어 합친다.
     
     Args:
         db: 데이터베이스 세션
@@ -157,34 +449,333 @@ def get_sensor_history(
         start: 시작 시각
         end: 종료 시각
         limit: 최대 조회 개수
+        device_id: 디바이스 ID (None 이면 전체 디바이스)
+        cursor: 이전 페이지 마지막 행의 (created_at, id) (decode_history_cursor 결과)
     
     Returns:
         센서 데이터 리스트 (최신순)
     """
-    query = db.query(SensorData)
+    # 최근 N분 조회는 링 버퍼가 구간을 다 담고 있으면 SQL 없이 응답
+    if minutes:
+        since = datetime.now(pytz.timezone(TIMEZONE)).replace(tzinfo=None) - timedelta(minutes=minutes)
+        rows = recent_buffer.query(since, limit, device_id=device_id, cursor=cursor)
+        if rows is not None:
+            return rows
+    
+    query = _filter_history(select(SensorData), minutes, start, end, device_id)
+    
+    if cursor is not None:
+        cursor_time, cursor_id = cursor
+        query = query.where(or_(
+            SensorData.created_at < cursor_time,
+            and_(SensorData.created_at == cursor_time, SensorData.id < cursor_id)
+        ))
+    
+    query = query.order_by(desc(SensorData.created_at), desc(SensorData.id)).limit(limit)
+    result = await db.execute(query)
+    rows = list(result.scalars().all())
+    
+    # DB 페이지가 가득 찼으면 마지막 행보다 오래된 아카이브 행은 이 페이지에 들어오지 않음
+    # (마지막 행 시각 이후에 아카이브된 날짜가 없으면 아카이브를 읽지 않음)
+    lower, upper = _history_bounds(minutes, start, end)
+    if len(rows) == limit:
+        lower = rows[-1].created_at
+    
+    if cold_archive.overlaps(lower, upper):
+        archived = await asyncio.to_thread(cold_archive.query, lower, upper, limit, device_id, cursor)
+        # 아카이브 직후 DB 삭제 전이면 같은 행이 양쪽에 있을 수 있음 (id 로 중복 제거)
+        merged = {row.id: row for row in archived}
+        merged.update((row.id, row) for row in rows)
+        rows = sorted(merged.values(), key=lambda row: (row.created_at, row.id), reverse=True)[:limit]
+    
+    return rows
+
+
+def encode_history_cursor(row: SensorData) -> str:
+    """
+    다음 페이지 커서 생성 (마지막 행의 created_at, id 를 담은 불투명 토큰)
+    """
+    payload = json.dumps([row.created_at.isoformat(), row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(token: str) -> Tuple[datetime, int]:
+    """
+    커서 토큰 해석
+    
+    Raises:
+        ValueError: 형식이 잘못된 토큰
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"잘못된 커서: {token}") from e
+
+
+def _history_bounds(minutes, start, end) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    이력 조회 구간 (naive KST, 제한 없는 쪽은 None) - _filter_history 와 같은 조건
+    """
+    if minutes:
+        now = datetime.now(pytz.timezone(TIMEZONE)).replace(tzinfo=None)
+        return now - timedelta(minutes=minutes), None
+    if start and end:
+        return start, end
+    return None, None
+
+
+def _filter_history(query, minutes, start, end, device_id):
+    """
+    이력 조회 공통 조건 (디바이스, 최근 N분 또는 시작~종료 구간)
+    """
+    if device_id is not None:
+        query = query.where(SensorData.device_id == device_id)
     
     if minutes:
         kst = pytz.timezone(TIMEZONE)
         cutoff_time = datetime.now(kst) - timedelta(minutes=minutes)
-        query = query.filter(SensorData.created_at >= cutoff_time)
+        query = query.where(SensorData.created_at >= cutoff_time)
     elif start and end:
-        query = query.filter(SensorData.created_at.between(start, end))
+        query = query.where(SensorData.created_at.between(start, end))
+    
+    return query
+
+
+# CSV 내보내기 컬럼 순서
+EXPORT_COLUMNS = (
+    "created_at", "device_id", "moisture",
+    "accel_x", "accel_y", "accel_z",
+    "gyro_x", "gyro_y", "gyro_z",
+    "vibration_raw", "risk_level", "threshold_version"
+)
+
+
+async def stream_sensor_history(
+    db: AsyncSession,
+    minutes: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    device_id: Optional[str] = None,
+    chunk_size: int = CSV_EXPORT_CHUNK_SIZE
+) -> AsyncIterator[Sequence[tuple]]:
+    """
+    센서 데이터 이력을 서버 측 커서로 청크 단위 스트리밍 (개수 제한 없음)
+    
+    ORM 객체 대신 EXPORT_COLUMNS 순서의 튜플만 읽고, 커서에서 chunk_size 행씩
+    꺼내므로 수개월 구간도 메모리 사용량이 일정하다.
+    구간이 콜드 아카이브된 날짜에 걸치면 그 날짜는 아카이브 파일과 DB 의 행을 합쳐
+    (하루치씩, id 로 중복 제거) 시간순으로 내보낸다.
+    
+    Args:
+        db: 데이터베이스 세션 (스트리밍이 끝날 때까지 열려 있어야 함)
+        minutes: 최근 N분 데이터
+        start: 시작 시각
+        end: 종료 시각
+        device_id: 디바이스 ID (None 이면 전체 디바이스)
+        chunk_size: 한 번에 읽을 행 수
+    
+    Yields:
+        행 튜플 리스트 (오래된 것부터)
+    """
+    lower, upper = _history_bounds(minutes, start, end)
+    
+    # 아카이브된 날짜는 파일과 DB 에 남은 행 (아카이브 직후 삭제 전 / 늦게 들어온 행) 을
+    # id 로 합쳐 시간순으로 내보내고, 그 사이 구간은 DB 에서 스트리밍
+    since = lower
+    for day in cold_archive.days_between(lower, upper):
+        day_start = datetime.combine(day, dtime.min)
+        day_end = day_start + timedelta(days=1)
+        
+        if since is None or since < day_start:
+            async for rows in _stream_history_range(db, EXPORT_COLUMNS, device_id, since, day_start, None, chunk_size):
+                yield rows
+        
+        merged = await _archived_day_rows(
+            db, device_id,
+            max(lower, day_start) if lower is not None else day_start,
+            min(upper, day_end - timedelta(microseconds=1)) if upper is not None else day_end - timedelta(microseconds=1),
+            chunk_size
+        )
+        for first in range(0, len(merged), chunk_size):
+            yield merged[first:first + chunk_size]
+        since = day_end
+    
+    async for rows in _stream_history_range(db, EXPORT_COLUMNS, device_id, since, None, upper, chunk_size):
+        yield rows
+
+
+def _history_range_query(columns: Sequence[str], device_id: Optional[str], since, before, until):
+    """
+    created_at 이 since 이상, before 미만, until 이하인 행 (None 이면 제한 없음, 오래된 것부터)
+    """
+    query = select(*(getattr(SensorData, name) for name in columns))
+    if device_id is not None:
+        query = query.where(SensorData.device_id == device_id)
+    if since is not None:
+        query = query.where(SensorData.created_at >= since)
+    if before is not None:
+        query = query.where(SensorData.created_at < before)
+    if until is not None:
+        query = query.where(SensorData.created_at <= until)
+    return query.order_by(SensorData.created_at, SensorData.id)
+
+
+async def _stream_history_range(
+    db: AsyncSession, columns, device_id, since, before, until, chunk_size: int
+) -> AsyncIterator[Sequence[tuple]]:
+    """
+    _history_range_query 결과를 서버 측 커서로 chunk_size 행씩 스트리밍
+    """
+    query = _history_range_query(columns, device_id, since, before, until).execution_options(yield_per=chunk_size)
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        yield rows
+
+
+async def _archived_day_rows(
+    db: AsyncSession, device_id: Optional[str], since: datetime, until: datetime, chunk_size: int
+) -> List[tuple]:
+    """
+    아카이브된 하루 구간 [since, until] 의 행 (EXPORT_COLUMNS 튜플, 오래된 것부터)
+    - 아카이브 파일과 DB 에 같은 행이 있으면 id 로 중복 제거
+    """
+    columns = ("id",) + EXPORT_COLUMNS
+    
+    def read_archive():
+        # 압축 해제는 스레드에서 실행 (이벤트 루프 블로킹 방지)
+        return [
+            row
+            for rows in cold_archive.iter_export_rows(since, until, device_id, columns, chunk_size)
+            for row in rows
+        ]
+    
+    merged = {row[0]: row for row in await asyncio.to_thread(read_archive)}
+    result = await db.execute(_history_range_query(columns, device_id, since, None, until))
+    merged.update((row[0], tuple(row)) for row in result.all())
     
-    return query.order_by(desc(SensorData.created_at)).limit(limit).all()
+    return [row[1:] for row in sorted(merged.values(), key=lambda row: (row[1], row[0]))]
 
 
-def get_all_thresholds(db: Session) -> List[Threshold]:
+async def simulate_thresholds(
+    db: AsyncSession,
+    thresholds,
+    start: datetime,
+    end: datetime,
+    max_events: int = 100,
+    device_id: Optional[str] = None
+) -> dict:
+    """
+    제안 임계값을 저장된 이력 구간에 적용 (what-if 시뮬레이션)
+    
+    필요한 컬럼만 SIMULATION_CHUNK_SIZE 행 단위로 스트리밍하여
+    calculate_risk_scores 로 벡터 계산하므로 수개월 구간도 메모리 일정하게 처리된다.
+    전이는 같은 디바이스의 연속된 데이터 사이에서만 센다.
+    
+    Args:
+        db: 데이터베이스 세션
+        thresholds: 제안 임계값 (RiskThresholds 와 같은 이름의 속성을 가진 객체)
+        start: 시작 시각
+        end: 종료 시각
+        max_events: 반환할 최대 전이 이벤트 수
+        device_id: 디바이스 ID (None 이면 전체 디바이스)
+    
+    Returns:
+        위험도별 건수, 저장값 대비 변경 건수, 전이 횟수/행렬/이벤트
+    """
+    query = (
+        select(
+            SensorData.device_id,
+            SensorData.created_at,
+            SensorData.moisture,
+            SensorData.accel_x,
+            SensorData.accel_y,
+            SensorData.vibration_raw,
+            SensorData.risk_level
+        )
+        .where(SensorData.created_at.between(start, end))
+    )
+    if device_id is not None:
+        query = query.where(SensorData.device_id == device_id)
+    query = (
+        query
+        .order_by(SensorData.device_id, SensorData.created_at, SensorData.id)
+        .execution_options(yield_per=SIMULATION_CHUNK_SIZE)
+    )
+    
+    total = 0
+    changed = 0
+    level_counts = np.zeros(3, dtype=np.int64)
+    stored_counts = np.zeros(3, dtype=np.int64)
+    matrix = np.zeros(9, dtype=np.int64)
+    events = []
+    prev = None   # 이전 청크 마지막 행의 (디바이스, 위험도)
+    
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        device_ids, created_at, moisture, accel_x, accel_y, vibration_raw, stored = zip(*rows)
+        _, levels = calculate_risk_scores(moisture, accel_x, accel_y, vibration_raw, thresholds)
+        stored = np.asarray(stored, dtype=np.int8)
+        devices = np.asarray(device_ids, dtype=object)
+        
+        total += len(levels)
+        changed += int(np.count_nonzero(levels != stored))
+        level_counts += np.bincount(levels, minlength=3)[:3]
+        stored_counts += np.bincount(stored, minlength=3)[:3]
+        
+        # 이전 청크의 마지막 행을 이어 붙여 경계의 전이도 포함
+        # (offset: sequence[i + 1] 에 해당하는 이 청크 내 행 번호 = i + offset)
+        sequence, offset = levels.astype(np.int64), 1
+        if prev is not None:
+            devices = np.concatenate((np.asarray([prev[0]], dtype=object), devices))
+            sequence, offset = np.concatenate(([prev[1]], sequence)), 0
+        prev = (device_ids[-1], int(levels[-1]))
+        
+        same_device = devices[:-1] == devices[1:]
+        pairs = sequence[:-1] * 3 + sequence[1:]
+        matrix += np.bincount(pairs[same_device], minlength=9)[:9]
+        
+        if len(events) < max_events:
+            moved = np.flatnonzero(same_device & (sequence[:-1] != sequence[1:]))
+            for i in moved[:max_events - len(events)]:
+                events.append({
+                    "device_id": devices[i + 1],
+                    "created_at": created_at[i + offset],
+                    "from_level": int(sequence[i]),
+                    "to_level": int(sequence[i + 1])
+                })
+    
+    matrix = matrix.reshape(3, 3)
+    
+    return {
+        "total": total,
+        "level_counts": level_counts.tolist(),
+        "stored_level_counts": stored_counts.tolist(),
+        "changed": changed,
+        "transitions": int(matrix.sum() - np.trace(matrix)),
+        "transition_matrix": matrix.tolist(),
+        "events": events
+    }
+
+
+async def get_all_thresholds(db: AsyncSession) -> List[Threshold]:
     """
     모든 임계값 조회 (레거시 지원용)
     """
-    return db.query(Threshold).all()
+    result = await db.execute(select(Threshold))
+    return list(result.scalars().all())
 
 
-def upsert_threshold(db: Session, name: str, value: float) -> Threshold:
+async def upsert_threshold(db: AsyncSession, name: str, value: float) -> Threshold:
     """
-    임계값 업데이트 또는 생성 (레거시 지원용)
+    임계값 업데이트 또는 생성
+    
+    위험도 임계값(RISK_THRESHOLD_NAMES)이면 같은 트랜잭션에서 새 버전을 기록하고,
+    커밋 후 위험도 계산 스냅샷을 교체한다 (재시작 불필요, 다른 워커에도 전달).
     """
-    threshold = db.query(Threshold).filter(Threshold.name == name).first()
+    result = await db.execute(select(Threshold).where(Threshold.name == name))
+    threshold = result.scalars().first()
     
     if threshold:
         threshold.value = value
@@ -192,7 +783,20 @@ def upsert_threshold(db: Session, name: str, value: float) -> Threshold:
         threshold = Threshold(name=name, value=value)
         db.add(threshold)
     
-    db.commit()
-    db.refresh(threshold)
+    snapshot = None
+    if name in RISK_THRESHOLD_NAMES:
+        snapshot = await threshold_store.create_revision(db)
+    
+    await db.commit()
+    await db.refresh(threshold)
+    
+    if snapshot is not None:
+        threshold_store.swap(snapshot)
+        await bus.publish(
+            "thresholds",
+            {"version": snapshot.VERSION, "values": snapshot.values()},
+            local=False
+        )
+        print(f"✅ 위험도 임계값 변경 ({name}={value}, 버전 {snapshot.VERSION})")
     
     return threshold
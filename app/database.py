@@ -1,29 +1,99 @@
 """
-데이터베이스 설정 및 세션 관리
+데이터베이스 설정 및 세션 관리 (비동기)
+- AsyncEngine / AsyncSession 사용 → 느린 쿼리가 이벤트 루프(수집, WebSocket)를 막지 않음
+- MariaDB: aiomysql, 로컬 SQLite: aiosqlite 드라이버
+- SQLite 는 연결마다 SQLITE_PRAGMAS (WAL, synchronous=NORMAL 등) 적용
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import DB_URL
+from typing import Optional
 
-engine = create_engine(
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import StaticPool
+from app.config import DB_URL, DB_ECHO, SQLITE_PRAGMAS
+
+# 동기 드라이버 → 비동기 드라이버 매핑
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mariadb": "mariadb+aiomysql",
+    "mariadb+pymysql": "mariadb+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    DB URL의 드라이버를 비동기 드라이버로 변환
+    (이미 비동기 드라이버면 그대로 반환)
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def apply_sqlite_pragmas(sync_engine, pragmas: dict):
+    """
+    새 DB 연결이 열릴 때마다 PRAGMA 실행 (PRAGMA 는 연결 단위 설정)
+    """
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_engine_for(url: str, sqlite_pragmas: Optional[dict] = None, **kwargs) -> AsyncEngine:
+    """
+    DB URL 에 맞게 설정한 AsyncEngine 생성
+
+    Args:
+        url: DB URL (동기 드라이버 URL 도 가능, 비동기 드라이버로 변환)
+        sqlite_pragmas: SQLite 연결 PRAGMA (생략 시 SQLITE_PRAGMAS)
+        kwargs: create_async_engine 추가 인자
+    """
+    async_url = to_async_url(url)
+
+    if not is_sqlite(async_url):
+        return create_async_engine(
+            async_url,
+            pool_pre_ping=True,  # 연결 상태 확인
+            pool_recycle=3600,   # 1시간마다 연결 재생성
+            **kwargs
+        )
+
+    database = make_url(async_url).database
+    if not database or database == ":memory:":
+        # 메모리 DB 는 연결마다 별개이므로 연결 1개를 공유 (journal_mode 는 항상 MEMORY)
+        kwargs.setdefault("poolclass", StaticPool)
+
+    sqlite_engine = create_async_engine(async_url, **kwargs)
+    apply_sqlite_pragmas(sqlite_engine.sync_engine, sqlite_pragmas if sqlite_pragmas is not None else SQLITE_PRAGMAS)
+    return sqlite_engine
+
+
+engine = create_engine_for(
     DB_URL,
-    echo=True,        # SQL 출력 (개발 단계에서 유용)
-    future=True,
-    pool_pre_ping=True,  # 연결 상태 확인
-    pool_recycle=3600    # 1시간마다 연결 재생성
+    echo=DB_ECHO,     # SQL 출력 (SINKER_DB_ECHO=1, 개발 단계에서 유용)
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: commit 후 객체 속성을 다시 SELECT 하지 않음
+# (일괄 저장 시 행마다 재조회 방지, AsyncSession 에서는 암묵적 lazy load 불가)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
     FastAPI Dependency로 사용할 DB 세션 생성 함수
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,216 @@
+"""
+센서 데이터 수집 파이프라인 (write-behind)
+- /sensor 요청은 검증/위험도 계산/브로드캐스트 후 대기열에 넣고 즉시 응답
+- 백그라운드 writer 태스크가 대기열을 배치 단위로 모아 DB에 저장
+- 서버 종료 시 남은 데이터 flush
+"""
+import asyncio
+import time
+from typing import List, Optional
+
+from app.database import SessionLocal
+from app.models import SensorData
+from app.crud import save_sensor_rows
+from app.config import (
+    INGEST_QUEUE_SIZE,
+    INGEST_BATCH_SIZE,
+    INGEST_FLUSH_INTERVAL,
+    INGEST_RETRY_DELAY,
+    INGEST_MAX_RETRIES
+)
+
+
+class IngestPipeline:
+    """
+    센서 데이터 저장 대기열과 백그라운드 writer 를 관리하는 클래스
+
+    배치는 INGEST_BATCH_SIZE 건이 모이거나 첫 건 이후 INGEST_FLUSH_INTERVAL 초가
+    지나면 저장된다. 요청 처리 지연은 DB 지연과 무관하다.
+    """
+    def __init__(
+        self,
+        max_size: int = INGEST_QUEUE_SIZE,
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval: float = INGEST_FLUSH_INTERVAL,
+        retry_delay: float = INGEST_RETRY_DELAY,
+        max_retries: int = INGEST_MAX_RETRIES
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # 통계
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+
+    async def start(self):
+        """
+        writer 태스크 시작 (서버 startup 시 호출)
+        """
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        writer 태스크 종료 (서버 shutdown 시 호출)
+        - 대기열에 남은 데이터를 모두 저장한 뒤 종료
+        """
+        if self._task is None:
+            return
+
+        self._stopping = True
+        await self._task
+        self._task = None
+        print(f"✅ 수집 대기열 flush 완료 (누적 저장 {self.written}건)")
+
+    def enqueue(self, values: dict) -> bool:
+        """
+        저장할 센서 데이터 1건을 대기열에 추가
+
+        Args:
+            values: SensorData 컬럼 값 (crud.build_sensor_values 결과)
+
+        Returns:
+            성공 여부 (대기열이 가득 찼거나 종료 중이면 False)
+        """
+        if self._queue is None or self._stopping:
+            self.rejected += 1
+            return False
+
+        try:
+            self._queue.put_nowait(values)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+
+        self.enqueued += 1
+        return True
+
+    @property
+    def depth(self) -> int:
+        """현재 대기열에 쌓인 건수"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> dict:
+        """
+        파이프라인 상태 (헬스체크/모니터링용)
+        """
+        return {
+            "queue_depth": self.depth,
+            "queue_max": self.max_size,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+    async def _run(self):
+        """
+        writer 루프: 배치 수집 → 저장 반복
+        """
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect_batch()
+            if batch:
+                await self._write_batch(batch)
+
+    async def _collect_batch(self) -> List[dict]:
+        """
+        대기열에서 배치 하나를 수집 (크기 또는 시간 제한)
+        """
+        loop = asyncio.get_running_loop()
+
+        # 첫 건 대기 (종료 신호 확인을 위해 주기적으로 깨어남)
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self._stopping:
+                break
+
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _write_batch(self, batch: List[dict], retries: Optional[int] = None):
+        """
+        배치 저장
+        - 실패하면 retry_delay 간격으로 max_retries 번까지 재시도 (일시적인 DB 오류)
+        - 그래도 실패하면 반으로 나눠 저장 → 저장할 수 없는 행 (제약 조건 위반 등) 만 버림
+          (한 행 때문에 writer 가 멈춰 대기열이 차고 /sensor 가 503 을 내지 않도록)
+        - 종료 중이면 재시도 없이 바로 나눠 저장
+        """
+        if retries is None:
+            retries = self.max_retries
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                await self._write(batch)
+            except Exception as e:
+                self.failed_batches += 1
+                error = e
+                if attempt < retries and not self._stopping:
+                    attempt += 1
+                    print(f"❌ 센서 데이터 배치 저장 실패 ({len(batch)}건, 재시도 {attempt}/{retries}): {e}")
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                break
+
+            self.written += len(batch)
+            self.last_batch_size = len(batch)
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            return
+
+        if len(batch) == 1:
+            self.dropped += 1
+            print(f"🗑️ 저장할 수 없는 센서 데이터 버림 ({batch[0].get('device_id')}): {error}")
+            return
+
+        # 나눈 배치는 재시도하지 않음 (일시적인 오류였다면 위 재시도에서 해결됨)
+        middle = len(batch) // 2
+        await self._write_batch(batch[:middle], retries=0)
+        await self._write_batch(batch[middle:], retries=0)
+
+    @staticmethod
+    async def _write(batch: List[dict]) -> List[SensorData]:
+        """
+        배치를 단일 트랜잭션으로 저장
+        - 재시도 시 이전 시도의 상태가 남지 않도록 매번 새 ORM 객체 생성
+        """
+        async with SessionLocal() as db:
+            return await save_sensor_rows(db, [SensorData(**values) for values in batch])
+
+
+# 전역 IngestPipeline 인스턴스
+ingest_pipeline = IngestPipeline()
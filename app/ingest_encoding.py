@@ -0,0 +1,106 @@
+"""
+센서 데이터 바이너리 수집 형식 (POST /sensor/binary)
+- JSON 대신 고정 길이 레코드를 이어 붙인 본문, 레코드 하나에 측정값 1건
+- 서버는 numpy.frombuffer 로 본문 전체를 컬럼 배열로 바로 읽음 (필드별 Pydantic 검증 없음)
+
+레코드 (little-endian, RECORD_SIZE = 96 바이트):
+    u8   버전 (RECORD_VERSION)
+    u8   플래그 (예약, 0)
+    u16  예약 (0)
+    u32  전송 순번 (스트리밍 수집에서 사용, HTTP 일괄 전송은 0)
+    i64  측정 시각 (Unix epoch 밀리초, 0 이면 서버 수신 시각, 최대 MAX_TIMESTAMP_MS)
+    16s  device_id (UTF-8, 남는 바이트는 0, 16바이트를 넘는 ID 는 JSON 으로 전송)
+    f64  moisture, accel_x, accel_y, accel_z, gyro_x, gyro_y, gyro_z, vibration_raw
+
+라즈베리파이 클라이언트의 인코더는 raspberry_pi/ingest_encoding.py (encode_record) 참고.
+"""
+from datetime import datetime, timezone
+from typing import Dict
+
+import numpy as np
+
+RECORD_VERSION = 1
+RECORD_FORMAT = "<BBHIq16s8d"
+DEVICE_ID_BYTES = 16
+
+FLOAT_FIELDS = (
+    "moisture",
+    "accel_x", "accel_y", "accel_z",
+    "gyro_x", "gyro_y", "gyro_z",
+    "vibration_raw",
+)
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("version", "u1"),
+        ("flags", "u1"),
+        ("reserved", "<u2"),
+        ("seq", "<u4"),
+        ("timestamp_ms", "<i8"),
+        ("device_id", f"S{DEVICE_ID_BYTES}"),
+    ]
+    + [(name, "<f8") for name in FLOAT_FIELDS]
+)
+RECORD_SIZE = RECORD_DTYPE.itemsize   # 96 (struct.calcsize(RECORD_FORMAT) 와 같음)
+
+CONTENT_TYPE = "application/octet-stream"
+
+# 측정 시각 상한 (datetime 으로 변환 가능한 9999년 안, 현지 시간 오프셋 여유 포함)
+MAX_TIMESTAMP_MS = int(datetime(9999, 12, 30, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def decode_records(body: bytes, max_records: int) -> Dict[str, np.ndarray]:
+    """
+    바이너리 본문 → 컬럼 배열
+
+    Args:
+        body: 레코드를 이어 붙인 요청 본문
+        max_records: 허용 최대 레코드 수
+
+    Returns:
+        {"seq", "timestamp_ms", "device_id" (str object 배열), FLOAT_FIELDS...} → 배열
+
+    Raises:
+        ValueError: 길이/버전/값이 잘못된 본문
+    """
+    if len(body) % RECORD_SIZE:
+        raise ValueError(f"본문 길이({len(body)})가 레코드 크기({RECORD_SIZE})의 배수가 아닙니다")
+    count = len(body) // RECORD_SIZE
+    if count > max_records:
+        raise ValueError(f"레코드가 너무 많습니다 ({count} > {max_records})")
+
+    records = np.frombuffer(body, dtype=RECORD_DTYPE)
+
+    if count and (records["version"] != RECORD_VERSION).any():
+        versions = sorted(set(records["version"].tolist()))
+        raise ValueError(f"지원하지 않는 레코드 버전: {versions} (지원: {RECORD_VERSION})")
+    timestamp_ms = records["timestamp_ms"]
+    if (timestamp_ms < 0).any():
+        raise ValueError("측정 시각이 음수입니다")
+    if (timestamp_ms > MAX_TIMESTAMP_MS).any():
+        raise ValueError(f"측정 시각이 범위를 벗어났습니다 (최대 {MAX_TIMESTAMP_MS} ms)")
+
+    columns = {
+        "seq": records["seq"],
+        "timestamp_ms": records["timestamp_ms"],
+    }
+    for name in FLOAT_FIELDS:
+        values = records[name]
+        if not np.isfinite(values).all():
+            raise ValueError(f"{name} 에 NaN/무한대 값이 있습니다")
+        columns[name] = values
+
+    # device_id: 배치 안의 디바이스 종류는 적으므로 고유값만 디코딩
+    raw_ids = records["device_id"]   # S16: 끝의 0 바이트는 제거된 값으로 읽힘
+    unique_ids, inverse = np.unique(raw_ids, return_inverse=True)
+    decoded = []
+    for raw in unique_ids.tolist():
+        if not raw:
+            raise ValueError("device_id 가 비어 있습니다")
+        try:
+            decoded.append(raw.decode("utf-8"))
+        except UnicodeDecodeError:
+            raise ValueError(f"device_id 가 UTF-8 이 아닙니다: {raw!r}")
+    columns["device_id"] = np.asarray(decoded, dtype=object)[inverse.reshape(-1)] if count else np.asarray([], dtype=object)
+
+    return columns
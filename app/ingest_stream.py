@@ -0,0 +1,281 @@
+"""
+센서 노드 스트리밍 수집 (WebSocket /ws/ingest)
+- 노드마다 연결 하나를 유지하고, 바이너리 레코드(app/ingest_encoding.py)를 전송 순번과 함께 계속 받음
+- 수신과 저장을 분리: 수신 루프는 프레임을 저장 대기열에 넣기만 하고,
+  writer 태스크가 그동안 쌓인 프레임을 한 트랜잭션으로 저장한 뒤 누적 ack 를 보냄
+  (측정값이 이전 측정값의 저장 완료를 기다리지 않음)
+- 재연결: 연결 시 hello 로 이 스트림에서 마지막으로 저장한 순번을 알려주면
+  노드는 그다음 순번부터 다시 보냄, 이미 저장한 순번은 다시 받아도 버림
+
+메시지 (서버 → 노드, JSON 텍스트):
+    {"type": "hello", "last_seq": N}   연결 직후, 이 스트림에서 저장 완료한 마지막 순번 (없으면 0)
+    {"type": "ack", "seq": N}          순번 N 까지 저장 완료 (누적)
+    {"type": "error", "message": ..., "first_seq": A, "last_seq": B}
+                                       형식이 잘못된 프레임, 이후 연결 종료 (1007)
+                                       순번을 읽을 수 있으면 A~B 를 알려주고, 노드는 그 데이터를 버림
+                                       (재전송해도 같은 결과, HTTP 수집의 422 와 같음)
+
+스트림 ID 는 노드가 실행될 때마다 새로 만든다 (순번은 스트림 안에서만 증가).
+저장 순번은 워커 메모리에만 있으므로 서버 재시작 / 다른 워커로 재연결하면 hello 가 0 이고,
+ack 를 받지 못한 데이터는 중복 저장될 수 있다 (최소 1회 전송).
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+from fastapi import WebSocket
+
+from app.database import SessionLocal
+from app.models import SensorData
+from app.crud import create_sensor_data_columns
+from app.ingest_encoding import decode_records, DEVICE_ID_BYTES, RECORD_DTYPE, RECORD_SIZE
+from app.config import BINARY_INGEST_MAX_RECORDS, INGEST_BATCH_SIZE, STREAM_INGEST_MAX_PENDING
+
+# WebSocket 종료 코드
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_INVALID_PAYLOAD = 1007
+CLOSE_INTERNAL_ERROR = 1011
+
+
+class FrameRejected(ValueError):
+    """
+    형식이 잘못된 프레임 (seq_range: 프레임의 (첫 순번, 마지막 순번), 읽을 수 없으면 None)
+    """
+    def __init__(self, message: str, seq_range=None):
+        super().__init__(message)
+        self.seq_range = seq_range
+
+
+def _frame_seq_range(body: bytes):
+    """레코드 크기가 맞는 프레임의 (첫 순번, 마지막 순번), 아니면 None"""
+    if not body or len(body) % RECORD_SIZE:
+        return None
+    seq = np.frombuffer(body, dtype=RECORD_DTYPE)["seq"]
+    return int(seq.min()), int(seq.max())
+
+
+class IngestStreamManager:
+    """
+    스트리밍 수집 연결 관리
+
+    같은 디바이스가 다시 연결하면 이전 연결의 수신을 멈추고, 이미 받은 프레임의 저장이
+    끝난 뒤에 새 연결에 hello 를 보낸다 (hello 의 순번이 항상 저장된 상태와 일치).
+    """
+    def __init__(
+        self,
+        max_pending: int = STREAM_INGEST_MAX_PENDING,
+        batch_size: int = INGEST_BATCH_SIZE,
+        max_records: int = BINARY_INGEST_MAX_RECORDS
+    ):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.max_records = max_records
+
+        # device_id → (스트림 ID, 저장 완료한 마지막 순번)
+        self._committed: Dict[str, Tuple[str, int]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._readers: Dict[str, asyncio.Task] = {}
+
+        # 통계
+        self.connections = 0
+        self.records = 0
+        self.duplicates = 0
+        self.commits = 0
+        self.protocol_errors = 0
+
+    @property
+    def active(self) -> int:
+        """현재 연결된 노드 수"""
+        return len(self._readers)
+
+    def stats(self) -> dict:
+        """
+        스트리밍 수집 상태 (헬스체크용)
+        """
+        return {
+            "active": self.active,
+            "connections": self.connections,
+            "records": self.records,
+            "duplicates": self.duplicates,
+            "commits": self.commits,
+            "protocol_errors": self.protocol_errors,
+        }
+
+    async def handle(
+        self,
+        websocket: WebSocket,
+        device_id: str,
+        stream_id: str,
+        on_committed: Callable[[List[SensorData]], Awaitable[None]]
+    ):
+        """
+        연결 1개 처리 (연결이 끊길 때까지)
+
+        Args:
+            websocket: 아직 accept 하지 않은 연결
+            device_id: 노드 디바이스 ID (레코드의 device_id 와 같아야 함)
+            stream_id: 노드 실행마다 새로 만드는 스트림 ID
+            on_committed: 저장된 행 목록을 받는 콜백 (브로드캐스트 등)
+        """
+        if len(device_id.encode("utf-8")) > DEVICE_ID_BYTES:
+            await websocket.close(code=CLOSE_POLICY_VIOLATION)
+            return
+        await websocket.accept()
+
+        # 같은 디바이스의 이전 연결 (끊긴 줄 모르는 연결 포함) 은 수신 중단
+        previous = self._readers.get(device_id)
+        if previous is not None:
+            previous.cancel()
+
+        lock = self._locks.setdefault(device_id, asyncio.Lock())
+        async with lock:
+            stream, last_seq = self._committed.get(device_id, (None, 0))
+            if stream != stream_id:
+                last_seq = 0
+                self._committed[device_id] = (stream_id, 0)
+
+            try:
+                await websocket.send_json({"type": "hello", "last_seq": last_seq})
+            except Exception:
+                return
+
+            self.connections += 1
+            frames: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+            writer = asyncio.create_task(self._write_loop(websocket, device_id, stream_id, frames, on_committed))
+            reader = asyncio.create_task(self._read_loop(websocket, device_id, last_seq, frames))
+            self._readers[device_id] = reader
+
+            try:
+                await asyncio.wait({reader, writer}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                if not reader.done():
+                    # writer 실패 (DB 오류): 노드는 재연결 후 마지막 ack 다음부터 다시 보냄
+                    reader.cancel()
+                    await asyncio.wait({reader})
+                if self._readers.get(device_id) is reader:
+                    del self._readers[device_id]
+
+                # 이미 받은 프레임은 저장한 뒤 종료
+                if not writer.done():
+                    await frames.put(None)
+                    await asyncio.wait({writer})
+
+            read_error = None if reader.cancelled() else reader.exception()
+            write_error = writer.exception()
+
+            close_code = 1000 if reader.cancelled() else None
+            if write_error is not None:
+                print(f"❌ 스트리밍 수집 저장 실패 ({device_id}): {write_error}")
+                close_code = CLOSE_INTERNAL_ERROR
+            elif isinstance(read_error, FrameRejected):
+                self.protocol_errors += 1
+                print(f"❌ 스트리밍 수집 프레임 거부 ({device_id}): {read_error}")
+                close_code = CLOSE_INVALID_PAYLOAD
+                error = {"type": "error", "message": str(read_error)}
+                if read_error.seq_range is not None:
+                    error["first_seq"], error["last_seq"] = read_error.seq_range
+                await self._send_quietly(websocket, error)
+
+            if close_code is not None:
+                try:
+                    await websocket.close(code=close_code)
+                except Exception:
+                    pass
+
+    async def _read_loop(self, websocket: WebSocket, device_id: str, last_seq: int, frames: asyncio.Queue):
+        """
+        수신 루프: 프레임 디코딩/검증 후 저장 대기열에 추가 (저장 완료는 기다리지 않음)
+
+        Raises:
+            FrameRejected: 형식이 잘못된 프레임
+        """
+        received = last_seq
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            body = message.get("bytes")
+            if body is None:
+                raise FrameRejected("바이너리 레코드 프레임만 받습니다")
+
+            try:
+                columns = decode_records(body, self.max_records)
+                seq = columns["seq"].astype(np.int64)
+                if (columns["device_id"] != device_id).any():
+                    raise ValueError(f"연결의 device_id({device_id})와 다른 레코드가 있습니다")
+                if len(seq) > 1 and (np.diff(seq) <= 0).any():
+                    raise ValueError("프레임 안의 순번이 증가하지 않습니다")
+            except ValueError as e:
+                raise FrameRejected(str(e), _frame_seq_range(body))
+            if not len(seq):
+                continue
+
+            # 이미 받은 순번 (재연결 직후 겹쳐 보낸 데이터) 은 버림
+            fresh = seq > received
+            if not fresh.all():
+                self.duplicates += int((~fresh).sum())
+                if not fresh.any():
+                    continue
+                columns = {name: values[fresh] for name, values in columns.items()}
+            received = int(columns["seq"][-1])
+
+            await frames.put(columns)
+
+    async def _write_loop(
+        self,
+        websocket: WebSocket,
+        device_id: str,
+        stream_id: str,
+        frames: asyncio.Queue,
+        on_committed: Callable[[List[SensorData]], Awaitable[None]]
+    ):
+        """
+        writer 루프: 그동안 쌓인 프레임을 한 트랜잭션으로 저장 → 누적 ack (None 을 받으면 종료)
+        """
+        while True:
+            columns = await frames.get()
+            if columns is None:
+                return
+
+            batch = [columns]
+            count = len(columns["seq"])
+            finished = False
+            while count < self.batch_size and not frames.empty():
+                columns = frames.get_nowait()
+                if columns is None:
+                    finished = True
+                    break
+                batch.append(columns)
+                count += len(columns["seq"])
+
+            merged = batch[0] if len(batch) == 1 else {
+                name: np.concatenate([columns[name] for columns in batch]) for name in batch[0]
+            }
+            async with SessionLocal() as db:
+                db_rows = await create_sensor_data_columns(db, merged)
+
+            last_seq = int(merged["seq"][-1])
+            self._committed[device_id] = (stream_id, last_seq)
+            self.records += len(db_rows)
+            self.commits += 1
+
+            await self._send_quietly(websocket, {"type": "ack", "seq": last_seq})
+            await on_committed(db_rows)
+
+            if finished:
+                return
+
+    @staticmethod
+    async def _send_quietly(websocket: WebSocket, message: dict):
+        """
+        전송 실패 무시 (연결이 끊겼으면 노드가 재연결 후 hello 로 저장 상태를 받음)
+        """
+        try:
+            await websocket.send_json(message)
+        except Exception:
+            pass
+
+
+# 전역 IngestStreamManager 인스턴스
+ingest_streams = IngestStreamManager()
@@ -0,0 +1,121 @@
+"""
+디바이스별 최신 센서 데이터 캐시 (프로세스 메모리)
+- 수집 경로(/sensor, /sensor/batch)가 저장 전에 갱신하고, 저장이 끝나면 DB id 가 있는 행으로 다시 갱신
+- /latest 는 캐시에서 바로 응답하고, 캐시에 없는 디바이스만 DB 조회
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import SensorData
+from app.schemas import SensorDataRead
+
+
+class LatestReadingCache:
+    """
+    디바이스 ID → 최신 SensorDataRead 를 보관하는 클래스
+
+    측정 시각(created_at)이 더 늦은 데이터만 반영하므로 재전송된 과거 데이터가
+    최신 값을 덮어쓰지 않는다.
+    """
+    def __init__(self):
+        self._by_device: Dict[str, SensorDataRead] = {}
+        self._newest: Optional[SensorDataRead] = None
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, reading: SensorDataRead):
+        """
+        수신된 센서 데이터 1건 반영
+        """
+        current = self._by_device.get(reading.device_id)
+        if current is not None and current.created_at > reading.created_at:
+            return
+
+        self._by_device[reading.device_id] = reading
+        if self._newest is None or reading.created_at >= self._newest.created_at:
+            self._newest = reading
+
+    def update_many(self, readings: List[SensorDataRead]):
+        """
+        여러 건 반영 (일괄 수신)
+        """
+        for reading in readings:
+            self.update(reading)
+
+    def update_committed(self, rows: List[SensorData]):
+        """
+        저장 완료된 행 반영 (id 가 없던 수신 시점 데이터를 같은 측정 시각의 DB 행으로 교체)
+        - 디바이스별 가장 늦은 행만 변환
+        """
+        newest: Dict[str, SensorData] = {}
+        for row in rows:
+            current = newest.get(row.device_id)
+            if current is None or row.created_at >= current.created_at:
+                newest[row.device_id] = row
+
+        self.update_many([SensorDataRead.model_validate(row) for row in newest.values()])
+
+    def get(self, device_id: Optional[str] = None) -> Optional[SensorDataRead]:
+        """
+        캐시된 최신 데이터 (device_id 가 None 이면 전체 디바이스 중 최신)
+        """
+        if device_id is None:
+            return self._newest
+        return self._by_device.get(device_id)
+
+    async def get_or_load(self, db_factory, device_id: Optional[str] = None) -> Optional[SensorDataRead]:
+        """
+        캐시 조회, 없으면 DB에서 읽어 채움 (콜드 스타트)
+
+        Args:
+            db_factory: 세션 팩토리 (캐시 적중 시에는 세션을 만들지 않음)
+            device_id: 디바이스 ID (None 이면 전체 디바이스 중 최신)
+        """
+        reading = self.get(device_id)
+        if reading is not None:
+            self.hits += 1
+            return reading
+
+        # crud 가 저장 후 이 캐시를 갱신하므로 조회 함수는 사용할 때 가져옴 (순환 import 방지)
+        from app.crud import get_latest_sensor_data
+
+        self.misses += 1
+        async with db_factory() as db:
+            row = await get_latest_sensor_data(db, device_id=device_id)
+
+        if row is None:
+            return None
+
+        reading = SensorDataRead.model_validate(row)
+        self.update(reading)
+        return reading
+
+    async def warm(self, db: AsyncSession):
+        """
+        서버 시작 시 디바이스별 최신 데이터를 미리 적재
+        """
+        from app.crud import get_latest_sensor_data, get_device_ids
+
+        for device_id in await get_device_ids(db):
+            row = await get_latest_sensor_data(db, device_id=device_id)
+            if row is not None:
+                self.update(SensorDataRead.model_validate(row))
+
+        print(f"✅ 최신 데이터 캐시 적재 완료 ({len(self._by_device)}개 디바이스)")
+
+    def stats(self) -> dict:
+        """
+        캐시 상태 (헬스체크/모니터링용)
+        """
+        return {
+            "devices": len(self._by_device),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 전역 LatestReadingCache 인스턴스
+latest_cache = LatestReadingCache()
@@ -1,30 +1,53 @@
 """
 FastAPI 메인 애플리케이션
 """
-from fastapi import FastAPI, Depends, WebSocket, WebSocketDisconnect, Query
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import FastAPI, Depends, WebSocket, WebSocketDisconnect, Query, HTTPException
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi import Request
-from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import Optional, List
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import Optional, List, Union
 import io
 import csv
+import zlib
+import time
 import pytz
 
-from app.database import engine, get_db, Base
+from app.database import engine, get_db, Base, SessionLocal
 from app.models import SensorData, Threshold
 from app.schemas import (
-    SensorDataCreate, SensorDataRead, 
-    ThresholdRead, ThresholdUpdate
+    SensorDataCreate, SensorDataRead, SensorRollupRead,
+    ThresholdRead, ThresholdUpdate,
+    RiskThresholdSnapshotRead, ThresholdSimulationRequest, ThresholdSimulationResult
 )
 from app.crud import (
-    create_sensor_data, get_latest_sensor_data,
-    get_sensor_history, get_all_thresholds, upsert_threshold
+    build_sensor_values, create_sensor_data_batch, create_sensor_data_columns,
+    get_sensor_history, get_all_thresholds, upsert_threshold,
+    simulate_thresholds, get_device_ids, stream_sensor_history, EXPORT_COLUMNS,
+    encode_history_cursor, decode_history_cursor
 )
+from app.rollups import choose_history_resolution, get_sensor_rollups
 from app.websocket_manager import manager
-from app.config import DEFAULT_THRESHOLDS, TIMEZONE
+from app.ingest import ingest_pipeline
+from app.latest_cache import latest_cache
+from app.ring_buffer import recent_buffer
+from app.pubsub import bus
+from app.thresholds import threshold_store, ThresholdSnapshot
+from app.partitions import partition_manager
+from app.archive import cold_archive
+from app.metrics import registry, INGEST_REQUEST_SECONDS, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.request_compression import GzipRequestMiddleware
+from app.ingest_encoding import decode_records
+from app.ingest_stream import ingest_streams
+from app.profiling import slow_requests, sampling_profiler, is_authorized, to_folded
+from app.config import (
+    DEFAULT_THRESHOLDS, TIMEZONE, WS_MAX_FPS_LIMIT, BINARY_INGEST_MAX_RECORDS,
+    PROFILING_ENABLED, PROFILE_MAX_SECONDS, PROFILE_DEFAULT_INTERVAL
+)
 
 # FastAPI 앱 생성
 app = FastAPI(
@@ -37,6 +60,73 @@ app = FastAPI(
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
 
+# 센서 노드의 gzip 압축 일괄 전송 (Content-Encoding: gzip) 해제
+app.add_middleware(GzipRequestMiddleware)
+
+# 처리 시간을 히스토그램으로 기록할 수집 경로
+INGEST_PATHS = ("/sensor", "/sensor/batch", "/sensor/binary")
+
+
+@app.middleware("http")
+async def observe_ingest_latency(request: Request, call_next):
+    """
+    수집 요청 처리 시간 기록 (본문 파싱/검증 포함)
+    """
+    if request.url.path not in INGEST_PATHS:
+        return await call_next(request)
+    
+    started = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        INGEST_REQUEST_SECONDS.labels(request.url.path).observe(time.perf_counter() - started)
+
+
+# 느린 요청 기록 (SINKER_PROFILING=1 일 때만 설치 → 꺼져 있으면 요청/SQL 처리 비용 없음)
+if PROFILING_ENABLED:
+    slow_requests.attach(engine)
+    app.middleware("http")(slow_requests.middleware)
+
+
+# ============================================
+# 메트릭 (수집 시점에 각 모듈의 현재 값을 읽음)
+# ============================================
+
+def _db_pool_size():
+    """
+    DB 커넥션 풀 기본 크기 (QueuePool 이 아니면 측정 불가 → 생략)
+    """
+    pool = engine.pool
+    return pool.size() if isinstance(pool, QueuePool) else None
+
+
+def _db_pool_connections():
+    """
+    DB 커넥션 풀 사용량 (QueuePool 이 아니면 측정 불가 → 생략)
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return None
+    return {
+        ("checked_out",): pool.checkedout(),
+        ("idle",): pool.checkedin(),
+        ("overflow",): max(pool.overflow(), 0),
+    }
+
+
+registry.gauge("sinker_ws_clients", "연결된 WebSocket 클라이언트 수", callback=lambda: len(manager.active_connections))
+registry.gauge(
+    "sinker_ws_queued_messages", "WebSocket 클라이언트 전송 대기열에 쌓인 메시지 수",
+    callback=lambda: manager.stats()["queued"]
+)
+registry.counter("sinker_ws_evicted_total", "느리거나 끊겨 강제 종료한 WebSocket 클라이언트 수", callback=lambda: manager.evicted)
+registry.gauge("sinker_ingest_queue_depth", "수집 대기열에 쌓인 건수", callback=lambda: ingest_pipeline.depth)
+registry.counter("sinker_ingest_rejected_total", "대기열이 가득 차 503 으로 거부한 건수", callback=lambda: ingest_pipeline.rejected)
+registry.counter("sinker_ingest_dropped_total", "저장 실패로 버린 건수 (재시도 초과 / 종료 중)", callback=lambda: ingest_pipeline.dropped)
+registry.gauge("sinker_ingest_streams", "연결된 스트리밍 수집 노드 수 (/ws/ingest)", callback=lambda: ingest_streams.active)
+registry.gauge("sinker_db_pool_size", "DB 커넥션 풀 기본 크기", callback=_db_pool_size)
+registry.gauge("sinker_db_pool_connections", "상태별 DB 커넥션 수", ["state"], callback=_db_pool_connections)
+
 
 # 데이터베이스 초기화
 @app.on_event("startup")
@@ -45,25 +135,131 @@ async def startup_event():
     서버 시작 시 실행
     - 테이블 생성
     - 기본 임계값 설정
+    - 메시지 버스 연결
+    - 위험도 임계값 / 최신 데이터 캐시 / 최근 데이터 링 버퍼 적재
+    - 파티션 관리 작업 시작
     """
     # 테이블 생성
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     
     # 기본 임계값 초기화
-    db = next(get_db())
-    try:
-        for name, value in DEFAULT_THRESHOLDS.items():
-            existing = db.query(Threshold).filter(Threshold.name == name).first()
-            if not existing:
-                threshold = Threshold(name=name, value=value)
-                db.add(threshold)
-        db.commit()
-        print("✅ 데이터베이스 초기화 완료")
-    except Exception as e:
-        print(f"❌ 데이터베이스 초기화 실패: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    async with SessionLocal() as db:
+        try:
+            result = await db.execute(select(Threshold.name))
+            existing = set(result.scalars().all())
+            for name, value in DEFAULT_THRESHOLDS.items():
+                if name not in existing:
+                    db.add(Threshold(name=name, value=value))
+            await db.commit()
+            print("✅ 데이터베이스 초기화 완료")
+        except Exception as e:
+            print(f"❌ 데이터베이스 초기화 실패: {e}")
+            await db.rollback()
+    
+    # 워커 간 메시지 버스 연결 (적재 전에 연결해야 그 사이 저장된 데이터를 놓치지 않음)
+    bus.subscribe("readings", on_remote_readings)
+    bus.subscribe("committed", on_remote_committed)
+    bus.subscribe("thresholds", on_remote_thresholds)
+    bus.on_resync(load_memory_state)
+    await bus.start()
+    
+    await load_memory_state()
+    
+    # 수집 파이프라인 writer 시작
+    await ingest_pipeline.start()
+    
+    # 파티션 관리 / 보존 정책 작업 시작
+    await partition_manager.start(engine)
+
+
+async def load_memory_state():
+    """
+    위험도 임계값 / 최신 데이터 캐시 / 최근 데이터 링 버퍼를 DB에서 적재
+    - 서버 시작 시, 그리고 메시지 버스 재연결 시 (그 사이 놓친 데이터 보충)
+    """
+    # 위험도 임계값 스냅샷 적재
+    async with SessionLocal() as db:
+        try:
+            await threshold_store.load(db)
+        except Exception as e:
+            print(f"❌ 위험도 임계값 적재 실패 (기본값 사용): {e}")
+            await db.rollback()
+    
+    # 최신 데이터 캐시 적재
+    async with SessionLocal() as db:
+        try:
+            await latest_cache.warm(db)
+        except Exception as e:
+            print(f"❌ 최신 데이터 캐시 적재 실패: {e}")
+    
+    # 최근 데이터 링 버퍼 적재
+    async with SessionLocal() as db:
+        try:
+            await recent_buffer.rebuild(db, datetime.now(pytz.timezone(TIMEZONE)).replace(tzinfo=None))
+        except Exception as e:
+            print(f"❌ 최근 데이터 링 버퍼 적재 실패: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    서버 종료 시 실행
+    - 파티션 관리 작업 종료
+    - 수집 대기열에 남은 데이터 저장
+    - 메시지 버스 연결 종료
+    - 커넥션 풀 정리
+    """
+    await partition_manager.stop()
+    await ingest_pipeline.stop()
+    await bus.stop()
+    await engine.dispose()
+
+
+# ============================================
+# 수신 데이터 전파 (이 워커 + 다른 워커)
+# ============================================
+
+async def publish_readings(readings: List[SensorDataRead], as_list: bool):
+    """
+    수신한 센서 데이터를 최신 데이터 캐시와 WebSocket 클라이언트에 반영
+    - 이 워커는 직접 반영하고, 다른 워커에는 메시지 버스로 전달
+    
+    Args:
+        readings: 수신한 센서 데이터
+        as_list: 배열로 브로드캐스트할지 여부 (일괄 수신)
+    """
+    latest_cache.update_many(readings)
+    
+    payload = [reading.model_dump(mode='json') for reading in readings]
+    message = payload if as_list else payload[0]
+    await manager.broadcast(message)
+    await bus.publish("readings", message, local=False)
+
+
+async def on_remote_readings(message):
+    """
+    다른 워커가 수신한 센서 데이터 (publish_readings 의 message)
+    """
+    items = message if isinstance(message, list) else [message]
+    latest_cache.update_many([SensorDataRead(**item) for item in items])
+    await manager.broadcast(message)
+
+
+async def on_remote_thresholds(message):
+    """
+    다른 워커에서 변경된 위험도 임계값 스냅샷
+    """
+    threshold_store.swap(ThresholdSnapshot.from_values(message["version"], message["values"]))
+
+
+async def on_remote_committed(rows):
+    """
+    다른 워커가 저장 완료한 센서 데이터 (id 포함) → 최근 데이터 링 버퍼, 최신 데이터 캐시
+    """
+    readings = [SensorDataRead(**row) for row in rows]
+    recent_buffer.extend(readings)
+    latest_cache.update_many(readings)
 
 
 # ============================================
@@ -93,48 +289,129 @@ async def config_page(request: Request):
 # ============================================
 
 @app.post("/sensor", response_model=dict)
-async def receive_sensor_data(data: SensorDataCreate, db: Session = Depends(get_db)):
+async def receive_sensor_data(data: SensorDataCreate):
     """
-    센서 데이터 수신 및 저장
+    센서 데이터 수신
     - 위험도 계산
-    - DB 저장
+    - 저장 대기열에 추가 (DB 저장은 백그라운드 writer 가 배치로 처리)
     - WebSocket 브로드캐스트
     """
     try:
-        # 데이터 저장
-        db_data = create_sensor_data(db, data)
+        values = build_sensor_values(data)
+        
+        # 대기열이 가득 차면 503 → 센서 측에서 재시도
+        if not ingest_pipeline.enqueue(values):
+            return JSONResponse(
+                status_code=503,
+                content={"status": "error", "message": "수집 대기열이 가득 찼습니다"}
+            )
+        
+        # 최신 데이터 캐시 갱신 및 WebSocket 브로드캐스트 (DB id 는 저장 후 할당되므로 없음, 캐시는 저장 후 id 포함 행으로 교체)
+        await publish_readings([SensorDataRead(**values)], as_list=False)
+        
+        return {"status": "queued", "risk_level": values["risk_level"]}
+    
+    except Exception as e:
+        print(f"❌ 센서 데이터 수신 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"status": "error", "message": str(e)}
+
+
+@app.post("/sensor/batch", response_model=dict)
+async def receive_sensor_data_batch(items: List[SensorDataCreate], db: AsyncSession = Depends(get_db)):
+    """
+    센서 데이터 일괄 수신 및 저장
+    - 전체 위험도 계산
+    - 단일 트랜잭션 bulk insert
+    - WebSocket 브로드캐스트 1회 (리스트로 전송)
+    """
+    if not items:
+        return {"status": "ok", "count": 0, "items": []}
+    
+    try:
+        # 일괄 저장
+        db_rows = await create_sensor_data_batch(db, items)
+        
+        # 최신 데이터 캐시 갱신 및 WebSocket으로 한 번에 브로드캐스트
+        await publish_readings([SensorDataRead.model_validate(row) for row in db_rows], as_list=True)
+        
+        return {
+            "status": "ok",
+            "count": len(db_rows),
+            "items": [{"id": row.id, "risk_level": row.risk_level} for row in db_rows]
+        }
+    
+    except Exception as e:
+        print(f"❌ 센서 데이터 일괄 저장 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"status": "error", "message": str(e)}
+
+
+@app.post("/sensor/binary", response_model=dict)
+async def receive_sensor_data_binary(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    센서 데이터 일괄 수신 (바이너리 레코드, 형식은 app/ingest_encoding.py 참고)
+    - 본문 전체를 컬럼 배열로 디코딩 (레코드별 JSON/Pydantic 처리 없음)
+    - 위험도 배열 계산 후 단일 트랜잭션 저장, WebSocket 브로드캐스트 1회
+    - 형식이 잘못된 본문은 422 (재전송해도 같은 결과)
+    """
+    try:
+        columns = decode_records(await request.body(), BINARY_INGEST_MAX_RECORDS)
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"status": "error", "message": str(e)})
+    
+    if not len(columns["seq"]):
+        return {"status": "ok", "count": 0, "items": []}
+    
+    try:
+        db_rows = await create_sensor_data_columns(db, columns)
         
-        # WebSocket으로 브로드캐스트 (Pydantic v2 호환)
-        sensor_read = SensorDataRead.model_validate(db_data)
-        await manager.broadcast(sensor_read.model_dump(mode='json'))
+        await publish_readings([SensorDataRead.model_validate(row) for row in db_rows], as_list=True)
         
-        return {"status": "ok", "id": db_data.id, "risk_level": db_data.risk_level}
+        return {
+            "status": "ok",
+            "count": len(db_rows),
+            "items": [{"id": row.id, "risk_level": row.risk_level} for row in db_rows]
+        }
     
     except Exception as e:
-        print(f"❌ 센서 데이터 저장 실패: {e}")
+        print(f"❌ 센서 데이터 바이너리 저장 실패: {e}")
         import traceback
         traceback.print_exc()
         return {"status": "error", "message": str(e)}
 
 
 @app.get("/latest", response_model=Optional[SensorDataRead])
-async def get_latest(db: Session = Depends(get_db)):
+async def get_latest(
+    device_id: Optional[str] = Query(None, description="디바이스 ID (생략 시 전체 중 최신)")
+):
     """
     최신 센서 데이터 1건 조회
+    - 메모리 캐시에서 응답 (캐시에 없을 때만 DB 조회)
     """
-    data = get_latest_sensor_data(db)
-    return data
+    return await latest_cache.get_or_load(SessionLocal, device_id=device_id)
 
 
-@app.get("/api/history", response_model=List[SensorDataRead])
+@app.get("/api/history", response_model=Union[List[SensorDataRead], List[SensorRollupRead]])
 async def get_history(
+    response: Response,
     minutes: Optional[int] = Query(None, description="최근 N분 데이터"),
     start: Optional[str] = Query(None, description="시작 시각 (ISO 8601)"),
     end: Optional[str] = Query(None, description="종료 시각 (ISO 8601)"),
-    db: Session = Depends(get_db)
+    device_id: Optional[str] = Query(None, description="디바이스 ID (생략 시 전체)"),
+    resolution: str = Query("auto", pattern="^(auto|raw|minute|hour)$", description="해상도 (auto: 구간 길이에 따라 선택)"),
+    cursor: Optional[str] = Query(None, description="다음 페이지 커서 (X-Next-Cursor 헤더 값)"),
+    limit: int = Query(200, ge=1, le=1000, description="페이지 크기 (원본 데이터)"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     센서 데이터 이력 조회
+    - raw: 원본 데이터 (최신순, 페이지당 limit 건)
+    - minute / hour: 롤업 (구간 내 전체 버킷)
+    - 선택된 해상도는 X-History-Resolution 헤더로 전달
+    - 원본 데이터에 다음 페이지가 있으면 X-Next-Cursor 헤더로 커서 전달
     """
     start_dt = None
     end_dt = None
@@ -144,7 +421,36 @@ async def get_history(
     if end:
         end_dt = datetime.fromisoformat(end)
     
-    data_list = get_sensor_history(db, minutes=minutes, start=start_dt, end=end_dt)
+    # 롤업 조회 구간 계산
+    if minutes:
+        end_dt = datetime.now(pytz.timezone(TIMEZONE)).replace(tzinfo=None)
+        start_dt = end_dt - timedelta(minutes=minutes)
+    span_minutes = (end_dt - start_dt).total_seconds() / 60 if start_dt and end_dt else None
+    
+    if resolution == "auto":
+        resolution = choose_history_resolution(span_minutes)
+    if span_minutes is None:
+        resolution = "raw"   # 구간이 없으면 롤업 불가
+    
+    response.headers["X-History-Resolution"] = resolution
+    
+    if resolution != "raw":
+        return await get_sensor_rollups(db, resolution, start_dt, end_dt, device_id=device_id)
+    
+    try:
+        cursor_key = decode_history_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    data_list = await get_sensor_history(
+        db, minutes=minutes, start=start_dt, end=end_dt,
+        limit=limit, device_id=device_id, cursor=cursor_key
+    )
+    
+    # 페이지가 가득 찼으면 다음 페이지가 있을 수 있음
+    if len(data_list) == limit:
+        response.headers["X-Next-Cursor"] = encode_history_cursor(data_list[-1])
+    
     return data_list
 
 
@@ -153,10 +459,13 @@ async def download_history_csv(
     minutes: Optional[int] = Query(None, description="최근 N분 데이터"),
     start: Optional[str] = Query(None, description="시작 시각 (ISO 8601)"),
     end: Optional[str] = Query(None, description="종료 시각 (ISO 8601)"),
-    db: Session = Depends(get_db)
+    device_id: Optional[str] = Query(None, description="디바이스 ID (생략 시 전체)"),
+    gzip: bool = Query(False, description="gzip 압축 (.csv.gz)")
 ):
     """
     센서 데이터 이력 CSV 다운로드
+    - 서버 측 커서에서 읽는 대로 CSV 청크를 전송 (건수 제한 없음, 메모리 일정)
+    - 오래된 것부터 정렬
     """
     start_dt = None
     end_dt = None
@@ -166,58 +475,160 @@ async def download_history_csv(
     if end:
         end_dt = datetime.fromisoformat(end)
     
-    data_list = get_sensor_history(db, minutes=minutes, start=start_dt, end=end_dt, limit=10000)
+    filename = f"sensor_history_{device_id}.csv" if device_id else "sensor_history.csv"
     
-    # CSV 생성
+    if gzip:
+        body = _gzip_chunks(_csv_chunks(minutes, start_dt, end_dt, device_id))
+        media_type = "application/gzip"
+        filename += ".gz"
+    else:
+        body = _csv_chunks(minutes, start_dt, end_dt, device_id)
+        media_type = "text/csv"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+async def _csv_chunks(minutes, start_dt, end_dt, device_id):
+    """
+    CSV 청크 생성기
+    - 응답이 끝날 때까지 커서를 유지해야 하므로 요청 의존성 대신 자체 세션 사용
+    """
     output = io.StringIO()
     writer = csv.writer(output)
     
     # 헤더
-    writer.writerow([
-        "created_at", "moisture", 
-        "accel_x", "accel_y", "accel_z",
-        "gyro_x", "gyro_y", "gyro_z",
-        "vibration_raw", "risk_level"
-    ])
-    
-    # 데이터 행
-    for data in reversed(data_list):  # 오래된 것부터
-        writer.writerow([
-            data.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            data.moisture,
-            data.accel_x, data.accel_y, data.accel_z,
-            data.gyro_x, data.gyro_y, data.gyro_z,
-            data.vibration_raw,
-            data.risk_level
-        ])
-    
-    output.seek(0)
+    writer.writerow(EXPORT_COLUMNS)
+    yield output.getvalue()
     
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=sensor_history.csv"}
+    async with SessionLocal() as db:
+        async for rows in stream_sensor_history(
+            db, minutes=minutes, start=start_dt, end=end_dt, device_id=device_id
+        ):
+            output.seek(0)
+            output.truncate()
+            writer.writerows(
+                (row[0].strftime("%Y-%m-%d %H:%M:%S"),) + tuple(row[1:])
+                for row in rows
+            )
+            yield output.getvalue()
+
+
+async def _gzip_chunks(chunks):
+    """
+    문자열 청크를 gzip 스트림으로 압축 (압축기 버퍼만 유지)
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits=31 → gzip 헤더
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ============================================
+# 디바이스별 API
+# ============================================
+
+@app.get("/api/devices", response_model=List[str])
+async def list_devices(db: AsyncSession = Depends(get_db)):
+    """
+    데이터가 있는 디바이스 ID 목록
+    """
+    return await get_device_ids(db)
+
+
+@app.get("/api/devices/{device_id}/latest", response_model=Optional[SensorDataRead])
+async def get_device_latest(device_id: str):
+    """
+    디바이스별 최신 센서 데이터 1건 조회
+    """
+    return await get_latest(device_id=device_id)
+
+
+@app.get("/api/devices/{device_id}/history", response_model=Union[List[SensorDataRead], List[SensorRollupRead]])
+async def get_device_history(
+    device_id: str,
+    response: Response,
+    minutes: Optional[int] = Query(None, description="최근 N분 데이터"),
+    start: Optional[str] = Query(None, description="시작 시각 (ISO 8601)"),
+    end: Optional[str] = Query(None, description="종료 시각 (ISO 8601)"),
+    resolution: str = Query("auto", pattern="^(auto|raw|minute|hour)$", description="해상도 (auto: 구간 길이에 따라 선택)"),
+    cursor: Optional[str] = Query(None, description="다음 페이지 커서 (X-Next-Cursor 헤더 값)"),
+    limit: int = Query(200, ge=1, le=1000, description="페이지 크기 (원본 데이터)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    디바이스별 센서 데이터 이력 조회 ((device_id, created_at) 인덱스 사용)
+    """
+    return await get_history(
+        response, minutes=minutes, start=start, end=end,
+        device_id=device_id, resolution=resolution, cursor=cursor, limit=limit, db=db
     )
 
 
+@app.get("/api/devices/{device_id}/history/csv")
+async def download_device_history_csv(
+    device_id: str,
+    minutes: Optional[int] = Query(None, description="최근 N분 데이터"),
+    start: Optional[str] = Query(None, description="시작 시각 (ISO 8601)"),
+    end: Optional[str] = Query(None, description="종료 시각 (ISO 8601)"),
+    gzip: bool = Query(False, description="gzip 압축 (.csv.gz)")
+):
+    """
+    디바이스별 센서 데이터 이력 CSV 다운로드
+    """
+    return await download_history_csv(minutes=minutes, start=start, end=end, device_id=device_id, gzip=gzip)
+
+
 # ============================================
 # 임계값 관리 API
 # ============================================
 
 @app.get("/config/api/thresholds", response_model=List[ThresholdRead])
-async def get_thresholds(db: Session = Depends(get_db)):
+async def get_thresholds(db: AsyncSession = Depends(get_db)):
     """
     모든 임계값 조회
     """
-    return get_all_thresholds(db)
+    return await get_all_thresholds(db)
 
 
 @app.post("/config/api/thresholds", response_model=ThresholdRead)
-async def update_threshold(threshold: ThresholdUpdate, db: Session = Depends(get_db)):
+async def update_threshold(threshold: ThresholdUpdate, db: AsyncSession = Depends(get_db)):
     """
     임계값 업데이트 또는 생성
     """
-    return upsert_threshold(db, threshold.name, threshold.value)
+    return await upsert_threshold(db, threshold.name, threshold.value)
+
+
+@app.get("/config/api/risk-thresholds", response_model=RiskThresholdSnapshotRead)
+async def get_risk_thresholds():
+    """
+    위험도 계산에 사용 중인 임계값 세트 조회 (메모리 스냅샷)
+    """
+    snapshot = threshold_store.current
+    return RiskThresholdSnapshotRead(version=snapshot.VERSION, **snapshot.values())
+
+
+@app.post("/config/api/thresholds/simulate", response_model=ThresholdSimulationResult)
+async def simulate_threshold_set(request: ThresholdSimulationRequest, db: AsyncSession = Depends(get_db)):
+    """
+    제안 임계값을 저장된 이력 구간에 적용했을 때의 위험도 분포/전이 계산 (what-if)
+    """
+    if request.start > request.end:
+        raise HTTPException(status_code=400, detail="start 는 end 보다 이전이어야 합니다")
+    
+    return await simulate_thresholds(
+        db,
+        request.thresholds.as_thresholds(),
+        start=request.start,
+        end=request.end,
+        max_events=request.max_events,
+        device_id=request.device_id
+    )
 
 
 # ============================================
@@ -225,11 +636,19 @@ async def update_threshold(threshold: ThresholdUpdate, db: Session = Depends(get
 # ============================================
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    encoding: str = Query("json", pattern="^(json|binary)$", description="메시지 인코딩 (binary: 바이너리 delta 프레임)"),
+    max_fps: Optional[float] = Query(None, gt=0, description="초당 최대 프레임 수 (그 사이 데이터는 한 프레임으로 합침)")
+):
     """
     실시간 데이터 스트리밍을 위한 WebSocket 엔드포인트
+    - 인코딩과 프레임 속도는 연결 시 쿼리 파라미터로 협상 (예: /ws?encoding=binary&max_fps=5)
     """
-    await manager.connect(websocket)
+    if max_fps is not None:
+        max_fps = min(max_fps, WS_MAX_FPS_LIMIT)
+    
+    await manager.connect(websocket, encoding=encoding, max_fps=max_fps)
     
     try:
         while True:
@@ -241,6 +660,27 @@ async def websocket_endpoint(websocket: WebSocket):
         print("WebSocket 연결 종료")
 
 
+@app.websocket("/ws/ingest")
+async def ingest_stream_endpoint(
+    websocket: WebSocket,
+    device_id: str = Query(..., min_length=1, max_length=16, description="센서 노드 디바이스 ID"),
+    stream: str = Query(..., min_length=1, max_length=64, description="노드 실행마다 새로 만드는 스트림 ID")
+):
+    """
+    센서 노드 스트리밍 수집 (프로토콜은 app/ingest_stream.py 참고)
+    - 연결 하나로 순번이 붙은 바이너리 레코드를 계속 받고, 저장이 끝난 순번까지 누적 ack
+    - 재연결 시 hello 의 마지막 저장 순번 다음부터 이어서 받음
+    """
+    print(f"📥 스트리밍 수집 연결: {device_id}")
+    await ingest_streams.handle(websocket, device_id, stream, on_committed=publish_stream_rows)
+    print(f"📥 스트리밍 수집 종료: {device_id}")
+
+
+async def publish_stream_rows(db_rows: List[SensorData]):
+    """스트리밍 수집으로 저장된 행 브로드캐스트 (일괄 수신과 같은 형식)"""
+    await publish_readings([SensorDataRead.model_validate(row) for row in db_rows], as_list=True)
+
+
 # ============================================
 # 헬스체크
 # ============================================
@@ -250,4 +690,66 @@ async def health_check():
     """
     서버 상태 확인
     """
-    return {"status": "healthy", "service": "sinkhole-warning-system"}
+    return {
+        "status": "healthy",
+        "service": "sinkhole-warning-system",
+        "ingest": ingest_pipeline.stats(),
+        "ingest_stream": ingest_streams.stats(),
+        "latest_cache": latest_cache.stats(),
+        "recent_buffer": recent_buffer.stats(),
+        "websocket": manager.stats(),
+        "bus": bus.stats(),
+        "partitions": partition_manager.stats(),
+        "archive": cold_archive.stats()
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus 스크랩 엔드포인트 (이 워커의 값)
+    """
+    return Response(content=registry.render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+# ============================================
+# 프로파일링 (SINKER_PROFILING=1 일 때만)
+# ============================================
+
+def require_profiling(request: Request):
+    """
+    /debug/* 접근 확인 (꺼져 있으면 404, 토큰 불일치 또는 원격 요청이면 403)
+    """
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    client_host = request.client.host if request.client else None
+    if not is_authorized(request.headers.get("X-Profiling-Token"), client_host):
+        raise HTTPException(status_code=403, detail="프로파일링 접근 권한이 없습니다")
+
+
+@app.get("/debug/slow-requests", dependencies=[Depends(require_profiling)])
+async def get_slow_requests():
+    """
+    최근 느린 요청과 그 요청에서 실행된 SQL (최신순)
+    """
+    return {**slow_requests.stats(), "items": slow_requests.recent()}
+
+
+@app.get("/debug/profile", dependencies=[Depends(require_profiling)])
+async def run_profile(
+    seconds: float = Query(10.0, gt=0, le=PROFILE_MAX_SECONDS, description="샘플링 시간 (초)"),
+    interval: float = Query(PROFILE_DEFAULT_INTERVAL, ge=0.001, le=1.0, description="샘플링 간격 (초)")
+):
+    """
+    seconds 초 동안 샘플링 프로파일러 실행 → folded 스택 (flamegraph.pl / speedscope 입력)
+    """
+    try:
+        stacks = await sampling_profiler.profile(seconds, interval)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return Response(
+        content=to_folded(stacks),
+        media_type="text/plain",
+        headers={"X-Profile-Samples": str(sum(stacks.values()))}
+    )
@@ -0,0 +1,244 @@
+"""
+Prometheus 텍스트 형식 메트릭 (/metrics)
+- 수집/저장/브로드캐스트 경로에서 카운터와 히스토그램을 직접 갱신 (외부 라이브러리 없음)
+- 연결 수, 대기열 깊이, DB 커넥션 풀처럼 이미 어딘가에 있는 값은 수집 시점에 콜백으로 읽음
+- 값은 프로세스(워커)별, 여러 워커로 실행하면 스크랩할 때마다 한 워커의 값이 나옴
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 기본 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    """
+    레이블 값 조합별 값을 가진 메트릭 공통 부분
+    """
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), callback: Optional[Callable] = None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values):
+        """레이블 값 조합의 하위 메트릭 (처음 쓰일 때 생성)"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: 레이블 {self.labelnames} 값이 필요합니다")
+            child = self._new_child()
+            self._children[key] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        """레이블 없는 메트릭의 유일한 하위 메트릭"""
+        return self.labels()
+
+    def render(self) -> Iterable[str]:
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception as e:
+                # 콜백 오류는 /metrics 전체를 실패시키지 않고 이 메트릭만 생략 (원인은 로그로)
+                print(f"❌ 메트릭 {self.name} 수집 실패: {e}")
+                return
+            if values is None:
+                return   # 측정 불가 (예: 커넥션 풀 종류가 다름) → 생략
+            if not isinstance(values, dict):
+                values = {(): values}
+            for key, value in values.items():
+                self.labels(*key).value = value
+
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for key, child in self._children.items():
+            yield from self._render_child(key, child)
+
+    def _render_child(self, key, child) -> Iterable[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+
+class _CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """
+    단조 증가 카운터
+
+    callback 이 있으면 수집 시점에 호출해 값을 읽는다 (이미 다른 곳에서 세고 있는 누적값).
+    callback 은 레이블 없는 값 하나 또는 {레이블 값 튜플: 값} 을 반환한다.
+    """
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class _GaugeChild(_Value):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(_Metric):
+    """
+    현재 값 (직접 set 하거나, Counter 와 같은 방식의 callback)
+    """
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # 마지막: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """구간별 누적 건수 히스토그램"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def _render_child(self, key, child) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class MetricsRegistry:
+    """
+    메트릭 모음 (등록 순서대로 출력)
+    """
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if not metric.labelnames:
+            metric.labels()   # 레이블 없는 메트릭은 관측 전에도 0 으로 노출
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = (), callback: Optional[Callable] = None) -> Counter:
+        return self.register(Counter(name, help_text, labelnames, callback))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (), callback: Optional[Callable] = None) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames, callback))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 전역 MetricsRegistry 인스턴스
+registry = MetricsRegistry()
+
+
+# ============================================
+# 핫 패스 메트릭 (값은 각 모듈에서 갱신)
+# ============================================
+
+INGEST_REQUEST_SECONDS = registry.histogram(
+    "sinker_ingest_request_seconds", "수집 요청 처리 시간 (본문 파싱/검증 포함)", ["path"]
+)
+READINGS_TOTAL = registry.counter(
+    "sinker_readings_total", "위험도별 수신 센서 데이터 수", ["risk_level"]
+)
+DB_WRITE_SECONDS = registry.histogram(
+    "sinker_db_write_seconds", "센서 데이터 저장 트랜잭션 시간 (INSERT + 롤업 + commit)"
+)
+DB_COMMIT_SECONDS = registry.histogram(
+    "sinker_db_commit_seconds", "센서 데이터 저장 트랜잭션의 commit 시간"
+)
+DB_WRITTEN_ROWS_TOTAL = registry.counter(
+    "sinker_db_written_rows_total", "DB 에 저장한 센서 데이터 수"
+)
+BROADCAST_SECONDS = registry.histogram(
+    "sinker_ws_broadcast_seconds", "브로드캐스트 1건을 모든 클라이언트 대기열에 넣는 시간"
+)
+WS_SEND_LAG_SECONDS = registry.histogram(
+    "sinker_ws_send_lag_seconds", "브로드캐스트부터 클라이언트별 프레임 전송 완료까지 시간 (프레임의 가장 오래된 메시지 기준)",
+    buckets=LATENCY_BUCKETS + (30.0,)
+)
+WS_DROPPED_TOTAL = registry.counter(
+    "sinker_ws_dropped_messages_total", "클라이언트 전송 대기열이 가득 차 버린 메시지 수"
+)
@@ -1,9 +1,10 @@
 """
 SQLAlchemy ORM 모델 정의
 """
-from sqlalchemy import Column, BigInteger, Integer, Float, DateTime, String, Index
+from sqlalchemy import Column, BigInteger, Integer, Float, DateTime, String, Index, JSON
 from sqlalchemy.sql import func
 from app.database import Base
+from app.config import DEFAULT_DEVICE_ID
 
 
 class SensorData(Base):
@@ -12,7 +13,11 @@ class SensorData(Base):
     """
     __tablename__ = "sensor_data"
     
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # SQLite 는 INTEGER PRIMARY KEY 만 자동 증가(rowid)하므로 SQLite 에서는 Integer (64비트) 로 생성
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    
+    # 센서 노드 식별자
+    device_id = Column(String(64), nullable=False, default=DEFAULT_DEVICE_ID, server_default=DEFAULT_DEVICE_ID)
     
     # 토양 수분
     moisture = Column(Float, nullable=False)
@@ -33,12 +38,65 @@ class SensorData(Base):
     # 위험도 (0: 정상, 1: 주의, 2: 위험)
     risk_level = Column(Integer, nullable=False, default=0)
     
+    # 위험도 계산에 사용한 임계값 버전 (threshold_revisions.id, 0: 기본값)
+    threshold_version = Column(Integer, nullable=True)
+    
     # 생성 시각 (한국 시간)
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     
     # 인덱스 생성 (조회 성능 향상)
     __table_args__ = (
         Index('idx_created_at', 'created_at'),
+        Index('idx_device_created_at', 'device_id', 'created_at'),  # 디바이스별 최신/구간 조회
+    )
+
+
+class SensorRollupColumns:
+    """
+    롤업 테이블 공통 컬럼 (디바이스 × 시간 버킷 단위 집계)
+    - 평균은 sum / sample_count 로 계산 (증분 갱신을 위해 합계 저장)
+    """
+    device_id = Column(String(64), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)   # 버킷 시작 시각 (한국 시간)
+    
+    sample_count = Column(Integer, nullable=False)
+    
+    # 토양 수분
+    moisture_min = Column(Float, nullable=False)
+    moisture_max = Column(Float, nullable=False)
+    moisture_sum = Column(Float, nullable=False)
+    
+    # 기울기 크기 sqrt(accel_x² + accel_y²)
+    tilt_min = Column(Float, nullable=False)
+    tilt_max = Column(Float, nullable=False)
+    tilt_sum = Column(Float, nullable=False)
+    
+    # 진동 감지 횟수
+    vibration_count = Column(Integer, nullable=False)
+    
+    # 최대 위험도
+    risk_level_max = Column(Integer, nullable=False)
+
+
+class SensorRollupMinute(SensorRollupColumns, Base):
+    """
+    분 단위 롤업 테이블
+    """
+    __tablename__ = "sensor_rollup_minute"
+    
+    __table_args__ = (
+        Index('idx_rollup_minute_bucket', 'bucket'),   # 전체 디바이스 구간 조회
+    )
+
+
+class SensorRollupHour(SensorRollupColumns, Base):
+    """
+    시간 단위 롤업 테이블
+    """
+    __tablename__ = "sensor_rollup_hour"
+    
+    __table_args__ = (
+        Index('idx_rollup_hour_bucket', 'bucket'),
     )
 
 
@@ -51,3 +109,15 @@ class Threshold(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(50), unique=True, nullable=False)
     value = Column(Float, nullable=False)
+
+
+class ThresholdRevision(Base):
+    """
+    위험도 계산 임계값 세트 변경 이력
+    - 임계값이 바뀔 때마다 전체 세트를 1행으로 기록, id 가 임계값 버전
+    """
+    __tablename__ = "threshold_revisions"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    thresholds = Column(JSON, nullable=False)   # 이름(소문자) → 값
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -0,0 +1,409 @@
+"""
+sensor_data 시계열 파티션 관리 및 보존 정책
+- MariaDB: created_at 기준 RANGE COLUMNS 파티션 (일별 또는 월별)
+    - 미래 파티션을 PARTITION_PREMAKE 개 미리 생성 (pmax 분할)
+    - 보존 기간이 지난 파티션은 DROP PARTITION (행 단위 DELETE 없음)
+    - created_at 조건이 있는 이력 조회는 해당 파티션만 읽음 (partition pruning)
+- 그 외 DB (SQLite 등): 보존 기간이 지난 행을 배치 단위로 DELETE
+- 여러 워커 중 하나만 실행 (MariaDB GET_LOCK, 그 외 DB 는 잠금 파일)
+- 보존 정책 / 아카이브는 기본 꺼짐 (SINKER_RETENTION_DAYS / SINKER_ARCHIVE_AFTER_DAYS 로 켬)
+- 콜드 아카이브: ARCHIVE_AFTER_DAYS 일이 지난 날짜는 압축 컬럼 파일로 옮긴 뒤 DB에서 제거 (app/archive.py)
+
+기존 테이블을 파티션 테이블로 바꾸려면 migrations/004_partition_sensor_data.sql 을 먼저 실행한다.
+"""
+import asyncio
+import fcntl
+import os
+import re
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pytz
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.models import SensorData
+from app.archive import cold_archive, COLUMNS as ARCHIVE_COLUMNS
+from app.ring_buffer import FLOAT_COLUMNS
+from app.config import (
+    TIMEZONE,
+    PARTITION_INTERVAL,
+    PARTITION_PREMAKE,
+    RETENTION_DAYS,
+    PARTITION_CHECK_INTERVAL,
+    PARTITION_LOCK_PATH
+)
+
+TABLE = "sensor_data"
+MAX_PARTITION = "pmax"
+DELETE_BATCH_SIZE = 10000
+LOCK_NAME = "sinker_iot_partitions"   # 여러 워커 중 하나만 실행 (MariaDB GET_LOCK)
+
+
+def _next_boundary(day: date, interval: str) -> date:
+    """day 가 속한 파티션의 상한 (다음 일/월 1일)"""
+    if interval == "day":
+        return day + timedelta(days=1)
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def _partition_name(upper: date, interval: str) -> str:
+    """상한 직전 날짜 기준 파티션 이름 (p20261017 / p202610)"""
+    last = upper - timedelta(days=1)
+    return last.strftime("p%Y%m%d" if interval == "day" else "p%Y%m")
+
+
+def _parse_boundary(description: str) -> Optional[date]:
+    """information_schema 의 PARTITION_DESCRIPTION → 날짜 (MAXVALUE 면 None)"""
+    match = re.search(r"(\d{4})-(\d{2})-(\d{2})", description or "")
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+
+class PartitionManager:
+    """
+    파티션 생성/삭제 및 보존 정책을 주기적으로 실행하는 백그라운드 작업
+    """
+    def __init__(
+        self,
+        interval: str = PARTITION_INTERVAL,
+        premake: int = PARTITION_PREMAKE,
+        retention_days: Optional[int] = RETENTION_DAYS,
+        check_interval: float = PARTITION_CHECK_INTERVAL,
+        lock_path: str = PARTITION_LOCK_PATH
+    ):
+        if interval not in ("day", "month"):
+            raise ValueError(f"알 수 없는 파티션 단위: {interval}")
+
+        self.interval = interval
+        self.premake = premake
+        self.retention_days = retention_days
+        self.check_interval = check_interval
+        self.lock_path = lock_path
+
+        self._engine: Optional[AsyncEngine] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 통계
+        self.partitioned: Optional[bool] = None
+        self.partitions = 0
+        self.created = 0
+        self.dropped = 0
+        self.deleted_rows = 0
+        self.last_run: Optional[str] = None
+
+    async def start(self, engine: AsyncEngine):
+        """
+        관리 작업 시작 (서버 startup 시 호출, 첫 실행은 백그라운드)
+        """
+        self._engine = engine
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        관리 작업 종료 (서버 shutdown 시 호출)
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"❌ 파티션 관리 실패: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def _cutoff(self, today: date) -> Optional[date]:
+        """이 날짜 이전 데이터는 보존 기간 만료"""
+        if self.retention_days is None:
+            return None
+        return today - timedelta(days=self.retention_days)
+
+    async def run_once(self, today: Optional[date] = None):
+        """
+        파티션 관리 1회 실행
+
+        Args:
+            today: 기준 날짜 (한국 시간, 생략 시 오늘)
+        """
+        today = today or datetime.now(pytz.timezone(TIMEZONE)).date()
+
+        async with self._engine.connect() as conn:
+            if conn.dialect.name in ("mysql", "mariadb"):
+                await self._run_mysql(conn, today)
+            else:
+                await self._run_generic(conn, today)
+
+        self.last_run = datetime.now(pytz.timezone(TIMEZONE)).replace(tzinfo=None).isoformat(timespec="seconds")
+
+    # ----------------------------------------
+    # MariaDB: 파티션 DDL
+    # ----------------------------------------
+
+    async def _run_mysql(self, conn: AsyncConnection, today: date):
+        locked = await conn.scalar(text("SELECT GET_LOCK(:name, 0)"), {"name": LOCK_NAME})
+        if not locked:
+            return   # 다른 워커가 실행 중
+
+        try:
+            partitions = await self._list_partitions(conn)
+            self.partitioned = bool(partitions)
+
+            if not partitions:
+                # 파티션 테이블이 아니면 행 단위 보존 정책만 적용
+                print("⚠️ sensor_data 가 파티션 테이블이 아닙니다 (migrations/004_partition_sensor_data.sql 참고)")
+                await self._archive_closed_days(conn, today)
+                await self._delete_expired_rows(conn, today)
+                return
+
+            await self._create_future_partitions(conn, partitions, today)
+            await self._archive_closed_days(conn, today, await self._list_partitions(conn))
+            await self._drop_expired_partitions(conn, await self._list_partitions(conn), today)
+            # 보존 기준일에 걸친 파티션의 만료 행 (마이그레이션 전 데이터가 모인 첫 파티션, pstart 등)
+            # 파티션 pruning 으로 기준일 이전 구간의 파티션만 읽음
+            await self._delete_expired_rows(conn, today)
+            self.partitions = len(await self._list_partitions(conn))
+        finally:
+            await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+
+    # ----------------------------------------
+    # 그 외 DB (SQLite 등)
+    # ----------------------------------------
+
+    async def _run_generic(self, conn: AsyncConnection, today: date):
+        """
+        아카이브 + 행 단위 보존 정책 (잠금 파일로 워커 하나만 실행)
+        """
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return   # 다른 워커가 실행 중
+
+            await self._archive_closed_days(conn, today)
+            await self._delete_expired_rows(conn, today)
+        finally:
+            os.close(fd)   # 닫으면 잠금 해제
+
+    @staticmethod
+    async def _list_partitions(conn: AsyncConnection) -> List[Tuple[str, Optional[date]]]:
+        """(파티션 이름, 상한 날짜) 목록 (상한 오름차순, pmax 는 None)"""
+        result = await conn.execute(text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        ), {"table": TABLE})
+        return [(name, _parse_boundary(description)) for name, description in result.all()]
+
+    async def _create_future_partitions(self, conn: AsyncConnection, partitions, today: date):
+        """
+        오늘부터 premake 개 뒤까지의 파티션을 pmax 를 분할해 생성
+        - 미래 구간의 pmax 는 비어 있으므로 데이터 복사 없이 끝남
+        """
+        if partitions[-1][0] != MAX_PARTITION:
+            raise RuntimeError(f"마지막 파티션이 {MAX_PARTITION} 가 아닙니다")
+
+        bounds = [upper for _, upper in partitions if upper is not None]
+        last = bounds[-1] if bounds else None
+
+        target = _next_boundary(today, self.interval)
+        for _ in range(self.premake):
+            target = _next_boundary(target, self.interval)
+
+        # 첫 파티션은 마지막 상한부터 오늘이 속한 구간 끝까지 (그 사이 데이터가 있으면 함께 담음)
+        new_bounds = []
+        upper = _next_boundary(today, self.interval)
+        if last is not None and last >= upper:
+            upper = _next_boundary(last, self.interval)
+        while upper <= target:
+            new_bounds.append(upper)
+            upper = _next_boundary(upper, self.interval)
+
+        if not new_bounds:
+            return
+
+        definitions = [
+            f"PARTITION {_partition_name(bound, self.interval)} VALUES LESS THAN ('{bound.isoformat()}')"
+            for bound in new_bounds
+        ]
+        definitions.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+
+        await conn.execute(text(
+            f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAX_PARTITION} INTO ({', '.join(definitions)})"
+        ))
+        self.created += len(new_bounds)
+        print(f"✅ 파티션 {len(new_bounds)}개 생성 (~{new_bounds[-1].isoformat()})")
+
+    async def _drop_expired_partitions(self, conn: AsyncConnection, partitions, today: date):
+        """
+        상한이 보존 기준일 이하인 (모든 행이 만료된) 파티션과 아카이브 파일 삭제
+        """
+        cutoff = self._cutoff(today)
+        if cutoff is None:
+            return
+
+        cold_archive.expire(cutoff)
+
+        expired = [name for name, upper in partitions if upper is not None and upper <= cutoff]
+        if not expired:
+            return
+
+        await conn.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {', '.join(expired)}"))
+        self.dropped += len(expired)
+        print(f"🗑️ 만료 파티션 {len(expired)}개 삭제 ({', '.join(expired)})")
+
+    # ----------------------------------------
+    # 콜드 아카이브
+    # ----------------------------------------
+
+    async def _archive_closed_days(self, conn: AsyncConnection, today: date, partitions=None):
+        """
+        아카이브 대상 날짜의 행을 하루씩 파일로 옮기고 DB에서 제거
+        - 일별 파티션과 날짜 구간이 정확히 일치하면 DROP PARTITION, 아니면 배치 DELETE
+        - 이미 아카이브된 날짜에 늦게 들어온 행은 기존 파일에 합쳐 다시 기록
+        - 보존 기간이 지난 날짜는 아카이브하지 않음 (곧 삭제됨)
+
+        Args:
+            partitions: _list_partitions 결과 (파티션 테이블이 아니면 None)
+        """
+        before = cold_archive.archive_before(today)
+        if before is None:
+            return
+
+        cutoff = self._cutoff(today)
+        lower = datetime.combine(cutoff, time.min) if cutoff is not None else datetime.min
+        upper = datetime.combine(before, time.min)
+
+        while True:
+            oldest = await conn.scalar(
+                select(func.min(SensorData.created_at))
+                .where(SensorData.created_at >= lower, SensorData.created_at < upper)
+            )
+            if oldest is None:
+                break
+
+            day = oldest.date()
+            start = datetime.combine(day, time.min)
+            end = start + timedelta(days=1)
+
+            names = [name for name, _, _ in ARCHIVE_COLUMNS if name != "device"] + ["device_id"]
+            result = await conn.execute(
+                select(*(getattr(SensorData, name) for name in names))
+                .where(SensorData.created_at >= start, SensorData.created_at < end)
+                .order_by(SensorData.created_at, SensorData.id)
+            )
+            rows = result.all()
+            await conn.commit()   # 읽기 트랜잭션 종료 (아래 DDL/DELETE 와 분리)
+
+            columns = dict(zip(names, zip(*rows)))
+            values = {
+                "id": np.asarray(columns["id"], dtype=np.int64),
+                "device_id": np.asarray(columns["device_id"], dtype=object),
+                "created_at": np.asarray(columns["created_at"], dtype="datetime64[us]").astype(np.int64),
+                "risk_level": np.asarray(columns["risk_level"], dtype=np.int8),
+                "threshold_version": np.asarray(
+                    [-1 if v is None else v for v in columns["threshold_version"]], dtype=np.int32
+                ),
+                **{name: np.asarray(columns[name], dtype=np.float64) for name in FLOAT_COLUMNS},
+            }
+            total = await asyncio.to_thread(cold_archive.write_day, day, values)
+
+            partition = self._day_partition(partitions, day) if partitions else None
+            if partition is not None and await conn.scalar(
+                text(f"SELECT COUNT(*) FROM {TABLE} PARTITION ({partition})")
+            ) == len(rows):
+                await conn.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {partition}"))
+                self.dropped += 1
+                partitions = [p for p in partitions if p[0] != partition]
+            else:
+                # 읽은 뒤 들어온 행(더 큰 id)은 남겨 두었다가 다음 실행 때 합침
+                await self._delete_in_batches(
+                    conn,
+                    "created_at >= :start AND created_at < :end AND id <= :max_id",
+                    {"start": start, "end": end, "max_id": int(values["id"].max())}
+                )
+
+            cold_archive.archived_days += 1
+            cold_archive.archived_rows += len(rows)
+            print(f"✅ {day.isoformat()} 데이터 {len(rows)}건 아카이브 (파일 {total}건)")
+
+    def _day_partition(self, partitions, day: date) -> Optional[str]:
+        """[day, 다음날) 구간과 정확히 일치하는 파티션 이름 (없으면 None)"""
+        if self.interval != "day":
+            return None
+        for (_, lower), (name, upper) in zip(partitions, partitions[1:]):
+            if lower == day and upper == day + timedelta(days=1):
+                return name
+        return None
+
+    # ----------------------------------------
+    # 행 단위 삭제
+    # ----------------------------------------
+
+    async def _delete_expired_rows(self, conn: AsyncConnection, today: date):
+        """
+        보존 기간이 지난 행과 아카이브 파일 삭제
+        """
+        cutoff = self._cutoff(today)
+        if cutoff is None:
+            return
+
+        total = await self._delete_in_batches(
+            conn, "created_at < :cutoff", {"cutoff": datetime.combine(cutoff, time.min)}
+        )
+        if total:
+            self.deleted_rows += total
+            print(f"🗑️ 보존 기간 만료 데이터 {total}건 삭제 (~{cutoff.isoformat()})")
+
+        cold_archive.expire(cutoff)
+
+    @staticmethod
+    async def _delete_in_batches(conn: AsyncConnection, condition: str, params: dict) -> int:
+        """
+        조건에 맞는 행을 DELETE_BATCH_SIZE 건씩 삭제 (잠금 시간 최소화)
+
+        Returns:
+            삭제한 행 수
+        """
+        total = 0
+        while True:
+            result = await conn.execute(text(
+                f"DELETE FROM {TABLE} WHERE id IN ("
+                f"SELECT id FROM (SELECT id FROM {TABLE} WHERE {condition} LIMIT :limit) AS expired)"
+            ), {**params, "limit": DELETE_BATCH_SIZE})
+            await conn.commit()
+            total += result.rowcount
+            if result.rowcount < DELETE_BATCH_SIZE:
+                break
+        return total
+
+    def stats(self) -> dict:
+        """
+        파티션 관리 상태 (헬스체크/모니터링용)
+        """
+        return {
+            "interval": self.interval,
+            "retention_days": self.retention_days,
+            "partitioned": self.partitioned,
+            "partitions": self.partitions,
+            "created": self.created,
+            "dropped": self.dropped,
+            "deleted_rows": self.deleted_rows,
+            "last_run": self.last_run,
+        }
+
+
+# 전역 PartitionManager 인스턴스
+partition_manager = PartitionManager()
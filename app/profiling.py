@@ -0,0 +1,254 @@
+"""
+운영 중 원인 분석용 프로파일링 (SINKER_PROFILING=1 일 때만 설치)
+- 느린 요청 기록: 임계 시간 이상 걸린 요청을 그 요청에서 실행한 SQL/소요 시간과 함께 보관
+- 샘플링 프로파일러: N초 동안 모든 스레드의 스택을 주기적으로 수집해 folded 형식으로 반환
+  (flamegraph.pl, speedscope, https://www.speedscope.app 등에서 바로 열림)
+
+둘 다 꺼져 있으면 미들웨어와 SQL 이벤트 리스너를 설치하지 않으므로 요청 처리에 비용이 없다.
+"""
+import asyncio
+import contextvars
+import hmac
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pytz
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import (
+    TIMEZONE,
+    PROFILING_TOKEN,
+    SLOW_REQUEST_THRESHOLD_MS,
+    SLOW_REQUEST_LOG_SIZE,
+    SLOW_REQUEST_MAX_STATEMENTS,
+    PROFILE_MAX_SECONDS,
+    PROFILE_DEFAULT_INTERVAL,
+)
+
+# 로컬 요청으로 보는 클라이언트 주소 (토큰이 없을 때 /debug/* 허용 대상)
+LOCAL_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+_STDLIB = sysconfig.get_paths()["stdlib"]
+
+# 현재 요청의 SQL 기록 (요청 밖, 예: 수집 writer 태스크의 SQL 은 기록하지 않음)
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("sinker_request_trace", default=None)
+
+
+def is_authorized(token: Optional[str], client_host: Optional[str], expected: str = PROFILING_TOKEN) -> bool:
+    """
+    /debug/* 접근 허용 여부
+    - 토큰이 설정되어 있으면 X-Profiling-Token 헤더가 일치해야 함
+    - 토큰이 없으면 로컬 요청만 허용
+    """
+    if expected:
+        return token is not None and hmac.compare_digest(token, expected)
+    return client_host in LOCAL_HOSTS
+
+
+class _RequestTrace:
+    """
+    요청 1건에서 실행된 SQL
+    """
+    __slots__ = ("statements", "count", "sql_ms")
+
+    def __init__(self):
+        self.statements: List[dict] = []
+        self.count = 0
+        self.sql_ms = 0.0
+
+
+class SlowRequestLog:
+    """
+    느린 요청 기록
+
+    attach() 로 엔진에 SQL 이벤트 리스너를 달고 middleware 를 앱에 등록하면,
+    threshold_ms 이상 걸린 요청을 최근 size 건까지 보관한다.
+    StreamingResponse(CSV 내보내기 등)는 응답 헤더가 나갈 때까지만 잰다.
+    """
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_REQUEST_THRESHOLD_MS,
+        size: int = SLOW_REQUEST_LOG_SIZE,
+        max_statements: int = SLOW_REQUEST_MAX_STATEMENTS
+    ):
+        self.threshold_ms = threshold_ms
+        self.max_statements = max_statements
+        self._entries: deque = deque(maxlen=size)
+
+        # 통계
+        self.captured = 0
+
+    def attach(self, engine: AsyncEngine):
+        """
+        엔진에 SQL 시간 측정 리스너 등록 (요청 처리 중일 때만 기록)
+        """
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            if _current_trace.get() is not None:
+                conn.info.setdefault("sinker_query_started", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            trace = _current_trace.get()
+            if trace is None:
+                return
+            started = conn.info.get("sinker_query_started")
+            if not started:
+                return
+            elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+
+            trace.count += 1
+            trace.sql_ms += elapsed_ms
+            if len(trace.statements) < self.max_statements:
+                trace.statements.append({
+                    "sql": " ".join(statement.split()),
+                    "ms": round(elapsed_ms, 2),
+                    "executemany": len(parameters) if executemany else None,
+                })
+
+    async def middleware(self, request, call_next):
+        """
+        HTTP 미들웨어: 요청마다 SQL 기록을 시작하고, 느리면 보관
+        """
+        trace = _RequestTrace()
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            _current_trace.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                self._record(request, status, elapsed_ms, trace)
+
+    def _record(self, request, status: int, elapsed_ms: float, trace: _RequestTrace):
+        self.captured += 1
+        self._entries.append({
+            "at": datetime.now(pytz.timezone(TIMEZONE)).isoformat(),
+            "method": request.method,
+            "path": request.url.path,
+            "query": request.url.query,
+            "status": status,
+            "duration_ms": round(elapsed_ms, 2),
+            "sql_count": trace.count,
+            "sql_ms": round(trace.sql_ms, 2),
+            "statements": trace.statements,
+        })
+        print(
+            f"⚠️ 느린 요청: {request.method} {request.url.path} {elapsed_ms:.0f}ms "
+            f"(SQL {trace.count}건 {trace.sql_ms:.0f}ms)"
+        )
+
+    def recent(self) -> List[dict]:
+        """보관 중인 느린 요청 (최신순)"""
+        return list(reversed(self._entries))
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "captured": self.captured,
+            "kept": len(self._entries),
+        }
+
+
+def _frame_label(code) -> str:
+    """
+    스택 프레임 이름: 함수 (파일:첫 줄)
+    프로젝트 파일은 상대 경로, 라이브러리는 site-packages / 표준 라이브러리 이후 경로
+    """
+    filename = code.co_filename
+    if "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[-1]
+    elif filename.startswith(_STDLIB):
+        filename = filename[len(_STDLIB):].lstrip(os.sep)
+    elif filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    스택 샘플링 프로파일러 (별도 스레드, 한 번에 하나만 실행)
+
+    interval 초마다 sys._current_frames() 로 모든 스레드의 스택을 읽어 같은 스택끼리 센다.
+    대상 코드를 계측하지 않으므로 실행 중에도 이벤트 루프 지연이 거의 없다.
+    """
+    def __init__(self, max_seconds: float = PROFILE_MAX_SECONDS):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float, interval: float = PROFILE_DEFAULT_INTERVAL) -> Dict[str, int]:
+        """
+        seconds 초 동안 샘플링 (블로킹, 스레드에서 실행)
+
+        Returns:
+            folded 스택 ("스레드;바깥 프레임;...;안쪽 프레임") → 샘플 수
+
+        Raises:
+            RuntimeError: 이미 실행 중
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("프로파일러가 이미 실행 중입니다")
+
+        try:
+            seconds = min(max(seconds, interval), self.max_seconds)
+            own_thread = threading.get_ident()
+            stacks: Counter = Counter()
+            labels: dict = {}
+
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        label = labels.get(code)
+                        if label is None:
+                            label = labels[code] = _frame_label(code)
+                        stack.append(label)
+                        frame = frame.f_back
+                    stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                    stacks[";".join(reversed(stack))] += 1
+                time.sleep(interval)
+
+            return dict(stacks)
+        finally:
+            self._lock.release()
+
+    async def profile(self, seconds: float, interval: float = PROFILE_DEFAULT_INTERVAL) -> Dict[str, int]:
+        """
+        이벤트 루프를 막지 않고 샘플링 (그동안 들어오는 요청이 측정 대상)
+        """
+        return await asyncio.to_thread(self.sample, seconds, interval)
+
+
+def to_folded(stacks: Dict[str, int]) -> str:
+    """
+    Brendan Gregg folded 형식 ("프레임;프레임;... 샘플수" 한 줄씩, 샘플 많은 순)
+    """
+    lines = [f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda item: -item[1])]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+# 전역 인스턴스
+slow_requests = SlowRequestLog()
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,320 @@
+"""
+워커 간 메시지 버스 (pub/sub)
+- uvicorn --workers N 으로 실행해도 모든 워커의 WebSocket 클라이언트에 브로드캐스트하고
+  최신 데이터 캐시 / 최근 데이터 링 버퍼를 같은 상태로 유지
+- inprocess: 같은 프로세스 안에서만 전달 (기본)
+- local_socket: 외부 서비스 없이 유닉스 소켓 허브로 같은 서버의 워커끼리 전달
+
+토픽과 메시지는 JSON 으로 직렬화 가능한 값이어야 한다.
+"""
+import asyncio
+import fcntl
+import json
+import os
+import struct
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import (
+    PUBSUB_BACKEND,
+    PUBSUB_SOCKET_PATH,
+    PUBSUB_RECONNECT_DELAY,
+    PUBSUB_MAX_PEER_BUFFER
+)
+
+Handler = Callable[[object], Awaitable[None]]
+
+_HEADER = struct.Struct("<I")   # 프레임 길이
+
+
+class InProcessBus:
+    """
+    같은 프로세스 안에서만 전달하는 기본 버스
+    """
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._resync_handlers: List[Callable[[], Awaitable[None]]] = []
+
+        # 통계
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, topic: str, handler: Handler):
+        """
+        토픽 구독 (handler: 메시지를 받는 async 함수)
+        """
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def on_resync(self, handler: Callable[[], Awaitable[None]]):
+        """
+        다른 워커와의 연결이 끊겼다가 다시 이어졌을 때 (그 사이 메시지 유실) 호출할 함수 등록
+        """
+        self._resync_handlers.append(handler)
+
+    @property
+    def has_peers(self) -> bool:
+        """메시지를 받을 다른 워커가 있는지 여부"""
+        return False
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, topic: str, message, local: bool = True):
+        """
+        메시지 발행
+
+        Args:
+            topic: 토픽 이름
+            message: JSON 직렬화 가능한 값
+            local: 이 프로세스의 구독자에게도 전달할지 여부
+                   (False 면 다른 워커에만 전달, 이미 로컬 상태에 반영한 경우)
+        """
+        self.published += 1
+        if local:
+            await self._deliver(topic, message)
+
+    async def _deliver(self, topic: str, message):
+        for handler in self._handlers.get(topic, ()):
+            try:
+                await handler(message)
+            except Exception as e:
+                print(f"❌ 메시지 처리 실패 ({topic}): {e}")
+
+    async def _resync(self):
+        for handler in self._resync_handlers:
+            try:
+                await handler()
+            except Exception as e:
+                print(f"❌ 버스 재동기화 실패: {e}")
+
+    def stats(self) -> dict:
+        """
+        버스 상태 (헬스체크/모니터링용)
+        """
+        return {
+            "backend": "inprocess",
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+class LocalSocketBus(InProcessBus):
+    """
+    유닉스 소켓 허브 기반 버스 (외부 서비스 불필요)
+
+    워커들이 잠금 파일(flock)로 허브를 하나 선출한다. 허브는 소켓을 열고 받은 프레임을
+    자신의 구독자와 나머지 워커에 중계하고, 다른 워커는 허브에 접속한다.
+    허브 워커가 종료되면 잠금이 풀리므로 남은 워커 중 하나가 새 허브가 되고,
+    나머지는 재접속 후 resync 핸들러로 놓친 상태를 다시 적재한다.
+
+    프레임: u32 길이 + JSON {"t": 토픽, "m": 메시지}
+    """
+    def __init__(self, path: str = PUBSUB_SOCKET_PATH):
+        super().__init__()
+        self.path = path
+        self.lock_path = path + ".lock"
+
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()     # 허브: 접속한 워커
+        self._hub: Optional[asyncio.StreamWriter] = None   # 워커: 허브 연결
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # 통계
+        self.reconnects = 0
+        self.dropped_peers = 0
+
+    @property
+    def is_hub(self) -> bool:
+        return self._server is not None
+
+    @property
+    def has_peers(self) -> bool:
+        return bool(self._peers) or self._hub is not None
+
+    async def start(self):
+        """
+        허브 선출 및 연결 (서버 startup 시 호출)
+        - 첫 연결이 될 때까지 기다린 뒤 반환
+        """
+        self._stopping = False
+        connected = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(connected))
+        await connected
+
+    async def stop(self):
+        """
+        연결 종료 (서버 shutdown 시 호출)
+        """
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self._close_hub_server()
+        if self._hub is not None:
+            self._hub.close()
+            self._hub = None
+
+    async def publish(self, topic: str, message, local: bool = True):
+        self.published += 1
+
+        if self.has_peers:
+            frame = self._encode(topic, message)
+            if self._hub is not None:
+                self._send(self._hub, frame)
+            for peer in list(self._peers):
+                self._send(peer, frame)
+
+        if local:
+            await self._deliver(topic, message)
+
+    @staticmethod
+    def _encode(topic: str, message) -> bytes:
+        body = json.dumps({"t": topic, "m": message}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return _HEADER.pack(len(body)) + body
+
+    def _send(self, writer: asyncio.StreamWriter, frame: bytes):
+        """
+        대기 없이 전송 버퍼에 추가 (읽지 못하는 피어는 연결 종료)
+        """
+        if writer.transport.get_write_buffer_size() > PUBSUB_MAX_PEER_BUFFER:
+            print("⚠️ 메시지 버스 피어 응답 없음 → 연결 종료")
+            self.dropped_peers += 1
+            self._peers.discard(writer)
+            writer.close()
+            return
+        writer.write(frame)
+
+    async def _read_frames(self, reader: asyncio.StreamReader, source: Optional[asyncio.StreamWriter]):
+        """
+        연결이 끊길 때까지 프레임 수신 → 로컬 전달 (허브면 다른 워커에 중계)
+        """
+        while True:
+            header = await reader.readexactly(_HEADER.size)
+            body = await reader.readexactly(_HEADER.unpack(header)[0])
+            self.received += 1
+
+            if self.is_hub:
+                frame = header + body
+                for peer in list(self._peers):
+                    if peer is not source:
+                        self._send(peer, frame)
+
+            data = json.loads(body)
+            await self._deliver(data["t"], data["m"])
+
+    def _try_lock(self) -> bool:
+        """
+        허브 잠금 획득 시도 (프로세스가 죽으면 OS 가 해제)
+        """
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        허브: 워커 1개 연결 처리
+        """
+        self._peers.add(writer)
+        try:
+            await self._read_frames(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _close_hub_server(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for peer in list(self._peers):
+            peer.close()
+        self._peers.clear()
+        self._server = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _run(self, connected: asyncio.Future):
+        """
+        허브 선출 → 허브면 소켓 서버 유지, 아니면 허브에 접속해 수신
+        연결이 끊기면 재선출 후 resync
+        """
+        first = True
+
+        while not self._stopping:
+            try:
+                if self._try_lock():
+                    if os.path.exists(self.path):
+                        os.unlink(self.path)   # 이전 허브가 남긴 소켓 파일
+                    self._server = await asyncio.start_unix_server(self._serve_peer, path=self.path)
+                    print(f"✅ 메시지 버스 허브 시작 ({self.path})")
+                else:
+                    reader, self._hub = await asyncio.open_unix_connection(self.path)
+                    print(f"✅ 메시지 버스 허브 연결 ({self.path})")
+
+                if first:
+                    first = False
+                    connected.set_result(None)
+                else:
+                    self.reconnects += 1
+                    await self._resync()
+
+                if self.is_hub:
+                    await asyncio.Event().wait()   # 종료(cancel) 될 때까지 허브 유지
+                else:
+                    await self._read_frames(reader, None)
+
+            except asyncio.CancelledError:
+                raise
+            except (asyncio.IncompleteReadError, ConnectionError, FileNotFoundError):
+                # 허브 종료 또는 아직 새 허브가 소켓을 열기 전
+                pass
+            except Exception as e:
+                print(f"❌ 메시지 버스 오류: {e}")
+
+            await self._close_hub_server()
+            if self._hub is not None:
+                self._hub.close()
+                self._hub = None
+            await asyncio.sleep(PUBSUB_RECONNECT_DELAY)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "local_socket",
+            "role": "hub" if self.is_hub else "worker",
+            "peers": len(self._peers) if self.is_hub else int(self._hub is not None),
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "dropped_peers": self.dropped_peers,
+        }
+
+
+def create_bus(backend: str = PUBSUB_BACKEND) -> InProcessBus:
+    """
+    설정에 맞는 버스 생성
+    """
+    if backend == "inprocess":
+        return InProcessBus()
+    if backend == "local_socket":
+        return LocalSocketBus()
+    raise ValueError(f"알 수 없는 메시지 버스: {backend}")
+
+
+# 전역 버스 인스턴스
+bus = create_bus()
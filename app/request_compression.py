@@ -0,0 +1,85 @@
+"""
+압축 요청 본문 해제 (ASGI 미들웨어)
+- Content-Encoding: gzip 인 요청 본문을 풀어 라우트에는 일반 JSON 요청처럼 전달
+- 센서 노드가 여러 건을 모아 압축해 보내는 일괄 전송 (/sensor/batch) 용
+- 풀린 크기가 max_size 를 넘으면 413, 압축 형식이 잘못되면 400
+"""
+import zlib
+
+from fastapi.responses import JSONResponse
+
+from app.config import REQUEST_MAX_DECOMPRESSED_BYTES
+
+
+class GzipRequestMiddleware:
+    """
+    gzip 요청 본문 해제 미들웨어
+
+    압축되지 않은 요청은 그대로 통과시키므로 비용이 없다.
+    """
+    def __init__(self, app, max_size: int = REQUEST_MAX_DECOMPRESSED_BYTES):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = [(name, value) for name, value in scope["headers"]]
+        encoding = next((value for name, value in headers if name == b"content-encoding"), None)
+        if encoding is None or encoding.strip().lower() != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        # 압축된 본문 전체 수신 (압축 상태로도 max_size 를 넘으면 거부)
+        chunks = []
+        received = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if received > self.max_size:
+                await self._error(scope, receive, send, 413, "요청 본문이 너무 큽니다")
+                return
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(b"".join(chunks), self.max_size + 1)
+        except zlib.error:
+            await self._error(scope, receive, send, 400, "gzip 본문을 해제할 수 없습니다")
+            return
+        if len(body) > self.max_size:
+            await self._error(scope, receive, send, 413, "압축 해제한 요청 본문이 너무 큽니다")
+            return
+        if not decompressor.eof:
+            await self._error(scope, receive, send, 400, "gzip 본문이 잘렸습니다")
+            return
+
+        # Content-Encoding 제거, Content-Length 를 풀린 크기로
+        headers = [
+            (name, value) for name, value in headers
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode()))
+
+        body_sent = False
+
+        async def receive_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(dict(scope, headers=headers), receive_body, send)
+
+    @staticmethod
+    async def _error(scope, receive, send, status_code: int, message: str):
+        response = JSONResponse(status_code=status_code, content={"status": "error", "message": message})
+        await response(scope, receive, send)
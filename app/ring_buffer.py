@@ -0,0 +1,228 @@
+"""
+최근 센서 데이터 링 버퍼 (컬럼형 NumPy 배열)
+- 저장이 끝난 행(id 포함)을 고정 크기 배열에 순환 기록
+- 최근 N분 이력 조회를 SQL 없이 벡터 연산으로 응답
+- 서버 시작 시 최근 RECENT_BUFFER_MINUTES 분을 DB에서 다시 채움
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import SensorData
+from app.config import RECENT_BUFFER_CAPACITY, RECENT_BUFFER_MINUTES
+
+# 실수형 측정값 컬럼
+FLOAT_COLUMNS = (
+    "moisture",
+    "accel_x", "accel_y", "accel_z",
+    "gyro_x", "gyro_y", "gyro_z",
+    "vibration_raw",
+)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(value: datetime) -> int:
+    """naive KST datetime → 마이크로초 정수"""
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(value: int) -> datetime:
+    """마이크로초 정수 → naive KST datetime"""
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+class RecentReadingsBuffer:
+    """
+    최근 센서 데이터를 보관하는 고정 크기 컬럼형 링 버퍼
+
+    메모리는 생성 시 capacity 만큼 한 번만 할당한다. 가득 차면 가장 오래 기록된
+    행부터 덮어쓰고, 덮어쓴 행의 created_at 을 covered_since 로 올린다.
+    created_at 이 covered_since 보다 늦은 행은 모두 버퍼에 있으므로
+    그보다 늦은 시각부터의 조회만 버퍼에서 응답한다.
+    """
+    def __init__(self, capacity: int = RECENT_BUFFER_CAPACITY, window_minutes: int = RECENT_BUFFER_MINUTES):
+        self.capacity = capacity
+        self.window_minutes = window_minutes
+
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._created_at = np.zeros(capacity, dtype=np.int64)   # 마이크로초
+        self._device = np.zeros(capacity, dtype=np.int32)       # 디바이스 코드
+        self._values = np.zeros((len(FLOAT_COLUMNS), capacity), dtype=np.float64)
+        self._risk = np.zeros(capacity, dtype=np.int8)
+        self._threshold_version = np.zeros(capacity, dtype=np.int32)   # -1: 없음
+
+        self._device_codes: Dict[str, int] = {}
+        self._device_names: List[str] = []
+
+        self._next = 0      # 다음에 기록할 위치
+        self._size = 0      # 유효 행 수
+        self._covered_since: Optional[int] = None   # 이 시각 이후 데이터는 모두 보관 (None: 아직 적재 전)
+        self._pending: Optional[List] = None         # 적재 중 들어온 행 (적재 후 중복 제거해 추가)
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+
+    def _device_code(self, device_id: str) -> int:
+        code = self._device_codes.get(device_id)
+        if code is None:
+            code = len(self._device_names)
+            self._device_codes[device_id] = code
+            self._device_names.append(device_id)
+        return code
+
+    def extend(self, rows: List[SensorData]):
+        """
+        저장 완료된 행 추가 (id 가 할당된 뒤 호출)
+        - SensorData 또는 같은 속성을 가진 객체 (다른 워커에서 받은 SensorDataRead)
+        """
+        if self._pending is not None:
+            self._pending.extend(rows)
+            return
+        if self._covered_since is None or not rows:
+            return
+
+        # 용량보다 많으면 마지막 capacity 건만 남음
+        if len(rows) > self.capacity:
+            dropped = max(_to_micros(row.created_at) for row in rows[:-self.capacity])
+            self._covered_since = max(self._covered_since, dropped)
+            rows = rows[-self.capacity:]
+
+        count = len(rows)
+        positions = (self._next + np.arange(count)) % self.capacity
+
+        # 덮어쓰는 기존 행만큼 보관 구간 시작을 올림
+        # (앞쪽 capacity - size 칸은 빈 칸, 나머지는 기존 행)
+        evicted = positions[self.capacity - self._size:]
+        if len(evicted):
+            self._covered_since = max(self._covered_since, int(self._created_at[evicted].max()))
+
+        self._ids[positions] = [row.id for row in rows]
+        self._created_at[positions] = [_to_micros(row.created_at) for row in rows]
+        self._device[positions] = [self._device_code(row.device_id) for row in rows]
+        for index, name in enumerate(FLOAT_COLUMNS):
+            self._values[index, positions] = [getattr(row, name) for row in rows]
+        self._risk[positions] = [row.risk_level for row in rows]
+        self._threshold_version[positions] = [
+            -1 if row.threshold_version is None else row.threshold_version for row in rows
+        ]
+
+        self._next = int((self._next + count) % self.capacity)
+        self._size = min(self.capacity, self._size + count)
+
+    def covers(self, since: datetime) -> bool:
+        """since 이후 데이터를 모두 보관 중인지 여부"""
+        return self._covered_since is not None and _to_micros(since) > self._covered_since
+
+    def query(
+        self,
+        since: datetime,
+        limit: int,
+        device_id: Optional[str] = None,
+        cursor: Optional[Tuple[datetime, int]] = None
+    ) -> Optional[List[SensorData]]:
+        """
+        since 이후 데이터를 (created_at, id) 내림차순으로 최대 limit 건 조회
+
+        Args:
+            since: 조회 시작 시각 (naive KST)
+            limit: 최대 조회 개수
+            device_id: 디바이스 ID (None 이면 전체 디바이스)
+            cursor: 이전 페이지 마지막 행의 (created_at, id)
+
+        Returns:
+            SensorData 리스트 (세션에 속하지 않은 객체), 버퍼가 구간을 다 담고 있지 않으면 None
+        """
+        if not self.covers(since):
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        size = self._size
+        created_at = self._created_at[:size]
+        ids = self._ids[:size]
+
+        mask = created_at >= _to_micros(since)
+        if device_id is not None:
+            code = self._device_codes.get(device_id)
+            if code is None:
+                return []
+            mask &= self._device[:size] == code
+        if cursor is not None:
+            cursor_time, cursor_id = _to_micros(cursor[0]), cursor[1]
+            mask &= (created_at < cursor_time) | ((created_at == cursor_time) & (ids < cursor_id))
+
+        matched = np.flatnonzero(mask)
+        order = np.lexsort((ids[matched], created_at[matched]))[::-1][:limit]
+        selected = matched[order]
+
+        values = self._values[:, selected]
+        return [
+            SensorData(
+                id=int(self._ids[i]),
+                device_id=self._device_names[self._device[i]],
+                created_at=_from_micros(self._created_at[i]),
+                risk_level=int(self._risk[i]),
+                threshold_version=int(self._threshold_version[i]) if self._threshold_version[i] >= 0 else None,
+                **{name: float(values[index, n]) for index, name in enumerate(FLOAT_COLUMNS)}
+            )
+            for n, i in enumerate(selected)
+        ]
+
+    async def rebuild(self, db: AsyncSession, now: datetime):
+        """
+        서버 시작 시 최근 window_minutes 분 데이터를 DB에서 다시 적재
+
+        Args:
+            db: 데이터베이스 세션
+            now: 현재 시각 (naive KST)
+        """
+        since = now - timedelta(minutes=self.window_minutes)
+        self._pending = []
+        try:
+            result = await db.execute(
+                select(SensorData)
+                .where(SensorData.created_at >= since)
+                .order_by(desc(SensorData.created_at), desc(SensorData.id))
+                .limit(self.capacity)
+            )
+            rows = list(result.scalars().all())
+        finally:
+            pending, self._pending = self._pending, None
+        rows.reverse()
+
+        self._next = 0
+        self._size = 0
+        # 용량이 모자라 잘렸으면 가장 오래된 적재 시각과 같은 행이 빠졌을 수 있음
+        if len(rows) == self.capacity:
+            self._covered_since = _to_micros(rows[0].created_at)
+        else:
+            self._covered_since = _to_micros(since) - 1
+        self.extend(rows)
+
+        # 조회하는 동안 저장된 행 중 조회 결과에 없는 것만 추가
+        loaded = {row.id for row in rows}
+        self.extend([row for row in pending if row.id not in loaded])
+
+        print(f"✅ 최근 데이터 링 버퍼 적재 완료 ({len(rows)}건, 최근 {self.window_minutes}분)")
+
+    def stats(self) -> dict:
+        """
+        버퍼 상태 (헬스체크/모니터링용)
+        """
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "covered_since": _from_micros(self._covered_since).isoformat() if self._covered_since is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 전역 RecentReadingsBuffer 인스턴스
+recent_buffer = RecentReadingsBuffer()
@@ -0,0 +1,201 @@
+"""
+분/시간 단위 롤업 (증분 집계)
+- 센서 데이터 저장 트랜잭션 안에서 배치별로 집계해 롤업 테이블에 upsert
+- 장기 구간 이력은 원본 대신 롤업을 읽어 수천 행 이내로 응답
+"""
+import math
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import SensorRollupMinute, SensorRollupHour
+from app.thresholds import threshold_store
+from app.config import (
+    HISTORY_RAW_MAX_MINUTES,
+    HISTORY_MINUTE_MAX_MINUTES
+)
+
+# 해상도 이름 → 롤업 모델
+ROLLUP_MODELS = {
+    "minute": SensorRollupMinute,
+    "hour": SensorRollupHour,
+}
+
+HISTORY_RESOLUTIONS = ("raw", "minute", "hour")
+
+
+def _truncate(created_at: datetime, resolution: str) -> datetime:
+    """버킷 시작 시각으로 내림"""
+    if resolution == "minute":
+        return created_at.replace(second=0, microsecond=0)
+    return created_at.replace(minute=0, second=0, microsecond=0)
+
+
+def aggregate_rollups(rows: Iterable, resolution: str) -> List[dict]:
+    """
+    센서 데이터 배치를 (device_id, 버킷) 단위로 집계
+
+    Args:
+        rows: device_id, created_at, moisture, accel_x, accel_y, vibration_raw, risk_level,
+              threshold_version 속성을 가진 객체
+        resolution: "minute" 또는 "hour"
+
+    Returns:
+        롤업 테이블 행 딕셔너리 목록
+    """
+    groups = {}
+    # 진동 판정은 행의 risk_level 을 계산한 임계값 버전으로 (임계값이 버킷 중간에 바뀌어도 원본과 일치)
+    vibration_thresholds = {}
+
+    for row in rows:
+        key = (row.device_id, _truncate(row.created_at, resolution))
+        tilt = math.sqrt(row.accel_x * row.accel_x + row.accel_y * row.accel_y)
+        version = row.threshold_version
+        vibration_threshold = vibration_thresholds.get(version)
+        if vibration_threshold is None:
+            vibration_threshold = vibration_thresholds[version] = threshold_store.get(version).VIBRATION_THRESHOLD
+        vibration = 1 if row.vibration_raw >= vibration_threshold else 0
+
+        group = groups.get(key)
+        if group is None:
+            groups[key] = {
+                "device_id": key[0],
+                "bucket": key[1],
+                "sample_count": 1,
+                "moisture_min": row.moisture,
+                "moisture_max": row.moisture,
+                "moisture_sum": row.moisture,
+                "tilt_min": tilt,
+                "tilt_max": tilt,
+                "tilt_sum": tilt,
+                "vibration_count": vibration,
+                "risk_level_max": row.risk_level,
+            }
+            continue
+
+        group["sample_count"] += 1
+        group["moisture_min"] = min(group["moisture_min"], row.moisture)
+        group["moisture_max"] = max(group["moisture_max"], row.moisture)
+        group["moisture_sum"] += row.moisture
+        group["tilt_min"] = min(group["tilt_min"], tilt)
+        group["tilt_max"] = max(group["tilt_max"], tilt)
+        group["tilt_sum"] += tilt
+        group["vibration_count"] += vibration
+        group["risk_level_max"] = max(group["risk_level_max"], row.risk_level)
+
+    return list(groups.values())
+
+
+def _upsert_statement(model, dialect: str):
+    """
+    롤업 upsert 문 생성 (기존 버킷이 있으면 합산/최소/최대로 병합)
+    """
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(model)
+        new = stmt.inserted
+        least, greatest = func.least, func.greatest
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(model)
+        new = stmt.excluded
+        # SQLite 는 인자가 2개 이상이면 min/max 가 스칼라 함수로 동작
+        least, greatest = func.min, func.max
+    else:
+        raise NotImplementedError(f"롤업 upsert 미지원 DB: {dialect}")
+
+    merged = {
+        "sample_count": model.sample_count + new.sample_count,
+        "moisture_min": least(model.moisture_min, new.moisture_min),
+        "moisture_max": greatest(model.moisture_max, new.moisture_max),
+        "moisture_sum": model.moisture_sum + new.moisture_sum,
+        "tilt_min": least(model.tilt_min, new.tilt_min),
+        "tilt_max": greatest(model.tilt_max, new.tilt_max),
+        "tilt_sum": model.tilt_sum + new.tilt_sum,
+        "vibration_count": model.vibration_count + new.vibration_count,
+        "risk_level_max": greatest(model.risk_level_max, new.risk_level_max),
+    }
+
+    if dialect == "sqlite":
+        return stmt.on_conflict_do_update(index_elements=["device_id", "bucket"], set_=merged)
+    return stmt.on_duplicate_key_update(**merged)
+
+
+async def update_rollups(db: AsyncSession, rows: List) -> None:
+    """
+    저장 중인 센서 데이터 배치를 분/시간 롤업에 반영 (호출 측 트랜잭션 안에서 실행)
+    """
+    if not rows:
+        return
+
+    dialect = db.bind.dialect.name
+
+    for resolution, model in ROLLUP_MODELS.items():
+        values = aggregate_rollups(rows, resolution)
+        await db.execute(_upsert_statement(model, dialect), values)
+
+
+def choose_history_resolution(span_minutes: Optional[float]) -> str:
+    """
+    조회 구간 길이에 맞는 가장 저렴한 해상도 선택
+
+    Args:
+        span_minutes: 조회 구간 길이 (분), None 이면 구간 없음 (최근 N건)
+
+    Returns:
+        "raw", "minute", "hour" 중 하나
+    """
+    if span_minutes is None or span_minutes <= HISTORY_RAW_MAX_MINUTES:
+        return "raw"
+    if span_minutes <= HISTORY_MINUTE_MAX_MINUTES:
+        return "minute"
+    return "hour"
+
+
+async def get_sensor_rollups(
+    db: AsyncSession,
+    resolution: str,
+    start: datetime,
+    end: datetime,
+    device_id: Optional[str] = None
+) -> List[dict]:
+    """
+    롤업 이력 조회
+
+    Args:
+        db: 데이터베이스 세션
+        resolution: "minute" 또는 "hour"
+        start: 시작 시각
+        end: 종료 시각
+        device_id: 디바이스 ID (None 이면 전체 디바이스)
+
+    Returns:
+        롤업 딕셔너리 리스트 (최신순, 평균 포함)
+    """
+    model = ROLLUP_MODELS[resolution]
+    query = select(model).where(model.bucket.between(_truncate(start, resolution), end))
+
+    if device_id is not None:
+        query = query.where(model.device_id == device_id)
+
+    result = await db.execute(query.order_by(desc(model.bucket), model.device_id))
+
+    return [
+        {
+            "device_id": row.device_id,
+            "bucket": row.bucket,
+            "resolution": resolution,
+            "sample_count": row.sample_count,
+            "moisture_min": row.moisture_min,
+            "moisture_max": row.moisture_max,
+            "moisture_mean": row.moisture_sum / row.sample_count,
+            "tilt_min": row.tilt_min,
+            "tilt_max": row.tilt_max,
+            "tilt_mean": row.tilt_sum / row.sample_count,
+            "vibration_count": row.vibration_count,
+            "risk_level_max": row.risk_level_max,
+        }
+        for row in result.scalars()
+    ]
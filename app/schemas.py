@@ -3,7 +3,10 @@ Pydantic 스키마 정의
 """
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from types import SimpleNamespace
+from typing import Optional, List
+
+from app.config import RiskThresholds, DEFAULT_DEVICE_ID
 
 
 class AccelData(BaseModel):
@@ -22,6 +25,7 @@ class GyroData(BaseModel):
 
 class SensorDataCreate(BaseModel):
     """센서 데이터 생성 요청"""
+    device_id: str = Field(DEFAULT_DEVICE_ID, min_length=1, max_length=64, description="센서 노드 식별자")
     moisture: float = Field(..., description="토양 수분값")
     accel: AccelData = Field(..., description="3축 가속도")
     gyro: GyroData = Field(..., description="3축 자이로")
@@ -30,8 +34,9 @@ class SensorDataCreate(BaseModel):
 
 
 class SensorDataRead(BaseModel):
-    """센서 데이터 응답"""
-    id: int
+    """센서 데이터 응답 (수집 직후 브로드캐스트되는 데이터는 아직 DB id가 없음)"""
+    id: Optional[int] = None
+    device_id: str = DEFAULT_DEVICE_ID
     moisture: float
     accel_x: float
     accel_y: float
@@ -41,12 +46,29 @@ class SensorDataRead(BaseModel):
     gyro_z: float
     vibration_raw: float
     risk_level: int
+    threshold_version: Optional[int] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class SensorRollupRead(BaseModel):
+    """분/시간 단위 롤업 응답"""
+    device_id: str
+    bucket: datetime = Field(..., description="버킷 시작 시각")
+    resolution: str = Field(..., description="minute 또는 hour")
+    sample_count: int
+    moisture_min: float
+    moisture_max: float
+    moisture_mean: float
+    tilt_min: float
+    tilt_max: float
+    tilt_mean: float
+    vibration_count: int
+    risk_level_max: int
+
+
 class ThresholdRead(BaseModel):
     """임계값 조회 응답"""
     id: int
@@ -61,3 +83,54 @@ class ThresholdUpdate(BaseModel):
     """임계값 업데이트 요청"""
     name: str = Field(..., description="임계값 이름")
     value: float = Field(..., description="임계값")
+
+
+class RiskThresholdSet(BaseModel):
+    """위험도 임계값 세트 (생략한 항목은 app/config.py 의 RiskThresholds 값 사용)"""
+    tilt_normal: float = Field(RiskThresholds.TILT_NORMAL, description="기울기 정상 기준")
+    tilt_danger: float = Field(RiskThresholds.TILT_DANGER, description="기울기 위험 기준")
+    moisture_normal: float = Field(RiskThresholds.MOISTURE_NORMAL, description="수분 정상 기준")
+    moisture_warning: float = Field(RiskThresholds.MOISTURE_WARNING, description="수분 주의 기준")
+    vibration_threshold: float = Field(RiskThresholds.VIBRATION_THRESHOLD, description="진동 감지 기준")
+    weight_tilt: float = Field(RiskThresholds.WEIGHT_TILT, description="기울기 가중치")
+    weight_moisture: float = Field(RiskThresholds.WEIGHT_MOISTURE, description="수분 가중치")
+    weight_vibration: float = Field(RiskThresholds.WEIGHT_VIBRATION, description="진동 가중치")
+    risk_normal_max: float = Field(RiskThresholds.RISK_NORMAL_MAX, description="정상 판정 최대 점수")
+    risk_warning_max: float = Field(RiskThresholds.RISK_WARNING_MAX, description="주의 판정 최대 점수")
+    
+    def as_thresholds(self) -> SimpleNamespace:
+        """위험도 계산 함수가 사용하는 RiskThresholds 형태(대문자 속성)로 변환"""
+        return SimpleNamespace(**{name.upper(): value for name, value in self.model_dump().items()})
+
+
+class RiskThresholdSnapshotRead(RiskThresholdSet):
+    """현재 위험도 계산에 적용 중인 임계값 세트"""
+    version: int = Field(..., description="임계값 버전 (threshold_revisions.id, 0: 기본값)")
+
+
+class ThresholdSimulationRequest(BaseModel):
+    """임계값 what-if 시뮬레이션 요청"""
+    thresholds: RiskThresholdSet = Field(default_factory=RiskThresholdSet, description="제안 임계값")
+    start: datetime = Field(..., description="시작 시각")
+    end: datetime = Field(..., description="종료 시각")
+    max_events: int = Field(100, ge=0, le=10000, description="반환할 최대 전이 이벤트 수")
+    device_id: Optional[str] = Field(None, description="디바이스 ID (생략 시 전체 디바이스)")
+
+
+class RiskTransition(BaseModel):
+    """위험도 전이 이벤트"""
+    device_id: str
+    created_at: datetime
+    from_level: int
+    to_level: int
+
+
+class ThresholdSimulationResult(BaseModel):
+    """임계값 what-if 시뮬레이션 결과"""
+    total: int = Field(..., description="대상 데이터 건수")
+    level_counts: List[int] = Field(..., description="제안 임계값 기준 [정상, 주의, 위험] 건수")
+    stored_level_counts: List[int] = Field(..., description="저장된 위험도 기준 [정상, 주의, 위험] 건수")
+    changed: int = Field(..., description="저장된 위험도와 판정이 달라진 건수")
+    transitions: int = Field(..., description="시간순으로 위험도가 바뀐 횟수")
+    transition_matrix: List[List[int]] = Field(..., description="[이전 위험도][다음 위험도] 건수")
+    events: List[RiskTransition] = Field(..., description="전이 이벤트 (오래된 순, 최대 max_events)")
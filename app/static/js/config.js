@@ -14,6 +14,22 @@ const thresholdNames = {
     'gyro_delta_danger': '자이로 변화량 - 위험'
 };
 
+// 위험도 계산 임계값 한글 이름 매핑 (실제 계산에 사용, 시뮬레이션 입력)
+const riskThresholdNames = {
+    'tilt_normal': '기울기 - 정상 기준',
+    'tilt_danger': '기울기 - 위험 기준',
+    'moisture_normal': '토양 수분 - 정상 기준',
+    'moisture_warning': '토양 수분 - 주의 기준',
+    'vibration_threshold': '진동 - 감지 기준',
+    'weight_tilt': '가중치 - 기울기',
+    'weight_moisture': '가중치 - 토양 수분',
+    'weight_vibration': '가중치 - 진동',
+    'risk_normal_max': '최종 점수 - 정상 최대',
+    'risk_warning_max': '최종 점수 - 주의 최대'
+};
+
+const riskLevelNames = ['정상', '주의', '위험'];
+
 // 임계값 로드
 async function loadThresholds() {
     const loading = document.getElementById('loading');
@@ -27,9 +43,13 @@ async function loadThresholds() {
         
         loading.style.display = 'none';
         
-        // 임계값 목록 생성
+        // 임계값 목록 생성 (위험도 계산 임계값 먼저, 레거시 항목은 뒤에)
+        const isRisk = item => item.name in riskThresholdNames;
+        data.sort((a, b) => isRisk(b) - isRisk(a));
+        
         thresholdList.innerHTML = data.map(item => {
-            const displayName = thresholdNames[item.name] || item.name;
+            const displayName = riskThresholdNames[item.name]
+                || (thresholdNames[item.name] ? `${thresholdNames[item.name]} (미사용)` : item.name);
             
             return `
                 <div class="threshold-item">
@@ -81,7 +101,10 @@ async function updateThreshold(id, name) {
         });
         
         if (response.ok) {
-            showToast('✅ 임계값이 업데이트되었습니다', 'success');
+            showToast('✅ 임계값이 업데이트되었습니다 (즉시 적용)', 'success');
+            if (name in riskThresholdNames) {
+                loadSimulationForm();
+            }
         } else {
             showToast('❌ 업데이트 실패', 'error');
         }
@@ -92,6 +115,106 @@ async function updateThreshold(id, name) {
     }
 }
 
+// datetime-local 입력용 문자열 (로컬 시간)
+function toLocalInputValue(date) {
+    const offset = date.getTimezoneOffset() * 60000;
+    return new Date(date.getTime() - offset).toISOString().slice(0, 16);
+}
+
+// 시뮬레이션 입력 폼 생성 (현재 적용 중인 임계값으로 채움)
+async function loadSimulationForm() {
+    const fields = document.getElementById('simulationFields');
+    
+    const now = new Date();
+    document.getElementById('simEnd').value = toLocalInputValue(now);
+    document.getElementById('simStart').value = toLocalInputValue(new Date(now.getTime() - 7 * 24 * 3600 * 1000));
+    
+    try {
+        const response = await fetch('/config/api/risk-thresholds');
+        const { version, ...values } = await response.json();
+        
+        document.getElementById('simulationVersion').textContent = `현재 적용 버전: ${version}`;
+        fields.innerHTML = Object.entries(values).map(([name, value]) => `
+            <div class="threshold-item">
+                <label>${riskThresholdNames[name] || name}</label>
+                <input type="number" step="0.01" value="${value}" data-sim-name="${name}">
+            </div>
+        `).join('');
+        
+    } catch (error) {
+        console.error('시뮬레이션 임계값 로드 실패:', error);
+        fields.innerHTML = '<p style="text-align: center; color: #dc3545;">데이터 로드 실패</p>';
+    }
+}
+
+// 시뮬레이션 실행
+async function runSimulation() {
+    const resultEl = document.getElementById('simulationResult');
+    
+    const thresholds = {};
+    document.querySelectorAll('[data-sim-name]').forEach(input => {
+        thresholds[input.dataset.simName] = parseFloat(input.value);
+    });
+    
+    resultEl.innerHTML = '<p style="text-align: center;">계산 중...</p>';
+    
+    try {
+        const response = await fetch('/config/api/thresholds/simulate', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                thresholds: thresholds,
+                start: document.getElementById('simStart').value,
+                end: document.getElementById('simEnd').value,
+                max_events: 20
+            })
+        });
+        
+        if (!response.ok) {
+            showToast('❌ 시뮬레이션 실패', 'error');
+            resultEl.innerHTML = '';
+            return;
+        }
+        
+        const data = await response.json();
+        
+        const countRows = riskLevelNames.map((name, level) => `
+            <tr>
+                <td>${name}</td>
+                <td>${data.stored_level_counts[level]}</td>
+                <td>${data.level_counts[level]}</td>
+            </tr>
+        `).join('');
+        
+        const eventRows = data.events.map(event => `
+            <tr>
+                <td>${new Date(event.created_at).toLocaleString('ko-KR')}</td>
+                <td>${riskLevelNames[event.from_level]} → ${riskLevelNames[event.to_level]}</td>
+            </tr>
+        `).join('');
+        
+        resultEl.innerHTML = `
+            <p>총 ${data.total}건 중 ${data.changed}건의 판정이 바뀌고, 위험도 전이는 ${data.transitions}회 발생합니다.</p>
+            <table>
+                <thead><tr><th>위험도</th><th>현재 저장값</th><th>제안 임계값</th></tr></thead>
+                <tbody>${countRows}</tbody>
+            </table>
+            ${eventRows ? `
+            <table style="margin-top: 15px;">
+                <thead><tr><th>시각</th><th>전이</th></tr></thead>
+                <tbody>${eventRows}</tbody>
+            </table>` : ''}
+        `;
+        
+    } catch (error) {
+        console.error('시뮬레이션 실패:', error);
+        showToast('❌ 시뮬레이션 실패', 'error');
+        resultEl.innerHTML = '';
+    }
+}
+
 // 토스트 알림 표시
 function showToast(message, type = 'success') {
     const toast = document.createElement('div');
@@ -116,4 +239,5 @@ function showToast(message, type = 'success') {
 // 페이지 로드 시 임계값 로드
 document.addEventListener('DOMContentLoaded', () => {
     loadThresholds();
+    loadSimulationForm();
 });
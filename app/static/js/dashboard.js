@@ -13,25 +13,120 @@ let currentMinutes = 0;
 // 최대 데이터 포인트 수 (최근 50개)
 const MAX_DATA_POINTS = 50;
 
-// 위험도 임계값 (config.py와 동일)
-const RISK_THRESHOLDS = {
-    TILT_NORMAL: 6.0,
-    TILT_DANGER: 8.0,
-    MOISTURE_NORMAL: 800,
-    MOISTURE_WARNING: 750,
-    WEIGHT_TILT: 0.5,
-    WEIGHT_MOISTURE: 0.3,
-    WEIGHT_VIBRATION: 0.2,
-    RISK_NORMAL_MAX: 0.3,
-    RISK_WARNING_MAX: 0.6
+// 위험도 점수 그래프용 임계값 (서버 /config/api/risk-thresholds 에서 적재, 적재 전에는 config.py 기본값)
+// 위험도 배지는 서버가 계산한 risk_level 을 그대로 표시
+let riskThresholds = {
+    version: 0,
+    tilt_normal: 6.0,
+    tilt_danger: 8.0,
+    moisture_normal: 800,
+    moisture_warning: 750,
+    vibration_threshold: 1.0,
+    weight_tilt: 0.5,
+    weight_moisture: 0.3,
+    weight_vibration: 0.2,
+    risk_normal_max: 0.3,
+    risk_warning_max: 0.6
 };
 
+// 임계값 변경 (무중단 교체) 반영 주기 (밀리초)
+const RISK_THRESHOLDS_REFRESH_MS = 30000;
+
+// WebSocket 전송 형식 (바이너리 delta 프레임, 초당 최대 프레임 수)
+// 그 사이 수신된 데이터는 한 프레임으로 합쳐 오므로 차트에서 빠지는 점은 없음
+const WS_ENCODING = 'binary';
+const WS_MAX_FPS = 5;
+
+// 바이너리 프레임 형식 (app/ws_encoding.py 와 동일)
+const BINARY_VERSION = 2;
+const BINARY_FLOAT_FIELDS = [
+    'moisture',
+    'accel_x', 'accel_y', 'accel_z',
+    'gyro_x', 'gyro_y', 'gyro_z',
+    'vibration_raw'
+];
+const BIT_RISK_LEVEL = 1 << 8;
+const BIT_ID = 1 << 9;
+const BIT_CREATED_AT = 1 << 10;
+const BIT_CREATED_AT_DELTA = 1 << 11;
+
+// 디바이스별 직전 값 (생략된 필드 복원용, 연결마다 초기화)
+const deviceState = new Map();
+const textDecoder = new TextDecoder();
+
+// 바이너리 delta 프레임 → 센서 데이터 배열
+function decodeBinaryFrame(buffer) {
+    const view = new DataView(buffer);
+    let offset = 0;
+    
+    const version = view.getUint8(offset);
+    offset += 1;
+    if (version !== BINARY_VERSION) {
+        throw new Error(`지원하지 않는 프레임 버전: ${version}`);
+    }
+    
+    const count = view.getUint32(offset, true);
+    offset += 4;
+    const readings = [];
+    
+    for (let n = 0; n < count; n++) {
+        const length = view.getUint16(offset, true);
+        offset += 2;
+        const deviceId = textDecoder.decode(new Uint8Array(buffer, offset, length));
+        offset += length;
+        const mask = view.getUint16(offset, true);
+        offset += 2;
+        
+        const previous = deviceState.get(deviceId) || {};
+        const reading = { device_id: deviceId, id: null };
+        
+        BINARY_FLOAT_FIELDS.forEach((name, bit) => {
+            if (mask & (1 << bit)) {
+                reading[name] = view.getFloat64(offset, true);
+                offset += 8;
+            } else {
+                reading[name] = previous[name];
+            }
+        });
+        
+        if (mask & BIT_RISK_LEVEL) {
+            reading.risk_level = view.getUint8(offset);
+            offset += 1;
+        } else {
+            reading.risk_level = previous.risk_level;
+        }
+        
+        if (mask & BIT_ID) {
+            reading.id = view.getFloat64(offset, true);
+            offset += 8;
+        }
+        
+        // 시각은 µs 정수로 누적 (KST 벽시계 기준)
+        let createdUs = previous.createdUs;
+        if (mask & BIT_CREATED_AT) {
+            createdUs = Math.round(view.getFloat64(offset, true) * 1000);
+            offset += 8;
+        } else if (mask & BIT_CREATED_AT_DELTA) {
+            createdUs += view.getInt32(offset, true);
+            offset += 4;
+        }
+        reading.created_at = new Date(createdUs / 1000).toISOString().slice(0, 23);
+        
+        deviceState.set(deviceId, { ...reading, createdUs });
+        readings.push(reading);
+    }
+    
+    return readings;
+}
+
 // WebSocket 연결
 function connectWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.host}/ws`;
+    const wsUrl = `${protocol}//${window.location.host}/ws?encoding=${WS_ENCODING}&max_fps=${WS_MAX_FPS}`;
     
     ws = new WebSocket(wsUrl);
+    ws.binaryType = 'arraybuffer';
+    deviceState.clear();
     
     ws.onopen = () => {
         console.log('WebSocket 연결됨');
@@ -39,8 +134,16 @@ function connectWebSocket() {
     };
     
     ws.onmessage = (event) => {
-        const data = JSON.parse(event.data);
-        updateDashboard(data);
+        // 바이너리 프레임은 항상 배열, JSON 은 1건(객체) 또는 여러 건(배열)
+        const data = event.data instanceof ArrayBuffer
+            ? decodeBinaryFrame(event.data)
+            : JSON.parse(event.data);
+        
+        if (Array.isArray(data)) {
+            data.forEach(updateDashboard);
+        } else {
+            updateDashboard(data);
+        }
     };
     
     ws.onerror = (error) => {
@@ -69,17 +172,30 @@ function updateConnectionStatus(connected) {
     }
 }
 
-// 최종 위험도 점수 계산 (프론트엔드에서 재계산)
+// 서버에서 현재 적용 중인 위험도 임계값 적재
+async function loadRiskThresholds() {
+    try {
+        const response = await fetch('/config/api/risk-thresholds');
+        if (response.ok) {
+            riskThresholds = await response.json();
+        }
+    } catch (error) {
+        console.error('위험도 임계값 로드 실패:', error);
+    }
+}
+
+// 위험도 점수 계산 (그래프 표시용, 서버 crud.calculate_risk_score 와 같은 식)
 function calculateRiskScore(moisture, accel_x, accel_y, vibration_raw) {
+    const t = riskThresholds;
+    
     // 1. 기울기 점수
     const tiltMagnitude = Math.sqrt(accel_x * accel_x + accel_y * accel_y);
     let tiltScore = 0.0;
     
-    if (tiltMagnitude < RISK_THRESHOLDS.TILT_NORMAL) {
+    if (tiltMagnitude < t.tilt_normal) {
         tiltScore = 0.0;
-    } else if (tiltMagnitude < RISK_THRESHOLDS.TILT_DANGER) {
-        tiltScore = (tiltMagnitude - RISK_THRESHOLDS.TILT_NORMAL) / 
-                    (RISK_THRESHOLDS.TILT_DANGER - RISK_THRESHOLDS.TILT_NORMAL);
+    } else if (tiltMagnitude < t.tilt_danger) {
+        tiltScore = (tiltMagnitude - t.tilt_normal) / (t.tilt_danger - t.tilt_normal);
     } else {
         tiltScore = 1.0;
     }
@@ -87,37 +203,23 @@ function calculateRiskScore(moisture, accel_x, accel_y, vibration_raw) {
     // 2. 수분 점수 (역방향)
     let moistureScore = 0.0;
     
-    if (moisture > RISK_THRESHOLDS.MOISTURE_NORMAL) {
+    if (moisture > t.moisture_normal) {
         moistureScore = 0.0;
-    } else if (moisture > RISK_THRESHOLDS.MOISTURE_WARNING) {
-        moistureScore = (RISK_THRESHOLDS.MOISTURE_NORMAL - moisture) / 
-                       (RISK_THRESHOLDS.MOISTURE_NORMAL - RISK_THRESHOLDS.MOISTURE_WARNING);
+    } else if (moisture > t.moisture_warning) {
+        moistureScore = (t.moisture_normal - moisture) / (t.moisture_normal - t.moisture_warning);
     } else {
         moistureScore = 1.0;
     }
     
     // 3. 진동 점수
-    const vibrationScore = vibration_raw >= 1.0 ? 1.0 : 0.0;
+    const vibrationScore = vibration_raw >= t.vibration_threshold ? 1.0 : 0.0;
     
     // 4. 최종 점수
-    const finalScore = (
-        RISK_THRESHOLDS.WEIGHT_TILT * tiltScore +
-        RISK_THRESHOLDS.WEIGHT_MOISTURE * moistureScore +
-        RISK_THRESHOLDS.WEIGHT_VIBRATION * vibrationScore
+    return (
+        t.weight_tilt * tiltScore +
+        t.weight_moisture * moistureScore +
+        t.weight_vibration * vibrationScore
     );
-    
-    return finalScore;
-}
-
-// 점수로 위험도 레벨 판정
-function getRiskLevelFromScore(score) {
-    if (score < RISK_THRESHOLDS.RISK_NORMAL_MAX) {
-        return 0; // 정상
-    } else if (score < RISK_THRESHOLDS.RISK_WARNING_MAX) {
-        return 1; // 주의
-    } else {
-        return 2; // 위험
-    }
 }
 
 // 대시보드 업데이트
@@ -142,7 +244,7 @@ function updateDashboard(data) {
         data.accel_y * data.accel_y
     );
     
-    // 최종 위험도 점수 계산
+    // 위험도 점수 (그래프용, 서버의 현재 임계값으로 계산)
     const riskScore = calculateRiskScore(
         data.moisture,
         data.accel_x,
@@ -150,11 +252,8 @@ function updateDashboard(data) {
         data.vibration_raw
     );
     
-    // 점수로 위험도 레벨 판정 (프론트엔드에서!)
-    const riskLevel = getRiskLevelFromScore(riskScore);
-    
-    // 위험도 배지 업데이트 (프론트 계산값 사용!)
-    updateStatusBadge(riskLevel);
+    // 위험도 배지는 서버가 판정한 값 (임계값 변경이 바로 반영됨)
+    updateStatusBadge(data.risk_level);
     
     // 그래프 업데이트
     addDataToChart(moistureChart, timestamp, data.moisture);
@@ -397,6 +496,7 @@ async function loadLatestData() {
 // 초기화
 document.addEventListener('DOMContentLoaded', () => {
     initCharts();
-    loadLatestData();
+    loadRiskThresholds().then(loadLatestData);
     connectWebSocket();
+    setInterval(loadRiskThresholds, RISK_THRESHOLDS_REFRESH_MS);
 });
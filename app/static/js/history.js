@@ -3,6 +3,112 @@
  */
 
 let currentMinutes = null;
+let nextCursor = null;     // 다음 페이지 커서 (X-Next-Cursor)
+let loadedCount = 0;       // 지금까지 표시한 원본 데이터 수
+
+// 테이블 헤더 (원본 / 롤업)
+const RAW_HEADERS = ['시각', '디바이스', '토양 수분', '진동', '가속도 X', '가속도 Y', '가속도 Z', '자이로 X', '자이로 Y', '자이로 Z', '위험도'];
+const ROLLUP_HEADERS = ['구간 시작', '디바이스', '샘플 수', '수분 평균', '수분 최소~최대', '기울기 평균', '기울기 최대', '진동 감지', '최대 위험도'];
+
+// 테이블 헤더 교체
+function setTableHeaders(headers) {
+    document.getElementById('historyHead').innerHTML =
+        `<tr>${headers.map(name => `<th>${name}</th>`).join('')}</tr>`;
+}
+
+// 원본 데이터 행 생성
+function renderRawRows(data) {
+    return data.map(item => {
+        const timestamp = new Date(item.created_at);
+        const riskBadge = getRiskBadgeHTML(item.risk_level);
+        
+        return `
+            <tr>
+                <td>${timestamp.toLocaleString('ko-KR')}</td>
+                <td>${item.device_id}</td>
+                <td>${item.moisture.toFixed(1)}</td>
+                <td>${item.vibration_raw.toFixed(2)}</td>
+                <td>${item.accel_x.toFixed(3)}</td>
+                <td>${item.accel_y.toFixed(3)}</td>
+                <td>${item.accel_z.toFixed(3)}</td>
+                <td>${item.gyro_x.toFixed(3)}</td>
+                <td>${item.gyro_y.toFixed(3)}</td>
+                <td>${item.gyro_z.toFixed(3)}</td>
+                <td>${riskBadge}</td>
+            </tr>
+        `;
+    }).join('');
+}
+
+// 분/시간 롤업 행 생성
+function renderRollupRows(data) {
+    return data.map(item => {
+        const bucket = new Date(item.bucket);
+        const riskBadge = getRiskBadgeHTML(item.risk_level_max);
+        
+        return `
+            <tr>
+                <td>${bucket.toLocaleString('ko-KR')}</td>
+                <td>${item.device_id}</td>
+                <td>${item.sample_count}</td>
+                <td>${item.moisture_mean.toFixed(1)}</td>
+                <td>${item.moisture_min.toFixed(1)} ~ ${item.moisture_max.toFixed(1)}</td>
+                <td>${item.tilt_mean.toFixed(3)}</td>
+                <td>${item.tilt_max.toFixed(3)}</td>
+                <td>${item.vibration_count}</td>
+                <td>${riskBadge}</td>
+            </tr>
+        `;
+    }).join('');
+}
+
+// 선택된 디바이스 (빈 문자열이면 전체)
+function selectedDevice() {
+    return document.getElementById('deviceSelect').value;
+}
+
+// 디바이스 선택에 따른 API 경로
+function historyBaseUrl() {
+    const device = selectedDevice();
+    return device ? `/api/devices/${encodeURIComponent(device)}/history` : '/api/history';
+}
+
+// 디바이스 목록 로드
+async function loadDevices() {
+    const select = document.getElementById('deviceSelect');
+    
+    try {
+        const response = await fetch('/api/devices');
+        const devices = await response.json();
+        
+        devices.forEach(device => {
+            const option = document.createElement('option');
+            option.value = device;
+            option.textContent = device;
+            select.appendChild(option);
+        });
+    } catch (error) {
+        console.error('디바이스 목록 로드 실패:', error);
+    }
+}
+
+// 조회 URL 생성 (커서가 있으면 다음 페이지)
+function historyUrl(minutes, cursor = null) {
+    const params = new URLSearchParams();
+    if (minutes) {
+        params.set('minutes', minutes);
+    }
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+    const query = params.toString();
+    return query ? `${historyBaseUrl()}?${query}` : historyBaseUrl();
+}
+
+// 더 보기 버튼 표시 갱신
+function updateLoadMore() {
+    document.getElementById('loadMore').style.display = nextCursor ? 'block' : 'none';
+}
 
 // 이력 데이터 로드
 async function loadHistory(minutes = null) {
@@ -12,55 +118,75 @@ async function loadHistory(minutes = null) {
     
     // 로딩 표시
     loading.style.display = 'block';
-    historyBody.innerHTML = '<tr><td colspan="10" style="text-align: center;">로딩 중...</td></tr>';
+    historyBody.innerHTML = '<tr><td colspan="11" style="text-align: center;">로딩 중...</td></tr>';
     
     currentMinutes = minutes;
+    nextCursor = null;
+    loadedCount = 0;
+    updateLoadMore();
     
     try {
-        let url = '/api/history';
-        if (minutes) {
-            url += `?minutes=${minutes}`;
-        }
-        
-        const response = await fetch(url);
+        const response = await fetch(historyUrl(minutes));
         const data = await response.json();
         
+        // 서버가 구간 길이에 따라 선택한 해상도 (raw / minute / hour)
+        const resolution = response.headers.get('X-History-Resolution') || 'raw';
+        
         loading.style.display = 'none';
+        setTableHeaders(resolution === 'raw' ? RAW_HEADERS : ROLLUP_HEADERS);
         
         if (data.length === 0) {
-            historyBody.innerHTML = '<tr><td colspan="10" style="text-align: center; padding: 40px; color: #6c757d;">데이터가 없습니다</td></tr>';
+            historyBody.innerHTML = '<tr><td colspan="11" style="text-align: center; padding: 40px; color: #6c757d;">데이터가 없습니다</td></tr>';
             dataCount.textContent = '';
             return;
         }
         
         // 테이블 생성
-        historyBody.innerHTML = data.map(item => {
-            const timestamp = new Date(item.created_at);
-            const riskBadge = getRiskBadgeHTML(item.risk_level);
-            
-            return `
-                <tr>
-                    <td>${timestamp.toLocaleString('ko-KR')}</td>
-                    <td>${item.moisture.toFixed(1)}</td>
-                    <td>${item.vibration_raw.toFixed(2)}</td>
-                    <td>${item.accel_x.toFixed(3)}</td>
-                    <td>${item.accel_y.toFixed(3)}</td>
-                    <td>${item.accel_z.toFixed(3)}</td>
-                    <td>${item.gyro_x.toFixed(3)}</td>
-                    <td>${item.gyro_y.toFixed(3)}</td>
-                    <td>${item.gyro_z.toFixed(3)}</td>
-                    <td>${riskBadge}</td>
-                </tr>
-            `;
-        }).join('');
-        
-        // 데이터 개수 표시
-        dataCount.textContent = `총 ${data.length}개 데이터`;
+        if (resolution === 'raw') {
+            historyBody.innerHTML = renderRawRows(data);
+            loadedCount = data.length;
+            nextCursor = response.headers.get('X-Next-Cursor');
+            dataCount.textContent = `총 ${loadedCount}개 데이터`;
+            updateLoadMore();
+        } else {
+            historyBody.innerHTML = renderRollupRows(data);
+            const unit = resolution === 'minute' ? '분' : '시간';
+            dataCount.textContent = `${unit} 단위 요약 ${data.length}개 구간`;
+        }
         
     } catch (error) {
         console.error('데이터 로드 실패:', error);
         loading.style.display = 'none';
-        historyBody.innerHTML = '<tr><td colspan="10" style="text-align: center; padding: 40px; color: #dc3545;">데이터 로드 실패</td></tr>';
+        historyBody.innerHTML = '<tr><td colspan="11" style="text-align: center; padding: 40px; color: #dc3545;">데이터 로드 실패</td></tr>';
+    }
+}
+
+// 다음 페이지 로드 (원본 데이터만, 기존 행 뒤에 추가)
+async function loadMore() {
+    if (!nextCursor) {
+        return;
+    }
+    
+    const button = document.querySelector('#loadMore button');
+    button.disabled = true;
+    
+    try {
+        const response = await fetch(historyUrl(currentMinutes, nextCursor));
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const data = await response.json();
+        
+        document.getElementById('historyBody').insertAdjacentHTML('beforeend', renderRawRows(data));
+        loadedCount += data.length;
+        nextCursor = response.headers.get('X-Next-Cursor');
+        document.getElementById('dataCount').textContent = `총 ${loadedCount}개 데이터`;
+        
+    } catch (error) {
+        console.error('다음 페이지 로드 실패:', error);
+    } finally {
+        button.disabled = false;
+        updateLoadMore();
     }
 }
 
@@ -78,7 +204,7 @@ function getRiskBadgeHTML(riskLevel) {
 
 // CSV 다운로드
 function downloadCSV() {
-    let url = '/api/history/csv';
+    let url = `${historyBaseUrl()}/csv`;
     if (currentMinutes) {
         url += `?minutes=${currentMinutes}`;
     }
@@ -88,5 +214,6 @@ function downloadCSV() {
 
 // 페이지 로드 시 기본 데이터 로드 (최근 1시간)
 document.addEventListener('DOMContentLoaded', () => {
+    loadDevices();
     loadHistory(60);
 });
@@ -0,0 +1,146 @@
+"""
+위험도 계산 임계값 스냅샷 (버전 관리 + 무중단 교체)
+- thresholds 테이블의 위험도 임계값을 불변 스냅샷으로 메모리에 적재
+- 수집 경로는 현재 스냅샷만 참조하므로 건별 DB 조회 없음
+- 임계값 변경 시 threshold_revisions 에 새 버전을 기록하고 스냅샷을 통째로 교체
+"""
+from dataclasses import dataclass, fields
+from typing import Dict, Optional
+
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Threshold, ThresholdRevision
+from app.config import RiskThresholds
+
+# 위험도 계산에 쓰이는 임계값 이름 (thresholds.name, RiskThresholdSet 필드와 동일)
+RISK_THRESHOLD_NAMES = (
+    "tilt_normal",
+    "tilt_danger",
+    "moisture_normal",
+    "moisture_warning",
+    "vibration_threshold",
+    "weight_tilt",
+    "weight_moisture",
+    "weight_vibration",
+    "risk_normal_max",
+    "risk_warning_max",
+)
+
+# 기본값 (app/config.py 의 RiskThresholds)
+DEFAULT_RISK_THRESHOLDS = {name: float(getattr(RiskThresholds, name.upper())) for name in RISK_THRESHOLD_NAMES}
+
+
+@dataclass(frozen=True)
+class ThresholdSnapshot:
+    """
+    위험도 임계값 세트 1개 버전 (불변)
+
+    속성 이름이 RiskThresholds 와 같으므로 위험도 계산 함수의 thresholds 인자로 그대로 사용한다.
+    """
+    VERSION: int
+    TILT_NORMAL: float
+    TILT_DANGER: float
+    MOISTURE_NORMAL: float
+    MOISTURE_WARNING: float
+    VIBRATION_THRESHOLD: float
+    WEIGHT_TILT: float
+    WEIGHT_MOISTURE: float
+    WEIGHT_VIBRATION: float
+    RISK_NORMAL_MAX: float
+    RISK_WARNING_MAX: float
+
+    @classmethod
+    def from_values(cls, version: int, values: Dict[str, float]) -> "ThresholdSnapshot":
+        """
+        이름(소문자) → 값 딕셔너리로 생성 (없는 항목은 기본값)
+        """
+        merged = {**DEFAULT_RISK_THRESHOLDS, **{k: v for k, v in values.items() if k in DEFAULT_RISK_THRESHOLDS}}
+        return cls(VERSION=version, **{name.upper(): float(value) for name, value in merged.items()})
+
+    def values(self) -> Dict[str, float]:
+        """이름(소문자) → 값 딕셔너리"""
+        return {f.name.lower(): getattr(self, f.name) for f in fields(self) if f.name != "VERSION"}
+
+
+class ThresholdStore:
+    """
+    현재 적용 중인 임계값 스냅샷 보관
+
+    current 는 통째로 교체만 하므로 읽는 쪽은 잠금 없이 한 번 꺼낸 스냅샷을 끝까지 쓴다.
+    이 프로세스가 적재한 버전은 모두 보관하므로 저장 시점에 행의 threshold_version 으로
+    위험도 계산에 쓴 스냅샷을 다시 찾을 수 있다 (롤업 진동 판정).
+    """
+    def __init__(self):
+        self.current = ThresholdSnapshot.from_values(0, {})
+        self._versions: Dict[int, ThresholdSnapshot] = {0: self.current}
+
+    def swap(self, snapshot: ThresholdSnapshot) -> bool:
+        """
+        스냅샷 교체 (더 새로운 버전만 반영)
+
+        Returns:
+            교체 여부
+        """
+        self._versions.setdefault(snapshot.VERSION, snapshot)
+        if snapshot.VERSION < self.current.VERSION:
+            return False
+        self.current = snapshot
+        return True
+
+    def get(self, version: Optional[int]) -> ThresholdSnapshot:
+        """
+        버전의 스냅샷 (모르는 버전이나 None 이면 현재 스냅샷)
+        """
+        if version is None:
+            return self.current
+        return self._versions.get(version, self.current)
+
+    async def load(self, db: AsyncSession) -> ThresholdSnapshot:
+        """
+        서버 시작 시 DB에서 적재
+        - 없는 위험도 임계값 행은 기본값으로 생성
+        - 현재 값이 최신 버전과 다르면 (직접 수정 등) 새 버전 기록
+        """
+        result = await db.execute(select(Threshold).where(Threshold.name.in_(RISK_THRESHOLD_NAMES)))
+        values = {row.name: row.value for row in result.scalars()}
+
+        for name, value in DEFAULT_RISK_THRESHOLDS.items():
+            if name not in values:
+                db.add(Threshold(name=name, value=value))
+                values[name] = value
+
+        latest = await self._latest_revision(db)
+        if latest is None or latest.thresholds != values:
+            latest = ThresholdRevision(thresholds=values)
+            db.add(latest)
+            await db.flush()
+
+        await db.commit()
+
+        self.swap(ThresholdSnapshot.from_values(latest.id, latest.thresholds))
+        print(f"✅ 위험도 임계값 적재 완료 (버전 {self.current.VERSION})")
+        return self.current
+
+    async def create_revision(self, db: AsyncSession) -> ThresholdSnapshot:
+        """
+        현재 thresholds 행으로 새 버전 기록 (호출 측 트랜잭션 안, commit 후 swap 필요)
+        """
+        await db.flush()
+        result = await db.execute(select(Threshold).where(Threshold.name.in_(RISK_THRESHOLD_NAMES)))
+        values = {**DEFAULT_RISK_THRESHOLDS, **{row.name: row.value for row in result.scalars()}}
+
+        revision = ThresholdRevision(thresholds=values)
+        db.add(revision)
+        await db.flush()   # id(버전) 할당
+
+        return ThresholdSnapshot.from_values(revision.id, values)
+
+    @staticmethod
+    async def _latest_revision(db: AsyncSession) -> Optional[ThresholdRevision]:
+        result = await db.execute(select(ThresholdRevision).order_by(desc(ThresholdRevision.id)).limit(1))
+        return result.scalars().first()
+
+
+# 전역 ThresholdStore 인스턴스
+threshold_store = ThresholdStore()
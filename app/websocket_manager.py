@@ -1,9 +1,150 @@
 """
 WebSocket 연결 관리
+- 클라이언트마다 제한된 전송 대기열과 writer 태스크를 둠
+- 브로드캐스트는 대기열 추가만 하므로 느린 클라이언트가 수집 요청을 지연시키지 않음
+- 클라이언트별 인코딩 (json / binary delta) 과 최대 프레임 속도 (합쳐 보내기) 협상
 """
 from fastapi import WebSocket
-from typing import Set
-import json
+from typing import Dict, List, Optional, Union
+from collections import deque
+import asyncio
+import time
+
+from app.ws_encoding import Envelope, BinaryDeltaEncoder, encode_json
+from app.metrics import BROADCAST_SECONDS, WS_SEND_LAG_SECONDS, WS_DROPPED_TOTAL
+from app.config import WS_SEND_QUEUE_SIZE, WS_DROP_POLICY, WS_MAX_MISSES, WS_SEND_TIMEOUT
+
+
+class ClientConnection:
+    """
+    WebSocket 클라이언트 1개의 전송 대기열과 writer 태스크
+
+    대기열이 가득 찼을 때:
+    - drop_oldest: 가장 오래된 메시지를 버리고 새 메시지 추가
+    - disconnect: 새 메시지를 버리고, 누락이 max_misses 건 쌓이면 연결 종료
+
+    max_fps 가 있으면 1/max_fps 초에 한 번, 그동안 쌓인 메시지를 한 프레임으로 합쳐 보낸다.
+    delta 인코딩은 전송 시점에 하므로 대기열에서 버려진 메시지가 delta 기준을 깨지 않는다.
+    """
+    def __init__(
+        self,
+        websocket: WebSocket,
+        encoding: str = "json",
+        max_fps: Optional[float] = None,
+        max_size: int = WS_SEND_QUEUE_SIZE,
+        policy: str = WS_DROP_POLICY,
+        max_misses: int = WS_MAX_MISSES
+    ):
+        if policy not in ("drop_oldest", "disconnect"):
+            raise ValueError(f"알 수 없는 WebSocket 대기열 정책: {policy}")
+        if encoding not in ("json", "binary"):
+            raise ValueError(f"알 수 없는 WebSocket 인코딩: {encoding}")
+
+        self.websocket = websocket
+        self.encoding = encoding
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.max_size = max_size
+        self.policy = policy
+        self.max_misses = max_misses
+        self._encoder = BinaryDeltaEncoder() if encoding == "binary" else None
+
+        self._queue: deque = deque()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+
+        # 통계
+        self.sent = 0
+        self.misses = 0
+
+    def start(self, on_close):
+        """
+        writer 태스크 시작
+
+        Args:
+            on_close: 전송 실패/제한 초과로 연결이 끊길 때 호출할 콜백
+        """
+        self._task = asyncio.create_task(self._run(on_close))
+
+    def stop(self):
+        """
+        writer 태스크 중지
+        """
+        self.closed = True
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    @property
+    def depth(self) -> int:
+        """전송 대기 중인 메시지 수"""
+        return len(self._queue)
+
+    def offer(self, envelope: Envelope) -> bool:
+        """
+        전송할 메시지 추가 (대기 없음)
+
+        Returns:
+            연결 유지 여부 (False 면 호출 측에서 연결 종료)
+        """
+        if self.closed:
+            return False
+
+        if len(self._queue) >= self.max_size:
+            self.misses += 1
+            WS_DROPPED_TOTAL.inc()
+            if self.policy == "drop_oldest":
+                self._queue.popleft()
+            elif self.misses >= self.max_misses:
+                return False
+            else:
+                return True
+
+        self._queue.append(envelope)
+        self._ready.set()
+        return True
+
+    async def _run(self, on_close):
+        """
+        writer 루프: 대기열의 메시지를 순서대로 전송
+        """
+        loop = asyncio.get_running_loop()
+        next_send = 0.0
+
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+
+                while self._queue:
+                    if self.min_interval:
+                        # 프레임 간격이 될 때까지 기다렸다가 쌓인 메시지를 한 번에
+                        wait = next_send - loop.time()
+                        if wait > 0:
+                            await asyncio.sleep(wait)
+                        envelopes = list(self._queue)
+                        self._queue.clear()
+                    else:
+                        envelopes = [self._queue.popleft()]
+
+                    await asyncio.wait_for(self._send(envelopes), timeout=WS_SEND_TIMEOUT)
+                    self.sent += 1
+                    WS_SEND_LAG_SECONDS.observe(time.perf_counter() - envelopes[0].created)
+                    next_send = loop.time() + self.min_interval
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"WebSocket 전송 실패: {e}")
+            await on_close(self.websocket)
+
+
+    async def _send(self, envelopes: List[Envelope]):
+        """
+        메시지 묶음을 협상된 인코딩으로 프레임 1개 전송
+        """
+        if self._encoder is not None:
+            await self.websocket.send_bytes(self._encoder.encode(envelopes))
+        else:
+            await self.websocket.send_text(encode_json(envelopes))
 
 
 class ConnectionManager:
@@ -11,37 +152,82 @@ class ConnectionManager:
     WebSocket 연결을 관리하는 클래스
     """
     def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+
+        # 통계
+        self.evicted = 0
     
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, encoding: str = "json", max_fps: Optional[float] = None):
         """
         새로운 WebSocket 연결 수락
+        
+        Args:
+            websocket: WebSocket 연결
+            encoding: "json" 또는 "binary"
+            max_fps: 초당 최대 프레임 수 (None 이면 메시지마다 즉시 전송)
         """
         await websocket.accept()
-        self.active_connections.add(websocket)
+        client = ClientConnection(websocket, encoding=encoding, max_fps=max_fps)
+        self.active_connections[websocket] = client
+        client.start(self.evict)
     
     def disconnect(self, websocket: WebSocket):
         """
         WebSocket 연결 종료
         """
-        self.active_connections.discard(websocket)
+        client = self.active_connections.pop(websocket, None)
+        if client is not None:
+            client.stop()
     
-    async def broadcast(self, message: dict):
+    async def evict(self, websocket: WebSocket):
+        """
+        느리거나 끊긴 클라이언트 강제 종료
+        """
+        if websocket not in self.active_connections:
+            return
+
+        self.disconnect(websocket)
+        self.evicted += 1
+        try:
+            await websocket.close(code=1013)   # Try Again Later → 클라이언트가 재연결
+        except Exception:
+            pass
+    
+    async def broadcast(self, message: Union[dict, list]):
         """
         모든 연결된 클라이언트에게 메시지 브로드캐스트
+        - dict: 센서 데이터 1건
+        - list: 일괄 수신된 센서 데이터 여러 건
+        
+        클라이언트별 대기열에 넣기만 하므로 전송을 기다리지 않는다.
+        직렬화는 첫 전송 시 한 번만 하고 모든 클라이언트가 공유한다.
         """
-        disconnected = set()
+        envelope = Envelope(message)
         
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"WebSocket 전송 실패: {e}")
-                disconnected.add(connection)
+        overflowed = [
+            websocket
+            for websocket, client in self.active_connections.items()
+            if not client.offer(envelope)
+        ]
+        BROADCAST_SECONDS.observe(time.perf_counter() - envelope.created)
         
-        # 연결 실패한 클라이언트 제거
-        for conn in disconnected:
-            self.disconnect(conn)
+        # 누락 한도를 넘긴 클라이언트 제거
+        for websocket in overflowed:
+            asyncio.create_task(self.evict(websocket))
+    
+    def stats(self) -> dict:
+        """
+        연결 상태 (헬스체크/모니터링용)
+        """
+        clients = self.active_connections.values()
+        return {
+            "clients": len(self.active_connections),
+            "queued": sum(client.depth for client in clients),
+            "misses": sum(client.misses for client in clients),
+            "evicted": self.evicted,
+            "binary_clients": sum(1 for client in clients if client.encoding == "binary"),
+            "policy": WS_DROP_POLICY,
+        }
 
 
 # 전역 ConnectionManager 인스턴스
@@ -0,0 +1,149 @@
+"""
+WebSocket 메시지 인코딩
+- json: 기존 형식 (센서 데이터 객체 또는 배열)
+- binary: 고정 형식 바이너리 프레임, 클라이언트별로 디바이스의 직전 값과 같은 필드는 생략 (delta)
+
+바이너리 프레임 (little-endian):
+    u8  버전 (BINARY_VERSION)
+    u32 레코드 수 (max_fps 로 합친 프레임은 수만 건이 될 수 있음)
+    레코드 반복:
+        u16  device_id 길이, device_id (UTF-8)
+        u16  필드 마스크 (비트가 켜진 필드만 아래 순서대로 이어짐)
+        bit 0~7  f64  moisture, accel_x, accel_y, accel_z, gyro_x, gyro_y, gyro_z, vibration_raw
+        bit 8    u8   risk_level
+        bit 9    f64  id (DB 저장 전 데이터는 생략)
+        bit 10   f64  created_at (1970-01-01 기준 KST 벽시계 ms, 소수부에 µs)
+        bit 11   i32  created_at 직전 레코드 대비 µs 차이 (bit 10 대신 사용)
+
+디코더는 디바이스별 직전 값을 유지하다가 생략된 필드를 채운다. 연결마다 처음 보내는
+디바이스 레코드는 모든 필드를 담는다 (keyframe).
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import json
+import struct
+import time
+
+BINARY_VERSION = 2   # 2: 레코드 수 u32, device_id 길이 u16
+
+FLOAT_FIELDS = (
+    "moisture",
+    "accel_x", "accel_y", "accel_z",
+    "gyro_x", "gyro_y", "gyro_z",
+    "vibration_raw",
+)
+
+BIT_RISK_LEVEL = 1 << 8
+BIT_ID = 1 << 9
+BIT_CREATED_AT = 1 << 10
+BIT_CREATED_AT_DELTA = 1 << 11
+
+_INT32_MAX = 2 ** 31 - 1
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class Envelope:
+    """
+    브로드캐스트 메시지 1건
+
+    클라이언트 수와 무관하게 JSON 직렬화와 바이너리용 값 변환은 한 번만 한다.
+    created 는 브로드캐스트 시각 (perf_counter, 클라이언트별 전송 지연 측정용).
+    """
+    __slots__ = ("readings", "is_list", "created", "_items_json", "_records")
+
+    def __init__(self, message):
+        self.created = time.perf_counter()
+        self.is_list = isinstance(message, list)
+        self.readings: List[dict] = message if self.is_list else [message]
+        self._items_json: Optional[List[str]] = None
+        self._records: Optional[List[tuple]] = None
+
+    @property
+    def items_json(self) -> List[str]:
+        """센서 데이터별 JSON 문자열"""
+        if self._items_json is None:
+            self._items_json = [
+                json.dumps(reading, ensure_ascii=False, separators=(",", ":"))
+                for reading in self.readings
+            ]
+        return self._items_json
+
+    @property
+    def json(self) -> str:
+        """원래 형태 (객체 또는 배열) 의 JSON 문자열"""
+        if self.is_list:
+            return "[" + ",".join(self.items_json) + "]"
+        return self.items_json[0]
+
+    @property
+    def records(self) -> List[tuple]:
+        """바이너리 인코딩용 (device_id bytes, 실수값 튜플, risk_level, id, created_at µs)"""
+        if self._records is None:
+            self._records = [
+                (
+                    reading["device_id"].encode("utf-8"),
+                    tuple(float(reading[name]) for name in FLOAT_FIELDS),
+                    int(reading["risk_level"]),
+                    reading.get("id"),
+                    (datetime.fromisoformat(str(reading["created_at"])) - _EPOCH) // _MICROSECOND,
+                )
+                for reading in self.readings
+            ]
+        return self._records
+
+
+def encode_json(envelopes: List[Envelope]) -> str:
+    """
+    JSON 인코딩 (여러 메시지를 합칠 때는 센서 데이터 배열 하나로)
+    """
+    if len(envelopes) == 1:
+        return envelopes[0].json
+    return "[" + ",".join(item for envelope in envelopes for item in envelope.items_json) + "]"
+
+
+class BinaryDeltaEncoder:
+    """
+    클라이언트 1개의 바이너리 delta 인코더 (디바이스별 직전 전송 값 유지)
+    """
+    def __init__(self):
+        self._previous: Dict[bytes, Tuple[tuple, int, Optional[int], int]] = {}
+
+    def encode(self, envelopes: List[Envelope]) -> bytes:
+        records = [record for envelope in envelopes for record in envelope.records]
+        parts = [struct.pack("<BI", BINARY_VERSION, len(records))]
+
+        for device, values, risk_level, row_id, created_us in records:
+            previous = self._previous.get(device)
+            mask = 0
+            body = []
+
+            for bit, value in enumerate(values):
+                if previous is None or previous[0][bit] != value:
+                    mask |= 1 << bit
+                    body.append(struct.pack("<d", value))
+
+            if previous is None or previous[1] != risk_level:
+                mask |= BIT_RISK_LEVEL
+                body.append(struct.pack("<B", risk_level))
+
+            if row_id is not None:
+                mask |= BIT_ID
+                body.append(struct.pack("<d", row_id))
+
+            delta = created_us - previous[3] if previous is not None else None
+            if delta is not None and -_INT32_MAX <= delta <= _INT32_MAX:
+                mask |= BIT_CREATED_AT_DELTA
+                body.append(struct.pack("<i", delta))
+            else:
+                mask |= BIT_CREATED_AT
+                body.append(struct.pack("<d", created_us / 1000))
+
+            parts.append(struct.pack("<H", len(device)))
+            parts.append(device)
+            parts.append(struct.pack("<H", mask))
+            parts.extend(body)
+
+            self._previous[device] = (values, risk_level, row_id, created_us)
+
+        return b"".join(parts)
@@ -0,0 +1,169 @@
+"""
+콜드 아카이브 저장 크기 / 구간 스캔 속도 벤치마크
+
+비교 대상:
+- before: sensor_data 테이블 (행 저장) 에서 구간 전체를 읽음
+- after:  app.archive 의 일 단위 압축 컬럼 파일을 mmap 으로 읽음
+
+같은 합성 데이터(디바이스별 랜덤 워크, 소수 둘째 자리까지 반올림한 가속도 등)를 양쪽에 저장하고
+저장 크기와 N일 구간을 컬럼 배열로 읽는 시간을 잰다.
+
+실행 방법 (프로젝트 루트에서):
+    python -m benchmarks.bench_archive
+    python -m benchmarks.bench_archive --days 7 --devices 10 --interval 1
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.archive import ColdArchive
+from app.ring_buffer import FLOAT_COLUMNS
+
+
+def generate_day(day: date, devices: int, interval: float, next_id: int) -> dict:
+    """
+    하루치 합성 데이터 (컬럼 배열, (created_at, id) 오름차순)
+    """
+    steps = int(86400 / interval)
+    count = steps * devices
+    start = np.datetime64(day, "us").astype(np.int64)
+
+    offsets = (np.repeat(np.arange(steps), devices) * interval * 1_000_000).astype(np.int64)
+    jitter = np.random.randint(0, 1000, count)
+    moisture = 800 + np.cumsum(np.random.choice([-1, 0, 0, 1], (steps, devices)), axis=0).ravel()
+
+    return {
+        "id": np.arange(next_id, next_id + count, dtype=np.int64),
+        "device_id": np.asarray([f"node-{n:02d}" for n in range(devices)] * steps, dtype=object),
+        "created_at": start + offsets + jitter,
+        "moisture": np.clip(moisture, 600, 900).astype(np.float64),
+        "accel_x": np.round(np.random.normal(0, 2, count), 2),
+        "accel_y": np.round(np.random.normal(0, 2, count), 2),
+        "accel_z": np.round(9.8 + np.random.normal(0, 0.05, count), 2),
+        "gyro_x": np.round(np.random.normal(0, 0.01, count), 3),
+        "gyro_y": np.round(np.random.normal(0, 0.01, count), 3),
+        "gyro_z": np.round(np.random.normal(0, 0.01, count), 3),
+        "vibration_raw": (np.random.random(count) < 0.05).astype(np.float64),
+        "risk_level": np.random.randint(0, 3, count).astype(np.int8),
+        "threshold_version": np.full(count, 1, dtype=np.int32),
+    }
+
+
+def store_sqlite(path: str, day_rows: dict):
+    """
+    sensor_data 와 같은 스키마/인덱스의 SQLite 테이블에 저장
+    """
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS sensor_data ("
+        "id INTEGER PRIMARY KEY, device_id VARCHAR(64) NOT NULL, "
+        + ", ".join(f"{name} FLOAT NOT NULL" for name in FLOAT_COLUMNS)
+        + ", risk_level INTEGER NOT NULL, threshold_version INTEGER, created_at DATETIME NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON sensor_data (created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_device_created_at ON sensor_data (device_id, created_at)")
+
+    created_at = day_rows["created_at"].astype("datetime64[us]").astype(str)
+    conn.executemany(
+        f"INSERT INTO sensor_data (id, device_id, {', '.join(FLOAT_COLUMNS)}, risk_level, threshold_version, created_at) "
+        f"VALUES ({', '.join('?' * (len(FLOAT_COLUMNS) + 5))})",
+        zip(
+            day_rows["id"].tolist(), day_rows["device_id"].tolist(),
+            *(day_rows[name].tolist() for name in FLOAT_COLUMNS),
+            day_rows["risk_level"].tolist(), day_rows["threshold_version"].tolist(),
+            (value.replace("T", " ") for value in created_at)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+def scan_sqlite(path: str, start: datetime, end: datetime) -> int:
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        f"SELECT id, device_id, created_at, {', '.join(FLOAT_COLUMNS)}, risk_level FROM sensor_data "
+        "WHERE created_at BETWEEN ? AND ? ORDER BY created_at, id",
+        (start.isoformat(sep=" "), end.isoformat(sep=" "))
+    ).fetchall()
+    columns = list(zip(*rows))
+    arrays = [np.asarray(values) for values in columns[3:]]
+    conn.close()
+    return len(arrays[0]) if arrays else 0
+
+
+def scan_archive(archive: ColdArchive, start: datetime, end: datetime) -> int:
+    total = 0
+    for day in archive.days():
+        if start.date() <= day <= end.date():
+            _, columns = archive.read_day(day, start, end, None)
+            total += len(columns["id"])
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="콜드 아카이브 저장 크기 / 스캔 속도 비교")
+    parser.add_argument("--days", type=int, default=3, help="생성할 일수")
+    parser.add_argument("--devices", type=int, default=5, help="디바이스 수")
+    parser.add_argument("--interval", type=float, default=1.0, help="디바이스별 측정 주기 (초)")
+    parser.add_argument("--repeat", type=int, default=3, help="스캔 반복 횟수 (최소값 사용)")
+    args = parser.parse_args()
+
+    random.seed(0)
+    np.random.seed(0)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "bench.db")
+        archive = ColdArchive(directory=os.path.join(workdir, "archive"))
+
+        first_day = date.today() - timedelta(days=args.days + 1)
+        next_id = 1
+        for offset in range(args.days):
+            day = first_day + timedelta(days=offset)
+            rows = generate_day(day, args.devices, args.interval, next_id)
+            next_id += len(rows["id"])
+            store_sqlite(db_path, rows)
+            archive.write_day(day, rows)
+            print(f"📦 {day.isoformat()} {len(rows['id'])}건 생성")
+
+        total_rows = next_id - 1
+        db_bytes = os.path.getsize(db_path)
+        archive_bytes = archive.stats()["bytes"]
+
+        start = datetime.combine(first_day, datetime.min.time())
+        end = start + timedelta(days=args.days) - timedelta(microseconds=1)
+
+        timings = {}
+        for name, scan in (
+            ("before (sqlite rows)", lambda: scan_sqlite(db_path, start, end)),
+            ("after (archive mmap)", lambda: scan_archive(archive, start, end)),
+        ):
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                count = scan()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            assert count == total_rows, (name, count, total_rows)
+            timings[name] = best
+
+    print()
+    print("=" * 66)
+    print(f"{'방식':<24}{'크기 (MB)':>12}{'B/행':>10}{'스캔 (s)':>10}{'행/s':>10}")
+    print("-" * 66)
+    for (name, elapsed), size in zip(timings.items(), (db_bytes, archive_bytes)):
+        print(
+            f"{name:<24}{size / 1e6:>12.2f}{size / total_rows:>10.1f}"
+            f"{elapsed:>10.3f}{total_rows / elapsed / 1e6:>9.2f}M"
+        )
+    print("=" * 66)
+    print(f"크기 {db_bytes / archive_bytes:.1f}배 감소, 스캔 {timings['before (sqlite rows)'] / timings['after (archive mmap)']:.1f}배 빠름")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+동기 세션 vs 비동기 세션 동시 요청 처리량 비교 벤치마크
+
+비교 대상:
+- before: async 핸들러 안에서 동기 Session 으로 이력 조회 (기존 방식 → 이벤트 루프 블로킹)
+- after:  app.crud 의 AsyncSession 기반 이력 조회
+
+이력 조회와 동시에 DB를 쓰지 않는 /ping 요청을 고정 주기로 보내고 그 지연을 함께 측정한다.
+before 에서는 /ping 도 느린 쿼리 뒤에 줄을 서고, after 에서는 거의 즉시 응답해야 한다.
+
+실행 방법 (프로젝트 루트에서):
+    python -m benchmarks.bench_async_db
+    python -m benchmarks.bench_async_db --db-url sqlite:///bench.db --seed 20000
+    python -m benchmarks.bench_async_db --requests 1000 --concurrency 100
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, desc, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.config import DB_URL
+from app.crud import get_sensor_history
+from app.database import Base, to_async_url
+from app.models import SensorData
+
+
+def percentile(values: List[float], p: float) -> float:
+    """정렬 기반 백분위수 (p: 0~100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed_database(db_url: str, rows: int):
+    """
+    벤치마크용 데이터 준비 (부족한 만큼만 추가)
+    """
+    engine = create_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        existing = db.scalar(select(func.count(SensorData.id)))
+        if existing >= rows:
+            print(f"📦 기존 데이터 {existing}건 사용")
+            return
+
+        next_id = (db.scalar(select(func.max(SensorData.id))) or 0) + 1
+        now = datetime.now()
+        batch = []
+        for i in range(rows - existing):
+            batch.append({
+                "id": next_id + i,
+                "moisture": random.uniform(700, 900),
+                "accel_x": random.uniform(-8, 8),
+                "accel_y": random.uniform(-8, 8),
+                "accel_z": 9.8 + random.uniform(-0.2, 0.2),
+                "gyro_x": random.uniform(-0.05, 0.05),
+                "gyro_y": random.uniform(-0.05, 0.05),
+                "gyro_z": random.uniform(-0.05, 0.05),
+                "vibration_raw": float(random.random() < 0.1),
+                "risk_level": random.randint(0, 2),
+                "created_at": now - timedelta(seconds=i),
+            })
+        db.execute(SensorData.__table__.insert(), batch)
+        db.commit()
+        print(f"📦 데이터 {len(batch)}건 추가 (총 {rows}건)")
+
+    engine.dispose()
+
+
+def build_sync_app(db_url: str, minutes: int, limit: int) -> FastAPI:
+    """
+    before: 기존 방식 (async 핸들러 + 동기 Session)
+    """
+    engine = create_engine(db_url, pool_pre_ping=True)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    bench_app = FastAPI()
+
+    @bench_app.get("/api/history")
+    async def history():
+        db = Session()
+        try:
+            cutoff = datetime.now() - timedelta(minutes=minutes)
+            rows = (
+                db.query(SensorData)
+                .filter(SensorData.created_at >= cutoff)
+                .order_by(desc(SensorData.created_at))
+                .limit(limit)
+                .all()
+            )
+            return {"count": len(rows)}
+        finally:
+            db.close()
+
+    @bench_app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    bench_app.state.dispose = engine.dispose
+    return bench_app
+
+
+def build_async_app(db_url: str, minutes: int, limit: int) -> FastAPI:
+    """
+    after: AsyncSession + app.crud
+    """
+    engine = create_async_engine(to_async_url(db_url), pool_pre_ping=True)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    bench_app = FastAPI()
+
+    @bench_app.get("/api/history")
+    async def history():
+        async with Session() as db:
+            rows = await get_sensor_history(db, minutes=minutes, limit=limit)
+            return {"count": len(rows)}
+
+    @bench_app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    bench_app.state.dispose = engine.dispose
+    return bench_app
+
+
+async def run_load(bench_app: FastAPI, total: int, concurrency: int, ping_interval_ms: float) -> dict:
+    """
+    동시 요청 부하 실행 후 처리량/지연 측정
+
+    /ping 은 별도 태스크가 고정 주기로 보내며, 예정 시각부터 응답까지를 지연으로 잰다.
+    이벤트 루프가 막혀 ping 이 늦게 출발한 시간도 지연에 포함된다.
+    """
+    history_latency: List[float] = []
+    ping_latency: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=bench_app)
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/api/history")
+                response.raise_for_status()
+                history_latency.append((time.perf_counter() - started) * 1000)
+
+        async def prober():
+            interval = ping_interval_ms / 1000
+            scheduled = time.perf_counter()
+            while not done.is_set():
+                scheduled += interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await client.get("/ping")
+                ping_latency.append((time.perf_counter() - scheduled) * 1000)
+
+        # 워밍업 (커넥션 풀 생성)
+        await client.get("/api/history")
+
+        probe_task = asyncio.create_task(prober())
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "elapsed_s": elapsed,
+        "throughput": total / elapsed,
+        "history_p50": percentile(history_latency, 50),
+        "history_p95": percentile(history_latency, 95),
+        "ping_p50": percentile(ping_latency, 50),
+        "ping_p99": percentile(ping_latency, 99),
+    }
+
+
+async def main_async(args):
+    results = {}
+    for name, builder in (("before (sync Session)", build_sync_app), ("after (AsyncSession)", build_async_app)):
+        bench_app = builder(args.db_url, args.minutes, args.limit)
+        try:
+            results[name] = await run_load(bench_app, args.requests, args.concurrency, args.ping_interval)
+        finally:
+            disposed = bench_app.state.dispose()
+            if asyncio.iscoroutine(disposed):
+                await disposed
+
+    print()
+    print("=" * 78)
+    print(f"{'방식':<24}{'req/s':>10}{'hist p50':>11}{'hist p95':>11}{'ping p50':>11}{'ping p99':>11}")
+    print("-" * 78)
+    for name, r in results.items():
+        print(
+            f"{name:<24}{r['throughput']:>10.1f}"
+            f"{r['history_p50']:>9.1f}ms{r['history_p95']:>9.1f}ms"
+            f"{r['ping_p50']:>9.1f}ms{r['ping_p99']:>9.1f}ms"
+        )
+    print("=" * 78)
+    print("※ 로컬 SQLite 는 쿼리 자체가 빨라 비동기 드라이버의 스레드 전환 비용이 더 크게 보일 수 있음.")
+    print("  네트워크 너머 MariaDB 에서는 쿼리 대기 중에도 루프가 다른 요청(ping)을 처리하는지가 핵심 지표.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동기/비동기 DB 세션 동시 처리량 비교")
+    parser.add_argument("--db-url", default=DB_URL, help="동기 드라이버 DB URL (기본: app.config.DB_URL)")
+    parser.add_argument("--seed", type=int, default=10000, help="최소 데이터 건수 (부족하면 추가)")
+    parser.add_argument("--requests", type=int, default=500, help="총 요청 수")
+    parser.add_argument("--concurrency", type=int, default=50, help="동시 요청 수")
+    parser.add_argument("--ping-interval", type=float, default=10.0, help="/ping 전송 주기 (ms)")
+    parser.add_argument("--minutes", type=int, default=60 * 24, help="이력 조회 구간 (분)")
+    parser.add_argument("--limit", type=int, default=200, help="이력 조회 최대 건수")
+    args = parser.parse_args()
+
+    seed_database(args.db_url, args.seed)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
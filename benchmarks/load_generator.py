@@ -0,0 +1,324 @@
+"""
+다중 디바이스 부하 생성기 (수집 / 브로드캐스트 지연 벤치마크)
+
+test_sensor.py(디바이스 1대, 동기 requests, 3초 간격)를 비동기로 확장한 것:
+- 가상 디바이스 수천 대가 각자 고정 주기(--rate)로 측정값을 만들어 /sensor 또는 /sensor/batch 로 전송
+- 측정값은 디바이스별 상태를 가진 모델로 생성 (수분 랜덤 워크와 강우, 설치 기울기와 서서히 기울어짐, 진동 버스트)
+- WebSocket 구독자(--subscribers)가 /ws 로 받은 데이터를 전송 시각과 맞춰 브로드캐스트 지연 측정
+- 수집/브로드캐스트 처리량과 p50/p95/p99 지연을 표로 출력하고 --output 으로 JSON 저장 (회귀 비교용)
+
+전송은 열린 루프(open loop): 서버가 느려도 디바이스는 예정 시각마다 계속 보낸다.
+수집 지연은 예정 시각부터 응답까지로 재므로 클라이언트 쪽 대기(연결 풀 포화 등)도 포함된다.
+
+실행 방법 (프로젝트 루트에서, 서버 실행 중):
+    python -m benchmarks.load_generator --devices 200 --rate 1 --duration 30
+    python -m benchmarks.load_generator --devices 2000 --mode batch --batch-size 10 --subscribers 5
+    python -m benchmarks.load_generator --devices 1000 --mode mixed --output results.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import httpx
+import pytz
+import websockets
+
+from app.config import TIMEZONE
+from benchmarks.bench_async_db import percentile
+
+KST = pytz.timezone(TIMEZONE)
+GRAVITY = 9.81
+
+
+class VirtualDevice:
+    """
+    가상 센서 노드 1대 (라즈베리파이 sensor_client 와 같은 형식의 측정값 생성)
+
+    - 수분 (MCP3008 ADC 정수): 노드별 기준값으로 되돌아가는 랜덤 워크, 드물게 강우로 급감 후 회복
+    - 가속도: 노드별 설치 기울기 + 센서 잡음, 드물게 기울기가 서서히 커지는 구간 (침하 전조)
+    - 자이로: 0 주변 잡음
+    - 진동 (SW-420 디지털): 드물게 시작해 몇 초간 이어지는 0/1 신호
+    """
+    def __init__(self, device_id: str, rng: random.Random):
+        self.device_id = device_id
+        self.rng = rng
+
+        self.moisture_base = rng.gauss(830, 25)
+        self.moisture = self.moisture_base
+        self.tilt_x = rng.gauss(0, 1.5)
+        self.tilt_y = rng.gauss(0, 1.5)
+        self.drift = 0.0
+        self.vibrating = False
+
+    def reading(self, now: datetime) -> dict:
+        rng = self.rng
+
+        # 수분: 평균 회귀 랜덤 워크 + 강우
+        self.moisture += 0.05 * (self.moisture_base - self.moisture) + rng.gauss(0, 1.5)
+        if rng.random() < 0.0005:
+            self.moisture -= rng.uniform(40, 120)
+        moisture = float(min(1023, max(0, round(self.moisture))))
+
+        # 기울기: 드물게 서서히 기울어지는 구간이 시작되고, 끝나면 되돌아감
+        if self.drift == 0.0 and rng.random() < 0.0002:
+            self.drift = rng.choice((-1, 1)) * rng.uniform(0.005, 0.02)
+        elif self.drift != 0.0 and rng.random() < 0.002:
+            self.drift = 0.0
+        self.tilt_x += self.drift
+        accel_x = self.tilt_x + rng.gauss(0, 0.03)
+        accel_y = self.tilt_y + rng.gauss(0, 0.03)
+        accel_z = math.sqrt(max(0.0, GRAVITY ** 2 - accel_x ** 2 - accel_y ** 2)) + rng.gauss(0, 0.03)
+
+        # 진동: 버스트 (시작 확률 낮고, 시작하면 몇 초 유지)
+        self.vibrating = rng.random() < (0.7 if self.vibrating else 0.01)
+
+        return {
+            "device_id": self.device_id,
+            "moisture": moisture,
+            "accel": {"x": round(accel_x, 2), "y": round(accel_y, 2), "z": round(accel_z, 2)},
+            "gyro": {"x": round(rng.gauss(0, 0.01), 3), "y": round(rng.gauss(0, 0.01), 3), "z": round(rng.gauss(0, 0.01), 3)},
+            "vibration_raw": 1.0 if self.vibrating else 0.0,
+            "timestamp": now.isoformat(),
+        }
+
+
+class LoadStats:
+    """
+    부하 실행 중 수집한 측정값
+    """
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = {"/sensor": [], "/sensor/batch": []}
+        self.readings: Counter = Counter()   # 경로별 전송 성공 건수
+        self.statuses: Counter = Counter()   # "경로 상태코드" 별 요청 수
+        self.broadcast: List[float] = []
+        self.broadcast_unmatched = 0
+
+        # (device_id, created_at) → 전송 시각 (브로드캐스트 지연 계산용)
+        self.sent_at: Dict[Tuple[str, str], float] = {}
+
+
+async def post(client: httpx.AsyncClient, path: str, body, readings: int, scheduled: float, stats: LoadStats):
+    """
+    요청 1건 전송 (지연은 예정 시각 기준)
+    """
+    try:
+        response = await client.post(path, json=body)
+        status = str(response.status_code)
+        ok = response.status_code == 200 and response.json().get("status") != "error"
+    except httpx.HTTPError as e:
+        status, ok = type(e).__name__, False
+
+    stats.statuses[f"{path} {status}"] += 1
+    if ok:
+        stats.latency[path].append((time.perf_counter() - scheduled) * 1000)
+        stats.readings[path] += readings
+
+
+async def run_device(
+    device: VirtualDevice,
+    client: httpx.AsyncClient,
+    stats: LoadStats,
+    interval: float,
+    batch_size: int,
+    stop_at: float,
+    track_broadcast: bool
+):
+    """
+    디바이스 1대의 전송 루프 (단조 시계 기준 예정 시각마다 측정, 응답을 기다리지 않음)
+    """
+    in_flight = set()
+    batch = []
+    next_at = time.perf_counter() + device.rng.random() * interval   # 디바이스마다 위상 분산
+
+    while next_at < stop_at:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        now = datetime.now(KST)
+        reading = device.reading(now)
+        if track_broadcast:
+            stats.sent_at[(device.device_id, now.replace(tzinfo=None).isoformat())] = time.perf_counter()
+
+        if batch_size <= 1:
+            task = asyncio.create_task(post(client, "/sensor", reading, 1, next_at, stats))
+        else:
+            batch.append(reading)
+            task = None
+            if len(batch) >= batch_size:
+                task = asyncio.create_task(post(client, "/sensor/batch", batch, len(batch), next_at, stats))
+                batch = []
+
+        if task is not None:
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_at += interval
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def run_subscriber(ws_url: str, stats: LoadStats, ready: asyncio.Event, stop: asyncio.Event):
+    """
+    WebSocket 구독자 1개 (받은 데이터마다 전송 시각과 비교해 브로드캐스트 지연 기록)
+    """
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        ready.set()
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+
+            received = time.perf_counter()
+            items = json.loads(message)
+            for item in items if isinstance(items, list) else [items]:
+                sent = stats.sent_at.get((item.get("device_id"), item.get("created_at")))
+                if sent is None:
+                    stats.broadcast_unmatched += 1
+                else:
+                    stats.broadcast.append((received - sent) * 1000)
+
+
+def summarize(values: List[float], count: int, elapsed: float) -> dict:
+    return {
+        "count": count,
+        "per_second": count / elapsed if elapsed else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+async def main_async(args) -> dict:
+    rng = random.Random(args.seed)
+    devices = [VirtualDevice(f"load-{n:05d}", random.Random(rng.random())) for n in range(args.devices)]
+
+    # 모드별 디바이스당 배치 크기 (mixed: --batch-ratio 비율의 디바이스가 배치 전송)
+    batch_sizes = []
+    for n in range(args.devices):
+        use_batch = args.mode == "batch" or (args.mode == "mixed" and n < args.devices * args.batch_ratio)
+        batch_sizes.append(args.batch_size if use_batch else 1)
+
+    stats = LoadStats()
+    ws_url = args.url.replace("http", "ws", 1).rstrip("/") + "/ws?encoding=json"
+    stop = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        subscribers = []
+        for _ in range(args.subscribers):
+            ready = asyncio.Event()
+            subscribers.append(asyncio.create_task(run_subscriber(ws_url, stats, ready, stop)))
+            await ready.wait()
+
+        print(
+            f"▶️  디바이스 {args.devices}대 × {args.rate}Hz ({args.mode}), "
+            f"구독자 {args.subscribers}개, {args.duration}초"
+        )
+
+        started = time.perf_counter()
+        stop_at = started + args.duration
+
+        async def progress():
+            last = 0
+            while True:
+                await asyncio.sleep(5)
+                sent = sum(stats.readings.values())
+                print(f"   {time.perf_counter() - started:5.0f}s  수집 {(sent - last) / 5:8.0f}건/s  브로드캐스트 누적 {len(stats.broadcast)}")
+                last = sent
+                # 오래된 전송 기록 정리 (브로드캐스트가 오지 않은 데이터)
+                cutoff = time.perf_counter() - 60
+                for key in [key for key, sent_at in stats.sent_at.items() if sent_at < cutoff]:
+                    del stats.sent_at[key]
+
+        reporter = asyncio.create_task(progress())
+        await asyncio.gather(*(
+            run_device(device, client, stats, 1 / args.rate, batch_size, stop_at, args.subscribers > 0)
+            for device, batch_size in zip(devices, batch_sizes)
+        ))
+        elapsed = time.perf_counter() - started
+        reporter.cancel()
+
+        # 마지막 브로드캐스트가 도착할 시간
+        await asyncio.sleep(1.0)
+        stop.set()
+        await asyncio.gather(*subscribers, return_exceptions=True)
+
+        try:
+            server = (await client.get("/health")).json().get("ingest")
+        except (httpx.HTTPError, ValueError):
+            server = None
+
+    return {
+        "config": vars(args),
+        "elapsed_s": elapsed,
+        "ingest": {
+            path: summarize(values, stats.readings[path], elapsed)
+            for path, values in stats.latency.items() if stats.readings[path] or values
+        },
+        "broadcast": summarize(stats.broadcast, len(stats.broadcast), elapsed),
+        "broadcast_unmatched": stats.broadcast_unmatched,
+        "statuses": dict(stats.statuses),
+        "server_ingest": server,
+    }
+
+
+def print_report(result: dict):
+    print()
+    print("=" * 84)
+    print(f"{'구분':<22}{'건수':>10}{'건/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    print("-" * 84)
+    rows = [(f"ingest {path}", summary) for path, summary in result["ingest"].items()]
+    rows.append(("broadcast (ws)", result["broadcast"]))
+    for name, s in rows:
+        print(
+            f"{name:<22}{s['count']:>10}{s['per_second']:>10.0f}"
+            f"{s['p50']:>8.1f}ms{s['p95']:>8.1f}ms{s['p99']:>8.1f}ms{s['max']:>8.1f}ms"
+        )
+    print("=" * 84)
+    print("요청 결과:", ", ".join(f"{key}: {count}" for key, count in sorted(result["statuses"].items())))
+    if result["broadcast_unmatched"]:
+        # DB 가 마이크로초를 저장하지 않으면(MariaDB DATETIME) /sensor/batch 브로드캐스트는 전송 시각과 맞출 수 없음
+        print(f"전송 기록과 맞추지 못한 브로드캐스트: {result['broadcast_unmatched']}건")
+    if result["server_ingest"]:
+        server = result["server_ingest"]
+        print(f"서버 수집 대기열: 거부 {server['rejected']}건, 현재 {server['queue_depth']}/{server['queue_max']}")
+    print("※ ingest 지연: 예정 전송 시각 → 응답 (batch 는 배치가 찬 시각 기준), broadcast: 전송 → 구독자 수신 (구독자별 1건)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="다중 디바이스 부하 생성기")
+    parser.add_argument("--url", default="http://localhost:8000", help="서버 주소")
+    parser.add_argument("--devices", type=int, default=100, help="가상 디바이스 수")
+    parser.add_argument("--rate", type=float, default=1.0, help="디바이스당 초당 측정 횟수")
+    parser.add_argument("--duration", type=float, default=30.0, help="실행 시간 (초)")
+    parser.add_argument("--mode", choices=("single", "batch", "mixed"), default="single",
+                        help="single: /sensor, batch: /sensor/batch, mixed: 일부 디바이스만 batch")
+    parser.add_argument("--batch-size", type=int, default=10, help="batch 모드에서 한 번에 보낼 측정값 수")
+    parser.add_argument("--batch-ratio", type=float, default=0.5, help="mixed 모드에서 batch 로 보내는 디바이스 비율")
+    parser.add_argument("--subscribers", type=int, default=1, help="브로드캐스트 지연을 잴 WebSocket 구독자 수")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP 최대 동시 연결 수")
+    parser.add_argument("--timeout", type=float, default=10.0, help="요청 제한 시간 (초)")
+    parser.add_argument("--seed", type=int, default=0, help="측정값 난수 시드")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (회귀 비교용)")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"✅ 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+-- ============================================
+-- 001: 다중 디바이스 지원
+-- - sensor_data.device_id 컬럼 추가 (기존 데이터는 'default')
+-- - 디바이스별 최신/구간 조회용 (device_id, created_at) 복합 인덱스
+--
+-- 새로 생성하는 DB는 서버 시작 시 자동 생성되므로 실행할 필요 없음.
+-- 기존 MariaDB 테이블에만 1회 실행:
+--   mysql -u root -p sinker_iot < migrations/001_add_device_id.sql
+-- ============================================
+
+ALTER TABLE sensor_data
+    ADD COLUMN device_id VARCHAR(64) NOT NULL DEFAULT 'default' AFTER id,
+    ADD INDEX idx_device_created_at (device_id, created_at);
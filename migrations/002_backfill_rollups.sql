@@ -0,0 +1,46 @@
+-- ============================================
+-- 002: 분/시간 롤업 백필
+-- - 롤업 테이블(sensor_rollup_minute, sensor_rollup_hour)은 서버 시작 시 자동 생성됨
+-- - 롤업 도입 이전에 쌓인 sensor_data 를 한 번 집계해 채움
+-- - 이후 데이터는 저장 시 증분 갱신되므로 다시 실행할 필요 없음
+--
+-- 서버를 한 번 실행해 테이블을 만든 뒤, 서버를 멈춘 상태에서 1회 실행:
+--   mysql -u root -p sinker_iot < migrations/002_backfill_rollups.sql
+-- (진동 감지 기준 1.0 = RiskThresholds.VIBRATION_THRESHOLD)
+-- ============================================
+
+INSERT INTO sensor_rollup_minute (
+    device_id, bucket, sample_count,
+    moisture_min, moisture_max, moisture_sum,
+    tilt_min, tilt_max, tilt_sum,
+    vibration_count, risk_level_max
+)
+SELECT
+    device_id,
+    DATE_FORMAT(created_at, '%Y-%m-%d %H:%i:00') AS bucket,
+    COUNT(*),
+    MIN(moisture), MAX(moisture), SUM(moisture),
+    MIN(SQRT(accel_x * accel_x + accel_y * accel_y)),
+    MAX(SQRT(accel_x * accel_x + accel_y * accel_y)),
+    SUM(SQRT(accel_x * accel_x + accel_y * accel_y)),
+    SUM(vibration_raw >= 1.0),
+    MAX(risk_level)
+FROM sensor_data
+GROUP BY device_id, bucket;
+
+INSERT INTO sensor_rollup_hour (
+    device_id, bucket, sample_count,
+    moisture_min, moisture_max, moisture_sum,
+    tilt_min, tilt_max, tilt_sum,
+    vibration_count, risk_level_max
+)
+SELECT
+    device_id,
+    DATE_FORMAT(bucket, '%Y-%m-%d %H:00:00') AS hour_bucket,
+    SUM(sample_count),
+    MIN(moisture_min), MAX(moisture_max), SUM(moisture_sum),
+    MIN(tilt_min), MAX(tilt_max), SUM(tilt_sum),
+    SUM(vibration_count),
+    MAX(risk_level_max)
+FROM sensor_rollup_minute
+GROUP BY device_id, hour_bucket;
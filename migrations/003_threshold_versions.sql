@@ -0,0 +1,11 @@
+-- ============================================
+-- 003: 위험도 임계값 버전 관리
+-- - threshold_revisions 테이블은 서버 시작 시 자동 생성됨
+-- - 기존 sensor_data 테이블에 계산에 사용한 임계값 버전 컬럼 추가
+--   (기존 행은 NULL: 버전 관리 이전에 정적 기본값으로 계산됨)
+--
+-- 실행: mysql -u root -p sinker_iot < migrations/003_threshold_versions.sql
+-- ============================================
+
+ALTER TABLE sensor_data
+    ADD COLUMN threshold_version INT NULL AFTER risk_level;
@@ -0,0 +1,32 @@
+-- ============================================
+-- 004: sensor_data 시계열 파티션 (created_at 기준 RANGE COLUMNS)
+-- - MariaDB 는 파티션 키가 모든 유니크 키(PK 포함)에 있어야 하므로 PK 를 (id, created_at) 으로 변경
+-- - 최초 파티션 pstart 와 pmax 만 만들고, 일별/월별 파티션은 서버의 파티션 관리 작업이
+--   pmax 를 분할해 생성함 (app/partitions.py, PARTITION_INTERVAL / PARTITION_PREMAKE)
+-- - 기존 데이터는 첫 관리 작업 때 오늘 파티션으로 한 번 옮겨지므로 데이터가 많으면
+--   점검 시간에 실행할 것 (이후 미래 파티션 분할은 빈 파티션이라 즉시 끝남)
+-- - 그 파티션은 보존 기간이 지나도 통째로 DROP 되지 않으므로, 보존 정책을 켜면
+--   그 안의 만료 행은 관리 작업이 배치 DELETE 로 지움
+--
+-- 서버를 멈춘 상태에서 1회 실행:
+--   mysql -u root -p sinker_iot < migrations/004_partition_sensor_data.sql
+-- ============================================
+
+ALTER TABLE sensor_data
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at);
+
+ALTER TABLE sensor_data
+    PARTITION BY RANGE COLUMNS (created_at) (
+        PARTITION pstart VALUES LESS THAN ('2000-01-01'),
+        PARTITION pmax VALUES LESS THAN (MAXVALUE)
+    );
+
+-- 확인
+-- SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+--   FROM information_schema.PARTITIONS
+--  WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'sensor_data';
+--
+-- 이력 조회가 필요한 파티션만 읽는지 확인 (partitions 컬럼)
+-- EXPLAIN PARTITIONS SELECT * FROM sensor_data
+--  WHERE created_at >= NOW() - INTERVAL 1 HOUR ORDER BY created_at DESC LIMIT 200;
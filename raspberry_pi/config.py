@@ -14,9 +14,21 @@
 # 예: http://192.168.2.1:8000/sensor
 SERVER_URL = "http://192.168.1.100:8000/sensor"
 
-# 데이터 전송 간격 (초)
+# 일괄 전송 URL (로컬 대기열에 쌓인 데이터를 한 번에 보냄)
+SERVER_BATCH_URL = SERVER_URL + "/batch"      # JSON 배열
+SERVER_BINARY_URL = SERVER_URL + "/binary"    # 바이너리 레코드 (UPLINK_FORMAT = "binary")
+
+# 스트리밍 전송 URL (UPLINK_TRANSPORT = "websocket", SERVER_URL 과 같은 서버)
+SERVER_STREAM_URL = SERVER_URL.replace("http", "ws", 1).rsplit("/sensor", 1)[0] + "/ws/ingest"
+
+# 데이터 측정(전송) 간격 (초)
+# 측정은 고정 주기(monotonic 시계 기준 절대 시각)로 하고 전송은 별도 스레드가 하므로
+# 서버 응답이 느려도 측정 주기는 변하지 않음
 SEND_INTERVAL = 1
 
+# 센서 노드 식별자 (여러 대를 운영할 경우 노드마다 다르게 설정)
+DEVICE_ID = "sinker-pi-01"
+
 # ==========================================
 # GPIO 핀 설정 (진동 센서)
 # ==========================================
@@ -52,11 +64,71 @@ MPU6050_ADDRESS = 0x68
 # 네트워크 설정
 # ==========================================
 
-# 서버 연결 최대 재시도 횟수
-MAX_RETRIES = 3
-
-# 재시도 대기 시간 (초)
+# 전송 실패 후 다음 시도까지 대기 시간 (초), 실패할 때마다 2배씩 RETRY_MAX_DELAY 까지 증가
+# (대기 중에도 측정은 계속되고 데이터는 로컬 대기열에 쌓임)
 RETRY_DELAY = 2
+RETRY_MAX_DELAY = 30
 
-# HTTP 연결 타임아웃 (초)
+# HTTP 연결 타임아웃 (초), 전송 스레드만 기다리므로 측정 주기와 무관
+# 서버 연결은 유지(keep-alive)하여 요청마다 TCP(/TLS) 연결을 새로 맺지 않음
 CONNECTION_TIMEOUT = 10
+
+# ==========================================
+# 로컬 대기열 (store-and-forward)
+# ==========================================
+
+# 모든 측정값은 먼저 로컬 대기열에 들어가고, 서버에 전송 성공한 뒤에만 지워짐
+# 서버가 끊긴 동안 쌓인 데이터는 다시 연결되면 일괄 전송 (/sensor/batch)
+
+# 대기열 파일 (SQLite, SD 카드)
+QUEUE_PATH = "sensor_queue.db"
+
+# 최대 보관 건수, 넘으면 가장 오래된 데이터부터 버림 (1초 간격 기준 약 3일, 약 40MB)
+QUEUE_MAX_ROWS = 259200
+
+# SD 카드 쓰기 묶음: 전송되지 못한 데이터를 이 건수 또는 시간마다 한 번에 기록
+# (서버가 연결되어 있으면 디스크에 쓰기 전에 전송되어 SD 카드에 쓰지 않음,
+#  전원이 갑자기 끊기면 마지막 QUEUE_FLUSH_INTERVAL 초 이내 데이터는 유실될 수 있음)
+QUEUE_FLUSH_ROWS = 60
+QUEUE_FLUSH_INTERVAL = 10
+
+# 한 번에 전송할 최대 건수
+DRAIN_BATCH_SIZE = 200
+
+# 측정 스레드 → 전송 스레드 사이 메모리 대기열 크기
+# (전송 스레드가 멈춰 가득 차면 측정 스레드가 로컬 대기열에 직접 넣음 → 측정은 막히지 않음)
+SAMPLE_QUEUE_SIZE = 120
+
+# 측정 지연(jitter) 통계를 출력하는 주기 (측정 건수)
+JITTER_REPORT_EVERY = 600
+
+# ==========================================
+# 업링크 (전송 방식)
+# ==========================================
+
+# 모아 보내기: 첫 미전송 데이터 후 이 시간(초)이 지나면 한 번에 전송 (0 이면 측정 즉시 전송)
+# 요청/무선 송신 횟수가 줄어 핫스팟 연결에서 전력/CPU 절약 (대시보드 표시는 그만큼 늦어짐)
+# 진동 감지 데이터는 기다리지 않고 바로 전송
+# QUEUE_FLUSH_INTERVAL 보다 짧게 두면 모으는 동안에도 SD 카드에 쓰지 않음
+UPLINK_WINDOW = 0
+
+# 일괄 전송 형식
+# - "json": JSON 배열 (/sensor/batch)
+# - "binary": 측정값당 96바이트 고정 길이 레코드 (/sensor/binary), 인코딩/서버 파싱 비용이 훨씬 적음
+#   DEVICE_ID 가 UTF-8 16바이트를 넘으면 json 으로 전송
+UPLINK_FORMAT = "json"
+
+# 일괄 전송 본문 gzip 압축 (Content-Encoding: gzip, 서버가 해제)
+UPLINK_GZIP = True
+UPLINK_GZIP_MIN_BYTES = 512   # 이보다 작은 본문은 압축하지 않음
+UPLINK_GZIP_LEVEL = 6         # 1(빠름)~9(작음)
+
+# 전송 방식
+# - "http": 요청/응답으로 일괄 전송 (UPLINK_WINDOW, UPLINK_FORMAT, UPLINK_GZIP 적용)
+# - "websocket": 서버 /ws/ingest 에 연결을 유지하며 측정 즉시 바이너리 레코드 전송,
+#   서버의 ack 를 기다리지 않고 이어서 보내고, 끊기면 재연결해 마지막 ack 다음부터 이어서 전송
+#   websocket-client 패키지 필요 (없거나 서버가 지원하지 않으면 http 로 전송)
+UPLINK_TRANSPORT = "http"
+
+# ack 를 받지 못한 채 보낼 수 있는 최대 건수 (넘으면 ack 를 기다림)
+STREAM_MAX_INFLIGHT = 600
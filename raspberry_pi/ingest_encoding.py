@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+바이너리 수집 레코드 인코딩 (서버 app/ingest_encoding.py 와 같은 형식, 96바이트)
+
+HTTP 일괄 전송 (UPLINK_FORMAT = "binary") 과 스트리밍 전송 (ingest_stream.py) 에서 사용
+버전, 플래그, 예약, 전송 순번, 측정 시각(epoch ms), device_id, 실수 8개
+"""
+
+import struct
+from datetime import datetime
+
+RECORD_VERSION = 1
+RECORD_STRUCT = struct.Struct("<BBHIq16s8d")
+DEVICE_ID_BYTES = 16
+
+
+def encode_record(data, seq=0):
+    """
+    센서 데이터 1건 → 바이너리 레코드
+    Args:
+        data: collect_data() 결과
+        seq: 전송 순번 (HTTP 일괄 전송은 0)
+    Returns:
+        bytes: RECORD_STRUCT.size 바이트
+    """
+    device_id = data['device_id'].encode('utf-8')
+    if len(device_id) > DEVICE_ID_BYTES:
+        raise ValueError(f"device_id 가 {DEVICE_ID_BYTES}바이트를 넘습니다: {data['device_id']}")
+    timestamp_ms = int(datetime.fromisoformat(data['timestamp']).timestamp() * 1000)
+    accel, gyro = data['accel'], data['gyro']
+    return RECORD_STRUCT.pack(
+        RECORD_VERSION, 0, 0, seq, timestamp_ms, device_id,
+        data['moisture'],
+        accel['x'], accel['y'], accel['z'],
+        gyro['x'], gyro['y'], gyro['z'],
+        data['vibration_raw']
+    )
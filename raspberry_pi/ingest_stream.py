@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebSocket 스트리밍 전송 (UPLINK_TRANSPORT = "websocket")
+
+서버 /ws/ingest 에 연결 하나를 유지하며 로컬 대기열의 측정값을 순번(대기열 seq)과 함께
+바이너리 레코드로 보낸다. 서버는 저장이 끝난 순번까지 누적 ack 를 따로 보내고,
+전송 스레드는 ack 를 기다리지 않고 다음 측정값을 보낸다 (최대 STREAM_MAX_INFLIGHT 건).
+
+- ack 는 수신 스레드가 받아 그 순번까지 로컬 대기열에서 삭제
+- 연결할 때마다 서버가 hello 로 이 스트림에서 저장한 마지막 순번을 알려주면 그다음부터 다시 전송
+  (끊기기 전에 보냈지만 ack 를 못 받은 데이터도 중복 저장되지 않음)
+- 스트림 ID 는 실행마다 새로 만듦, 프로그램/서버가 재시작되면 ack 를 못 받은 데이터는 중복 저장될 수 있음
+- 서버가 형식 오류로 거부한 프레임은 (error 의 순번 범위) 로컬 대기열에서 버림
+  (재전송해도 같은 결과이므로, HTTP 전송이 422 를 받은 묶음을 버리는 것과 같음)
+
+필요 패키지: websocket-client
+"""
+
+import json
+import threading
+import uuid
+from collections import deque
+from urllib.parse import urlencode
+
+import websocket
+
+from ingest_encoding import encode_record
+from config import SERVER_STREAM_URL, DEVICE_ID, CONNECTION_TIMEOUT, STREAM_MAX_INFLIGHT
+
+
+class StreamNotSupported(Exception):
+    """서버가 /ws/ingest 를 지원하지 않음 (이전 버전 서버)"""
+
+
+class IngestStream:
+    """서버 스트리밍 수집 연결 (전송은 전송 스레드, ack 수신은 별도 스레드)"""
+
+    def __init__(self, local_queue, url=SERVER_STREAM_URL, device_id=DEVICE_ID, max_inflight=STREAM_MAX_INFLIGHT):
+        """
+        Args:
+            local_queue: 보낼 데이터가 있는 LocalQueue (ack 받으면 삭제)
+            url: 서버 /ws/ingest URL
+            device_id: 디바이스 ID
+            max_inflight: ack 를 받지 못한 채 보낼 수 있는 최대 건수
+        """
+        self.queue = local_queue
+        self.url = url + "?" + urlencode({"device_id": device_id, "stream": uuid.uuid4().hex})
+        self.max_inflight = max_inflight
+
+        self._ws = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._inflight = deque()   # 보냈지만 ack 받지 못한 프레임 [(마지막 seq, 건수)]
+        self._inflight_count = 0
+        self.sent_seq = 0
+        self.connected = False
+
+        # 통계
+        self.connects = 0
+        self.frames = 0
+        self.total_acked = 0
+        self.total_rejected = 0
+
+    def connect(self):
+        """
+        연결 후 서버가 알려준 마지막 저장 순번까지 ack 처리
+        Returns:
+            int: 서버가 이 스트림에서 저장한 마지막 순번 (이다음부터 전송)
+        Raises:
+            StreamNotSupported: 서버에 /ws/ingest 가 없음
+            ConnectionError: 연결 실패
+        """
+        try:
+            ws = websocket.create_connection(self.url, timeout=CONNECTION_TIMEOUT)
+        except websocket.WebSocketBadStatusException as e:
+            if e.status_code in (403, 404):
+                raise StreamNotSupported(str(e))
+            raise ConnectionError(str(e))
+        except (websocket.WebSocketException, OSError) as e:
+            raise ConnectionError(str(e))
+
+        try:
+            hello = json.loads(ws.recv())
+        except (websocket.WebSocketException, OSError, ValueError) as e:
+            ws.close()
+            raise ConnectionError(f"hello 수신 실패: {e}")
+        if hello.get("type") != "hello":
+            ws.close()
+            raise ConnectionError(f"예상하지 못한 응답: {hello}")
+
+        last_seq = hello.get("last_seq") or 0
+        if last_seq:
+            self._acknowledge(last_seq)
+        with self._lock:
+            # 저장되지 않은 나머지는 다시 보냄
+            self._inflight.clear()
+            self._inflight_count = 0
+            self.sent_seq = last_seq
+
+        ws.settimeout(None)
+        self._ws = ws
+        self.connected = True
+        self.connects += 1
+        self._reader = threading.Thread(target=self._read_loop, args=(ws,), name="stream-reader", daemon=True)
+        self._reader.start()
+        return last_seq
+
+    def send_pending(self, limit):
+        """
+        아직 보내지 않은 측정값을 한 프레임으로 전송 (ack 는 기다리지 않음)
+        Args:
+            limit: 프레임당 최대 건수
+        Returns:
+            int: 보낸 건수 (보낼 것이 없거나 ack 대기 한도면 0)
+        Raises:
+            ConnectionError: 전송 실패
+        """
+        with self._lock:
+            room = min(limit, self.max_inflight - self._inflight_count)
+            after_seq = self.sent_seq
+        if room <= 0:
+            return 0
+
+        items = self.queue.items_after(after_seq, room)
+        if not items:
+            return 0
+        body = b"".join(encode_record(data, seq) for seq, data in items)
+
+        # ack 가 send 보다 먼저 도착해도 맞도록 보내기 전에 기록
+        with self._lock:
+            self._inflight.append((items[-1][0], len(items)))
+            self._inflight_count += len(items)
+            self.sent_seq = items[-1][0]
+
+        try:
+            self._ws.send_binary(body)
+        except (websocket.WebSocketException, OSError) as e:
+            self.connected = False
+            raise ConnectionError(str(e))
+
+        self.frames += 1
+        return len(items)
+
+    def close(self):
+        """연결 종료 (ack 받지 못한 데이터는 로컬 대기열에 남음)"""
+        self.connected = False
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                ws.close(timeout=1)
+            except Exception:
+                pass
+        if self._reader is not None:
+            self._reader.join(timeout=1)
+            self._reader = None
+
+    def _read_loop(self, ws):
+        """
+        수신 스레드: ack → 로컬 대기열 삭제, 연결이 끊기면 connected = False
+        """
+        try:
+            while True:
+                raw = ws.recv()
+                if not raw:
+                    if self._ws is ws:
+                        print("🔌 스트리밍 연결 끊김: 서버가 연결을 닫음")
+                    return
+                message = json.loads(raw)
+                if message.get("type") == "ack":
+                    count = self._acknowledge(message["seq"])
+                    print(f"✅ [{self.total_acked}] {count}건 저장 확인 (순번 {message['seq']})")
+                elif message.get("type") == "error":
+                    print(f"❌ 서버가 스트리밍 데이터를 거부함: {message.get('message')}")
+                    if message.get("last_seq") is not None:
+                        self._reject(message["first_seq"], message["last_seq"])
+
+        except (websocket.WebSocketException, OSError, ValueError) as e:
+            if self._ws is ws:
+                print(f"🔌 스트리밍 연결 끊김: {e}")
+
+        finally:
+            if self._ws is ws:
+                self.connected = False
+
+    def _reject(self, first_seq, last_seq):
+        """
+        서버가 거부한 순번 범위 버림 (그 앞은 이미 저장 완료 ack 를 받음)
+        - 재연결 후 hello 순번 다음부터 보낼 때 다시 보내지 않도록 로컬 대기열에서 삭제
+        """
+        self.queue.ack(last_seq)
+        with self._lock:
+            while self._inflight and self._inflight[0][0] <= last_seq:
+                self._inflight_count -= self._inflight.popleft()[1]
+            self.total_rejected += last_seq - first_seq + 1
+        print(f"🗑️ 거부된 데이터 버림 (순번 {first_seq}~{last_seq})")
+
+    def _acknowledge(self, seq):
+        """
+        seq 까지 저장 완료 → 로컬 대기열에서 삭제
+        Returns:
+            int: 이번에 확인된 건수
+        """
+        self.queue.ack(seq)
+        count = 0
+        with self._lock:
+            while self._inflight and self._inflight[0][0] <= seq:
+                count += self._inflight.popleft()[1]
+            self._inflight_count -= count
+            self.total_acked += count
+        return count
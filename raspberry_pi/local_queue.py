@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 전송 대기열 (store-and-forward)
+
+서버가 끊겨도 측정값을 잃지 않도록 SD 카드의 SQLite 파일에 보관했다가
+다시 연결되면 오래된 것부터 일괄 전송한다.
+
+- put(): 메모리에 먼저 쌓고 QUEUE_FLUSH_ROWS 건 / QUEUE_FLUSH_INTERVAL 초마다 한 번에 기록
+  (SD 카드 쓰기/fsync 횟수 최소화, 서버가 연결되어 있으면 기록 전에 전송되어 디스크에 쓰지 않음)
+- peek(): 전송할 묶음 (디스크 → 메모리 순, 가장 오래된 것부터)
+- items_after(): 이미 보낸 seq 다음 데이터 (스트리밍 전송)
+- ack(): 전송 성공한 묶음 삭제
+- 최대 QUEUE_MAX_ROWS 건, 넘으면 가장 오래된 데이터부터 버림
+
+전송 성공 후 ack 전에 프로그램이 종료되면 다음 실행 때 같은 데이터를 다시 보낼 수 있다 (최소 1회 전송).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from config import QUEUE_PATH, QUEUE_MAX_ROWS, QUEUE_FLUSH_ROWS, QUEUE_FLUSH_INTERVAL
+
+
+class LocalQueue:
+    """SQLite 파일 기반 전송 대기열 (스레드 안전)"""
+
+    def __init__(
+        self,
+        path=QUEUE_PATH,
+        max_rows=QUEUE_MAX_ROWS,
+        flush_rows=QUEUE_FLUSH_ROWS,
+        flush_interval=QUEUE_FLUSH_INTERVAL
+    ):
+        """
+        대기열 파일 열기 (없으면 생성)
+        Args:
+            path: SQLite 파일 경로
+            max_rows: 최대 보관 건수
+            flush_rows: 이 건수가 쌓이면 디스크에 기록
+            flush_interval: 가장 오래된 미기록 데이터가 이 시간(초) 지나면 디스크에 기록
+        """
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS queue (seq INTEGER PRIMARY KEY, payload TEXT NOT NULL)")
+
+        self._disk_rows = self._conn.execute("SELECT COUNT(*) FROM queue").fetchone()[0]
+        last_seq = self._conn.execute("SELECT MAX(seq) FROM queue").fetchone()[0]
+        self._next_seq = (last_seq or 0) + 1
+
+        # 아직 디스크에 기록하지 않은 데이터 [(seq, payload)]
+        self._pending = []
+        self._pending_since = None
+
+        # 통계
+        self.dropped = 0
+        self.flushes = 0
+
+        if self._disk_rows:
+            print(f"📦 로컬 대기열에 미전송 데이터 {self._disk_rows}건 있음")
+
+    def __len__(self):
+        with self._lock:
+            return self._disk_rows + len(self._pending)
+
+    def put(self, data):
+        """
+        측정값 1건 추가 (필요하면 디스크에 기록)
+        Args:
+            data: 서버로 보낼 센서 데이터 (dict)
+        """
+        with self._lock:
+            self._pending.append((self._next_seq, json.dumps(data, separators=(",", ":"))))
+            self._next_seq += 1
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+
+            if (len(self._pending) >= self.flush_rows
+                    or time.monotonic() - self._pending_since >= self.flush_interval):
+                self._flush()
+
+    def peek(self, limit):
+        """
+        전송할 묶음 (가장 오래된 것부터, 삭제하지 않음)
+        Args:
+            limit: 최대 건수
+        Returns:
+            (마지막 seq, 센서 데이터 목록), 비어 있으면 (None, [])
+        """
+        items = self.items_after(0, limit)
+        if not items:
+            return None, []
+        return items[-1][0], [data for _, data in items]
+
+    def items_after(self, after_seq, limit):
+        """
+        after_seq 다음 데이터 (오래된 것부터, 삭제하지 않음)
+        - 스트리밍 전송에서 ack 를 기다리지 않고 이어 보낼 때 사용
+        Args:
+            after_seq: 이미 보낸 마지막 seq
+            limit: 최대 건수
+        Returns:
+            [(seq, 센서 데이터)]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload FROM queue WHERE seq > ? ORDER BY seq LIMIT ?", (after_seq, limit)
+            ).fetchall()
+            if len(rows) < limit:
+                rows += [item for item in self._pending if item[0] > after_seq][:limit - len(rows)]
+
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    def ack(self, last_seq):
+        """
+        last_seq 까지 전송 완료 → 삭제
+        """
+        with self._lock:
+            if self._disk_rows:
+                deleted = self._conn.execute("DELETE FROM queue WHERE seq <= ?", (last_seq,)).rowcount
+                self._disk_rows -= deleted
+
+            kept = [item for item in self._pending if item[0] > last_seq]
+            if len(kept) != len(self._pending):
+                self._pending = kept
+                self._pending_since = time.monotonic() if kept else None
+
+    def flush(self):
+        """미기록 데이터를 디스크에 기록 (종료 시 호출)"""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """기록 후 파일 닫기"""
+        self.flush()
+        self._conn.close()
+
+    def _flush(self):
+        """미기록 데이터를 한 트랜잭션으로 기록하고 최대 건수를 넘는 오래된 데이터 삭제"""
+        if not self._pending:
+            return
+
+        self._conn.execute("BEGIN")
+        self._conn.executemany("INSERT INTO queue (seq, payload) VALUES (?, ?)", self._pending)
+        self._disk_rows += len(self._pending)
+
+        overflow = self._disk_rows - self.max_rows
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM queue WHERE seq IN (SELECT seq FROM queue ORDER BY seq LIMIT ?)", (overflow,)
+            )
+            self._disk_rows -= overflow
+            self.dropped += overflow
+            print(f"⚠️ 로컬 대기열 가득 참 - 오래된 데이터 {overflow}건 삭제")
+
+        self._conn.execute("COMMIT")
+        self._pending = []
+        self._pending_since = None
+        self.flushes += 1
@@ -4,151 +4,469 @@
 센서 클라이언트 - 서버로 데이터 전송
 동료의 정상 작동 코드 기준으로 리팩토링
 
+두 스레드로 동작한다:
+- 측정 (메인 스레드): monotonic 시계 기준 절대 시각마다 센서를 읽어 메모리 대기열에 넣음
+- 전송 (별도 스레드): 메모리 대기열 → 로컬 대기열(local_queue.py, SD 카드) → 오래된 것부터 일괄 전송
+
+서버 응답 지연/끊김은 전송 스레드만 기다리게 하므로 측정 주기와 무관하고,
+끊긴 동안의 데이터는 로컬 대기열에 보관했다가 다시 연결되면 전송된다.
+
+UPLINK_TRANSPORT = "websocket" 이면 HTTP 요청 대신 연결 하나로 측정 즉시 스트리밍 전송 (ingest_stream.py)
+
 실행 방법:
     python3 sensor_client.py
-    
+
 종료:
     Ctrl+C
 """
 
+import gzip
+import json
+import queue
+import threading
 import time
+from collections import deque
+
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from sensor_manager import SensorManager
+from local_queue import LocalQueue
+from ingest_encoding import encode_record, DEVICE_ID_BYTES
+try:
+    # 스트리밍 전송 (UPLINK_TRANSPORT = "websocket") 에만 필요 - websocket-client 패키지
+    from ingest_stream import IngestStream, StreamNotSupported
+except ImportError:
+    IngestStream = StreamNotSupported = None
 from config import (
-    SERVER_URL,
+    SERVER_BATCH_URL,
+    SERVER_BINARY_URL,
     SEND_INTERVAL,
-    MAX_RETRIES,
+    DEVICE_ID,
     RETRY_DELAY,
-    CONNECTION_TIMEOUT
+    RETRY_MAX_DELAY,
+    CONNECTION_TIMEOUT,
+    DRAIN_BATCH_SIZE,
+    SAMPLE_QUEUE_SIZE,
+    JITTER_REPORT_EVERY,
+    UPLINK_WINDOW,
+    UPLINK_FORMAT,
+    UPLINK_GZIP,
+    UPLINK_GZIP_MIN_BYTES,
+    UPLINK_GZIP_LEVEL,
+    UPLINK_TRANSPORT
 )
 
 
+class JitterStats:
+    """측정 시각 지연 통계 (예정 시각 대비 실제 측정 시각)"""
+
+    def __init__(self, window=3600):
+        self.recent = deque(maxlen=window)
+        self.max_ms = 0.0
+        self.skipped = 0
+
+    def add(self, jitter_ms):
+        self.recent.append(jitter_ms)
+        self.max_ms = max(self.max_ms, jitter_ms)
+
+    def summary(self):
+        """
+        Returns:
+            str: 최근 구간 p50 / p99 / 최대 지연 (밀리초)
+        """
+        if not self.recent:
+            return "측정 없음"
+        values = sorted(self.recent)
+        p50 = values[len(values) // 2]
+        p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+        return (
+            f"p50 {p50:.2f}ms | p99 {p99:.2f}ms | 최대 {self.max_ms:.2f}ms | "
+            f"건너뛴 주기 {self.skipped}회"
+        )
+
+
 class SensorClient:
     """센서 데이터 수집 및 서버 전송 클라이언트"""
-    
+
     def __init__(self):
         """클라이언트 초기화"""
         print("=" * 60)
         print("🚀 센서 클라이언트 시작")
         print("=" * 60)
-        print(f"서버 URL: {SERVER_URL}")
-        print(f"전송 간격: {SEND_INTERVAL}초")
-        print(f"최대 재시도: {MAX_RETRIES}회")
+        print(f"서버 URL: {SERVER_BATCH_URL}")
+        print(f"디바이스 ID: {DEVICE_ID}")
+        print(f"측정 간격: {SEND_INTERVAL}초")
+        print(f"전송 방식: {UPLINK_TRANSPORT}")
+        print(f"모아 보내기: {UPLINK_WINDOW}초, 형식: {UPLINK_FORMAT}" + (" (gzip)" if UPLINK_GZIP else ""))
+        print(f"재시도 간격: {RETRY_DELAY}~{RETRY_MAX_DELAY}초 (그동안 로컬 대기열에 보관)")
         print("=" * 60)
-        
+
         # 센서 매니저 초기화
         self.sensor_manager = SensorManager()
-        
+
+        # 측정 → 전송 스레드 (메모리, 크기 제한)
+        self.samples = queue.Queue(maxsize=SAMPLE_QUEUE_SIZE)
+
+        # 로컬 대기열 (전송 성공 전까지 보관)
+        self.queue = LocalQueue()
+
+        # 서버 연결 유지 (전송 스레드 하나만 사용, 연결 1개 재사용)
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.gzip_enabled = UPLINK_GZIP
+        self.uplink_format = UPLINK_FORMAT
+        if self.uplink_format == "binary" and len(DEVICE_ID.encode('utf-8')) > DEVICE_ID_BYTES:
+            print(f"⚠️ DEVICE_ID 가 {DEVICE_ID_BYTES}바이트를 넘어 바이너리 형식을 쓸 수 없음 - json 으로 전송")
+            self.uplink_format = "json"
+
+        # 스트리밍 전송 (없으면 HTTP)
+        self.stream = None
+        if UPLINK_TRANSPORT == "websocket":
+            self.stream = self.create_stream()
+
+        # 모아 보내기: 첫 미전송 데이터가 들어온 시각, 진동 감지 데이터가 있으면 즉시 전송
+        self.window_started = None
+        self.urgent = False
+
+        # 전송 실패 후 재시도 대기
+        self.retry_delay = RETRY_DELAY
+        self.next_attempt = 0.0
+
         # 통계
+        self.jitter = JitterStats()
+        self.total_sampled = 0
+        self.total_spilled = 0
         self.total_sent = 0
+        self.total_requests = 0
+        self.total_raw_bytes = 0
+        self.total_wire_bytes = 0
         self.total_failed = 0
+        self.total_rejected = 0
         self.running = True
-    
+
+    def create_stream(self):
+        """
+        스트리밍 전송 연결 준비 (연결은 전송 스레드에서)
+        Returns:
+            IngestStream, 쓸 수 없으면 None (HTTP 로 전송)
+        """
+        if len(DEVICE_ID.encode('utf-8')) > DEVICE_ID_BYTES:
+            print(f"⚠️ DEVICE_ID 가 {DEVICE_ID_BYTES}바이트를 넘어 스트리밍 전송을 쓸 수 없음 - HTTP 로 전송")
+            return None
+        if IngestStream is None:
+            print("⚠️ websocket-client 패키지가 없어 HTTP 로 전송 (pip3 install websocket-client)")
+            return None
+        return IngestStream(self.queue)
+
     def collect_data(self):
         """
         센서 데이터 수집
         Returns:
-            dict: 센서 데이터
+            dict: 센서 데이터 (서버 /sensor 요청 형식)
         """
         data = self.sensor_manager.read_all()
-        data['timestamp'] = datetime.now().isoformat()
+        data['vibration_raw'] = data.pop('vibration')
+        data['device_id'] = DEVICE_ID
+        # 대기열에 쌓였다가 나중에 전송될 수 있으므로 측정 시각을 타임존과 함께 기록
+        data['timestamp'] = datetime.now().astimezone().isoformat()
         return data
-    
-    def send_data(self, data):
+
+    # ==========================================
+    # 측정 (메인 스레드)
+    # ==========================================
+
+    def sample_loop(self):
+        """
+        고정 주기 측정 루프
+        - 다음 측정 시각은 이전 예정 시각 + SEND_INTERVAL (실제 측정 시각 기준이 아니므로 지연이 누적되지 않음)
+        - 한 주기 이상 늦으면 놓친 측정은 건너뛰고 다음 예정 시각으로
+        """
+        next_sample = time.monotonic()
+        while self.running:
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            self.jitter.add((time.monotonic() - next_sample) * 1000)
+            data = self.collect_data()
+            self.total_sampled += 1
+
+            try:
+                self.samples.put_nowait(data)
+            except queue.Full:
+                # 전송 스레드가 멈춰 있음 → 로컬 대기열에 직접 (측정은 기다리지 않음)
+                self.queue.put(data)
+                self.total_spilled += 1
+
+            print(
+                f"📡 수분: {data['moisture']} | "
+                f"진동: {data['vibration_raw']} | "
+                f"가속도 Z: {data['accel']['z']:.2f}"
+            )
+
+            # 진동 감지 시 즉시 경고 (전송 여부와 무관)
+            if data['vibration_raw'] == 1:
+                print("\n🚨🚨 [즉시 경고] 진동이 감지되었습니다! 🚨🚨\n")
+
+            if self.total_sampled % JITTER_REPORT_EVERY == 0:
+                print(f"⏱️ 측정 지연: {self.jitter.summary()}")
+
+            next_sample += SEND_INTERVAL
+            missed = int((time.monotonic() - next_sample) // SEND_INTERVAL)
+            if missed > 0:
+                self.jitter.skipped += missed
+                next_sample += missed * SEND_INTERVAL
+
+    # ==========================================
+    # 전송 (별도 스레드)
+    # ==========================================
+
+    def send_loop(self):
+        """
+        전송 루프: 측정값을 로컬 대기열로 옮기고, 전송 시각이 되면 일괄 전송
+        """
+        while self.running:
+            if self.stream is not None:
+                self.stream_step()
+                continue
+
+            if len(self.queue):
+                wait = max(self.send_due() - time.monotonic(), 0)
+            else:
+                wait = SEND_INTERVAL
+            self.collect_samples(timeout=wait)
+            if len(self.queue) and time.monotonic() >= self.send_due():
+                self.drain()
+
+        # 종료: 남은 측정값은 로컬 대기열에 보관 (다음 실행 때 전송)
+        self.collect_samples(timeout=0)
+
+    def stream_step(self):
         """
-        서버로 데이터 전송 (재시도 로직 포함)
+        스트리밍 전송 1회
+        - 끊겨 있으면 재시도 간격에 맞춰 재연결 (서버가 저장한 마지막 순번 다음부터 이어서)
+        - 연결되어 있으면 새 측정값을 ack 기다리지 않고 바로 전송, 보낼 것이 없으면 다음 측정값 대기
+        """
+        stream = self.stream
+        if not stream.connected:
+            wait = self.next_attempt - time.monotonic()
+            if wait > 0:
+                self.collect_samples(timeout=min(wait, SEND_INTERVAL))
+                return
+
+            stream.close()
+            try:
+                last_seq = stream.connect()
+            except StreamNotSupported as e:
+                print(f"⚠️ 서버가 스트리밍 수집을 지원하지 않음 ({e}) - HTTP 로 전송")
+                self.stream = None
+                return
+            except ConnectionError as e:
+                print(f"🔌 스트리밍 연결 실패 - 대기열 {len(self.queue)}건 보관 중: {e}")
+                self.retry_later()
+                return
+
+            print(f"🔗 스트리밍 연결 - 서버 저장 순번 {last_seq} 다음부터 전송")
+            self.retry_delay = RETRY_DELAY
+
+        self.collect_samples(timeout=0)
+        try:
+            sent = stream.send_pending(DRAIN_BATCH_SIZE)
+        except ConnectionError as e:
+            print(f"🔌 스트리밍 전송 실패 - 대기열 {len(self.queue)}건 보관 중: {e}")
+            stream.close()
+            self.retry_later()
+            return
+
+        if sent:
+            self.total_requests += 1
+            self.window_started = None
+            self.urgent = False
+        else:
+            # 새 측정값 (또는 ack 로 전송 한도가 빌 때) 까지 대기
+            self.collect_samples(timeout=SEND_INTERVAL)
+
+    def retry_later(self):
+        """전송 실패: 재시도 간격을 늘려가며 그동안은 전송 시도 안 함"""
+        self.total_failed += 1
+        self.next_attempt = time.monotonic() + self.retry_delay
+        self.retry_delay = min(self.retry_delay * 2, RETRY_MAX_DELAY)
+
+    def send_due(self):
+        """
+        다음 전송 시각 (monotonic)
+        - 재시도 대기 중이면 그 이후
+        - 모아 보내기 중이면 첫 미전송 데이터 + UPLINK_WINDOW (진동 감지 / 한 묶음이 차면 즉시)
+        """
+        due = self.next_attempt
+        if UPLINK_WINDOW and self.window_started is not None and not self.urgent \
+                and len(self.queue) < DRAIN_BATCH_SIZE:
+            due = max(due, self.window_started + UPLINK_WINDOW)
+        return due
+
+    def collect_samples(self, timeout):
+        """
+        메모리 대기열의 측정값을 로컬 대기열로 옮김 (첫 건은 timeout 초까지 대기)
+        """
+        try:
+            item = self.samples.get(timeout=timeout) if timeout > 0 else self.samples.get_nowait()
+        except queue.Empty:
+            return
+
+        while True:
+            if self.window_started is None:
+                self.window_started = time.monotonic()
+            if item['vibration_raw'] == 1:
+                self.urgent = True
+            self.queue.put(item)
+            try:
+                item = self.samples.get_nowait()
+            except queue.Empty:
+                return
+
+    def send_batch(self, items):
+        """
+        대기열 묶음을 서버로 일괄 전송
         Args:
-            data: 전송할 센서 데이터
+            items: 전송할 센서 데이터 목록
         Returns:
-            bool: 성공 여부
+            bool: 서버가 받았으면 True (대기열에서 삭제해도 됨)
         """
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                response = requests.post(
-                    SERVER_URL,
-                    json=data,
-                    timeout=CONNECTION_TIMEOUT
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    risk_level = result.get('risk_level', 'N/A')
-                    
-                    # 전송 성공 로그
-                    print(f"✅ [{self.total_sent + 1}] 전송 성공 - 위험도: {risk_level}")
-                    
-                    # 진동 감지 시 즉시 경고
-                    if data.get('vibration', 0) == 1:
-                        print("\n🚨🚨 [즉시 경고] 진동이 감지되었습니다! 🚨🚨\n")
-                    
-                    return True
-                else:
-                    print(f"⚠️ 서버 오류 (시도 {attempt}/{MAX_RETRIES}): Status {response.status_code}")
-            
-            except requests.exceptions.Timeout:
-                print(f"⏱️ 타임아웃 (시도 {attempt}/{MAX_RETRIES})")
-            
-            except requests.exceptions.ConnectionError:
-                print(f"🔌 연결 실패 (시도 {attempt}/{MAX_RETRIES}) - 서버가 실행 중인지 확인하세요")
-            
-            except Exception as e:
-                print(f"❌ 전송 오류 (시도 {attempt}/{MAX_RETRIES}): {e}")
-            
-            # 재시도 전 대기
-            if attempt < MAX_RETRIES:
-                time.sleep(RETRY_DELAY)
-        
-        return False
-    
+        binary = self.uplink_format == "binary"
+        if binary:
+            url = SERVER_BINARY_URL
+            body = b"".join(encode_record(item) for item in items)
+            headers = {"Content-Type": "application/octet-stream"}
+        else:
+            url = SERVER_BATCH_URL
+            body = json.dumps(items, separators=(",", ":")).encode()
+            headers = {"Content-Type": "application/json"}
+        self.total_raw_bytes += len(body)
+        compressed = self.gzip_enabled and len(body) >= UPLINK_GZIP_MIN_BYTES
+        if compressed:
+            body = gzip.compress(body, compresslevel=UPLINK_GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+        self.total_wire_bytes += len(body)
+        self.total_requests += 1
+
+        try:
+            response = self.session.post(url, data=body, headers=headers, timeout=CONNECTION_TIMEOUT)
+
+        except requests.exceptions.Timeout:
+            print(f"⏱️ 타임아웃 - 대기열 {len(self.queue)}건 보관 중")
+            return False
+
+        except requests.exceptions.ConnectionError:
+            print(f"🔌 연결 실패 - 대기열 {len(self.queue)}건 보관 중 (서버가 실행 중인지 확인하세요)")
+            return False
+
+        except Exception as e:
+            print(f"❌ 전송 오류: {e}")
+            return False
+
+        if binary and response.status_code == 404:
+            # 바이너리 수집을 지원하지 않는 (이전 버전) 서버 → json 으로 다시 전송
+            print("⚠️ 서버가 바이너리 형식을 지원하지 않음 (Status 404) - json 으로 전송")
+            self.uplink_format = "json"
+            return False
+
+        if compressed and response.status_code in (400, 415):
+            # 압축 본문을 해제하지 못하는 (이전 버전) 서버 → 압축 없이 다시 전송
+            # (FastAPI 는 읽을 수 없는 본문에 400, 데이터 검증 실패 422 는 아래에서 버리고 압축은 유지)
+            print(f"⚠️ 서버가 gzip 본문을 받지 못함 (Status {response.status_code}) - 압축 끔")
+            self.gzip_enabled = False
+            return False
+
+        if response.status_code == 422:
+            # 형식이 잘못된 데이터는 재시도해도 실패하므로 버림 (대기열이 막히지 않도록)
+            print(f"❌ 서버가 데이터 형식을 거부함 ({len(items)}건 버림): {response.text[:200]}")
+            self.total_rejected += len(items)
+            return True
+
+        if response.status_code != 200 or response.json().get('status') != 'ok':
+            print(f"⚠️ 서버 오류: Status {response.status_code}")
+            return False
+
+        results = response.json().get('items', [])
+        risk_level = results[-1].get('risk_level', 'N/A') if results else 'N/A'
+        self.total_sent += len(items)
+        print(f"✅ [{self.total_sent}] {len(items)}건 전송 성공 - 최근 위험도: {risk_level}")
+        return True
+
+    def drain(self):
+        """
+        로컬 대기열을 비울 때까지 오래된 것부터 전송
+        - 실패하면 재시도 간격을 늘려가며 그동안은 전송 시도 안 함 (측정값은 계속 쌓임)
+        """
+        while self.running:
+            last_seq, items = self.queue.peek(DRAIN_BATCH_SIZE)
+            if not items:
+                return
+
+            if not self.send_batch(items):
+                self.retry_later()
+                return
+
+            self.queue.ack(last_seq)
+            self.retry_delay = RETRY_DELAY
+            if not len(self.queue):
+                self.window_started = None
+                self.urgent = False
+
+            # 전송하는 동안 들어온 측정값도 이어서
+            self.collect_samples(timeout=0)
+
     def print_statistics(self):
         """통계 출력"""
-        total = self.total_sent + self.total_failed
-        success_rate = (self.total_sent / total * 100) if total > 0 else 0
-        
         print("\n" + "=" * 60)
         print("📊 전송 통계")
         print("=" * 60)
-        print(f"총 전송 성공: {self.total_sent}회")
-        print(f"총 전송 실패: {self.total_failed}회")
-        print(f"성공률: {success_rate:.1f}%")
+        print(f"총 측정: {self.total_sampled}건")
+        print(f"측정 지연: {self.jitter.summary()}")
+        if self.stream is not None:
+            self.total_sent += self.stream.total_acked
+            self.total_rejected += self.stream.total_rejected
+            print(f"스트리밍: 연결 {self.stream.connects}회")
+        print(f"총 전송 성공: {self.total_sent}건 (요청 {self.total_requests}회)")
+        if self.total_raw_bytes:
+            print(
+                f"전송량: {self.total_wire_bytes / 1024:.1f}KB "
+                f"(압축 전 {self.total_raw_bytes / 1024:.1f}KB, {self.total_wire_bytes / self.total_raw_bytes * 100:.0f}%)"
+            )
+        print(f"전송 실패 (재시도): {self.total_failed}회")
+        print(f"서버 거부: {self.total_rejected}건")
+        print(f"전송 스레드 지연으로 직접 보관: {self.total_spilled}건")
+        print(f"미전송 (로컬 대기열): {len(self.queue)}건")
+        print(f"대기열 초과로 버림: {self.queue.dropped}건")
         print("=" * 60)
-    
+
     def run(self):
-        """메인 루프 실행"""
+        """메인 루프 실행 (측정은 이 스레드, 전송은 별도 스레드)"""
         print("\n▶️ 데이터 수집 및 전송 시작\n")
-        
+
+        sender = threading.Thread(target=self.send_loop, name="sender", daemon=True)
+        sender.start()
+
         try:
-            while self.running:
-                # 센서 데이터 수집
-                data = self.collect_data()
-                
-                # 간단한 로그 출력
-                print(
-                    f"📡 수분: {data['moisture']} | "
-                    f"진동: {data['vibration']} | "
-                    f"가속도 Z: {data['accel']['z']:.2f}",
-                    end=" "
-                )
-                
-                # 서버로 전송
-                if self.send_data(data):
-                    self.total_sent += 1
-                else:
-                    self.total_failed += 1
-                    print("❌ 최대 재시도 초과")
-                
-                # 대기
-                time.sleep(SEND_INTERVAL)
-        
+            self.sample_loop()
+
         except KeyboardInterrupt:
             print("\n\n🛑 사용자가 종료를 요청했습니다")
-        
+
         except Exception as e:
             print(f"\n❌ 예상치 못한 오류: {e}")
-        
+
         finally:
             print("\n🛑 센서 클라이언트 종료")
+            self.running = False
+            # 진행 중인 전송이 끝날 때까지 (최대 타임아웃) 기다린 뒤 남은 데이터 기록
+            sender.join(timeout=CONNECTION_TIMEOUT + 1)
+            if self.stream is not None:
+                self.stream.close()
+            self.session.close()
+            self.queue.close()
             self.sensor_manager.cleanup()
             self.print_statistics()
 
@@ -1,6 +1,8 @@
 """
 테스트용 센서 데이터 전송 스크립트
 랜덤 센서 데이터를 서버에 전송합니다.
+
+여러 디바이스로 부하를 주고 지연을 재려면 benchmarks/load_generator.py 를 사용하세요.
 """
 
 import requests
@@ -11,6 +13,9 @@ from datetime import datetime
 # 서버 URL
 SERVER_URL = "http://localhost:8000/sensor"
 
+# 시뮬레이터 디바이스 ID
+DEVICE_ID = "test-sensor"
+
 def generate_sensor_data():
     """
     랜덤 센서 데이터 생성
@@ -29,6 +34,7 @@ def generate_sensor_data():
     vibration = random.uniform(0.5, 3.5)
     
     return {
+        "device_id": DEVICE_ID,
         "moisture": moisture,
         "accel": {
             "x": accel_x,
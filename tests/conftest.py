@@ -0,0 +1,37 @@
+"""
+테스트 공통 설정
+- app 모듈을 가져오기 전에 DB 를 메모리 SQLite 로 지정 (MariaDB 없이 실행)
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("SINKER_DB_URL", "sqlite+aiosqlite:///:memory:")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db_tables():
+    """테스트마다 빈 테이블 생성 (메모리 DB 는 연결 1개를 공유하므로 끝나면 삭제)"""
+    import app.models  # noqa: F401  (테이블 등록)
+    from app.database import Base, engine
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    """콜드 아카이브를 임시 디렉터리로 지정"""
+    from app.archive import cold_archive
+
+    monkeypatch.setattr(cold_archive, "directory", str(tmp_path))
+    monkeypatch.setattr(cold_archive, "_files", {})
+    return tmp_path
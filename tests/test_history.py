@@ -0,0 +1,87 @@
+"""
+이력 조회 / CSV 내보내기 (app/crud.py) 와 콜드 아카이브 병합 테스트
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app import crud
+from app.archive import cold_archive
+from app.database import SessionLocal
+from app.models import SensorData
+from app.ring_buffer import FLOAT_COLUMNS
+
+ARCHIVED_DAY = datetime(2024, 1, 1)
+
+
+def make_row(row_id, created_at, device_id="n1"):
+    return SensorData(
+        id=row_id, device_id=device_id, created_at=created_at, risk_level=0, threshold_version=None,
+        **{name: float(row_id) for name in FLOAT_COLUMNS}
+    )
+
+
+def archive_rows(rows):
+    """행 목록을 날짜별 아카이브 파일로 기록 (partitions 의 아카이브 형식과 같음)"""
+    day = rows[0].created_at.date()
+    cold_archive.write_day(day, {
+        "id": np.array([row.id for row in rows], dtype=np.int64),
+        "device_id": np.array([row.device_id for row in rows], dtype=object),
+        "created_at": np.array([row.created_at for row in rows], dtype="datetime64[us]").astype(np.int64),
+        "risk_level": np.zeros(len(rows), dtype=np.int8),
+        "threshold_version": np.full(len(rows), -1, dtype=np.int32),
+        **{name: np.array([getattr(row, name) for row in rows], dtype=np.float64) for name in FLOAT_COLUMNS},
+    })
+
+
+async def insert(rows):
+    async with SessionLocal() as db:
+        db.add_all(rows)
+        await db.commit()
+
+
+def test_full_db_page_does_not_read_archive(db_tables, archive_dir, monkeypatch):
+    archive_rows([make_row(i, ARCHIVED_DAY + timedelta(minutes=i)) for i in range(1, 4)])
+    recent = datetime(2024, 3, 1)
+    asyncio.run(insert([make_row(100 + i, recent + timedelta(minutes=i)) for i in range(10)]))
+
+    calls = []
+    original = cold_archive.query
+    monkeypatch.setattr(cold_archive, "query", lambda *args: calls.append(args) or original(*args))
+
+    async def history(**kwargs):
+        async with SessionLocal() as db:
+            return await crud.get_sensor_history(db, **kwargs)
+
+    rows = asyncio.run(history(limit=5))
+    assert [row.id for row in rows] == [109, 108, 107, 106, 105]
+    assert calls == []
+
+    # DB 페이지가 차지 않으면 아카이브 행으로 채움
+    rows = asyncio.run(history(limit=12))
+    assert [row.id for row in rows] == [109, 108, 107, 106, 105, 104, 103, 102, 101, 100, 3, 2]
+    assert len(calls) == 1
+
+
+def test_export_merges_rows_in_archive_and_db(db_tables, archive_dir):
+    archived = [make_row(i, ARCHIVED_DAY + timedelta(minutes=i)) for i in range(1, 6)]
+    archive_rows(archived)
+
+    # 아카이브 직후 DB 삭제 전 (같은 행이 양쪽에 있음) + 그 날짜에 늦게 들어온 행 + 이후 날짜
+    late = make_row(6, ARCHIVED_DAY + timedelta(minutes=2, seconds=30))
+    later = make_row(7, ARCHIVED_DAY + timedelta(days=1))
+    asyncio.run(insert([make_row(row.id, row.created_at) for row in archived] + [late, later]))
+
+    async def export():
+        exported = []
+        async with SessionLocal() as db:
+            async for rows in crud.stream_sensor_history(db, chunk_size=2):
+                exported.extend(rows)
+        return exported
+
+    exported = asyncio.run(export())
+    times = [row[0] for row in exported]
+    assert len(exported) == 7
+    assert times == sorted(times)
+    assert [row[2] for row in exported] == [1.0, 2.0, 6.0, 3.0, 4.0, 5.0, 7.0]
@@ -0,0 +1,53 @@
+"""
+수집 파이프라인 (app/ingest.py) 테스트
+"""
+import asyncio
+
+from app.ingest import IngestPipeline
+
+
+class FlakyPipeline(IngestPipeline):
+    """bad 표시가 있는 행이 들어 있으면 배치 전체가 실패하는 파이프라인 (제약 조건 위반 흉내)"""
+    def __init__(self, **kwargs):
+        super().__init__(retry_delay=0, max_retries=2, **kwargs)
+        self.saved = []
+
+    async def _write(self, batch):
+        if any(values.get("bad") for values in batch):
+            raise ValueError("constraint violation")
+        self.saved.extend(values["seq"] for values in batch)
+        return batch
+
+
+def test_bad_row_is_dropped_and_later_batches_are_written():
+    async def scenario():
+        pipeline = FlakyPipeline(batch_size=4, flush_interval=0.01)
+        await pipeline.start()
+        for seq in range(8):
+            assert pipeline.enqueue({"device_id": "n1", "seq": seq, "bad": seq == 2})
+        await asyncio.sleep(0.2)
+        for seq in range(8, 12):
+            assert pipeline.enqueue({"device_id": "n1", "seq": seq})
+        await pipeline.stop()
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+
+    assert sorted(pipeline.saved) == [0, 1, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+    assert pipeline.written == 11
+    assert pipeline.dropped == 1
+    assert pipeline.depth == 0
+
+
+def test_retries_are_capped():
+    async def scenario():
+        pipeline = FlakyPipeline()
+        await pipeline._write_batch([{"device_id": "n1", "seq": 0, "bad": True}])
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+
+    # 첫 시도 + max_retries 번 재시도 후 버림
+    assert pipeline.failed_batches == 3
+    assert pipeline.dropped == 1
+    assert pipeline.written == 0
@@ -0,0 +1,35 @@
+"""
+분/시간 롤업 (app/rollups.py) 테스트
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.rollups import aggregate_rollups
+from app.thresholds import threshold_store, ThresholdSnapshot
+
+
+def make_row(created_at, vibration_raw, threshold_version):
+    return SimpleNamespace(
+        device_id="n1", created_at=created_at, moisture=400.0, accel_x=0.0, accel_y=0.0,
+        vibration_raw=vibration_raw, risk_level=0, threshold_version=threshold_version
+    )
+
+
+def test_vibration_count_uses_each_rows_threshold_version(monkeypatch):
+    monkeypatch.setattr(threshold_store, "current", threshold_store.current)
+    monkeypatch.setattr(threshold_store, "_versions", dict(threshold_store._versions))
+    threshold_store.swap(ThresholdSnapshot.from_values(1, {"vibration_threshold": 1.0}))
+    threshold_store.swap(ThresholdSnapshot.from_values(2, {"vibration_threshold": 3.0}))
+
+    # 같은 분 버킷 안에서 임계값이 1.0 → 3.0 으로 바뀜
+    bucket = datetime(2024, 1, 1, 12, 0)
+    rows = [
+        make_row(bucket, 2.0, 1),                          # 버전 1 기준 진동
+        make_row(bucket + timedelta(seconds=10), 2.0, 1),  # 버전 1 기준 진동
+        make_row(bucket + timedelta(seconds=20), 2.0, 2),  # 버전 2 기준 정상
+        make_row(bucket + timedelta(seconds=30), 3.5, 2),  # 버전 2 기준 진동
+    ]
+
+    [group] = aggregate_rollups(rows, "minute")
+    assert group["sample_count"] == 4
+    assert group["vibration_count"] == 3